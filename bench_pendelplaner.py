@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Offline-Benchmark für pendelplaner (ohne API-Key, ohne Netzwerk).
+
+Ersetzt den Routes-Client durch SyntheticRoutesClient (deterministisches Verkehrsmodell,
+optionale Latenz/Fehlerquote) und führt feste Szenarien aus:
+  - single-day:    Morgen-Scan, Abend-Scan (Mittagspause), Tages-Optimierung
+  - week-gym:      ganze Woche mit Gym-Optionen und Zeitkonto
+  - ho-allocator:  Wochenplanung mit HO-Quote (Allokator)
+
+Gemessen werden Laufzeit je Schritt, API-Calls pro Planer-Phase (PhaseProfiler), Cache-Hit-Ratio und Peak-Memory.
+Mit --baseline wird gegen einen früheren --json Lauf verglichen (Exit-Code 1 bei Regression).
+Mit --replay-check wird zusätzlich eine Woche mit den Einstellungen aus example.env über den
+Google-Client (Antworten aus dem Verkehrsmodell) mit --record aufgezeichnet und per --replay
+nachgespielt; fehlt ein Request im Trace oder weicht der Plan ab, gilt das als Regression.
+
+Beispiel:
+    python bench_pendelplaner.py --json bench.json
+    python bench_pendelplaner.py --baseline bench.json --max-slowdown 0.5
+    python bench_pendelplaner.py --scenario single-day --replay-check
+"""
+
+import argparse
+import atexit
+import io
+import json
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+import os
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+from dotenv import dotenv_values
+
+import pendelplaner as pp
+
+SCENARIOS = ("single-day", "week-gym", "ho-allocator")
+
+# Planner settings shared by all scenarios (same keys as .env)
+BASE_PROFILE = {
+    "ORIGIN_ADDRESS": "Bench Home, 8052 Zürich",
+    "DESTINATION_ADDRESS": "Bench Office, 5647 Oberrüti",
+    "LATEST_ARRIVAL_LOCAL": "09:00",
+    "MORNING_WINDOW_START_LOCAL": "06:00",
+    "WORK_HOURS": "8",
+    "LUNCH_MIN_MINUTES": "30",
+    "LUNCH_MAX_MINUTES": "60",
+    "LUNCH_STEP_MINUTES": "5",
+    "STEP_MINUTES": "5",
+    "DAY_OFFSET": "0",
+    "TZ": "Europe/Zurich",
+    "PERSONAL_BREAKS_MIN": "15",
+    "WEEKLY_BLOCKS": "OPEN,OPEN,OPEN,OPEN,OPEN",
+    "WEEKLY_START_DATE": "",
+    "WEEKLY_HO_PERCENT": "0",
+    "EXTEND_STEP_MINUTES": "30",
+    "EXTEND_WORSE_STEPS": "6",
+    "EXTEND_LATEST_LOCAL": "22:00",
+    "EXTEND_TARGET_SAVE_MIN": "10",
+    "AVOID_THRESHOLD_MIN": "8",
+    "AVOID_STEP_MINUTES": "15",
+    "MAX_LEAVE_TIME_LOCAL": "19:30",
+    "FRIDAY_EARLY_CUTOFF_LOCAL": "17:30",
+    "TIMEBANK_CURRENT_MIN": "0",
+    "TIMEBANK_CAP_MIN": "3000",
+    "TIMEBANK_MAX_SPEND_PER_DAY_MIN": "0",
+    "EXTENSION_ACTIVITY": "gym",
+    "GYM_ENABLED": "0",
+    "GYM_ADDRESS_1": "",
+    "GYM_ADDRESS_2": "",
+}
+
+SCENARIO_PROFILES = {
+    "single-day": {},
+    "week-gym": {
+        "GYM_ENABLED": "1",
+        "GYM_ADDRESS_1": "Bench Gym North",
+        "GYM_ADDRESS_2": "Bench Gym South",
+        "TIMEBANK_CURRENT_MIN": "240",
+        "TIMEBANK_MAX_SPEND_PER_DAY_MIN": "90",
+        "GYM_LEAVE_MODE": "early",
+        "GYM_MAX_DAYS_PER_WEEK": "3",
+        "GYM_PREFERRED_DAYS": "MO,WE,FR",
+        "GYM_COMBO_MAX": "60",
+    },
+    "ho-allocator": {"WEEKLY_HO_PERCENT": "40"},
+}
+
+def _reset_run_state(keep_persistent: bool = False) -> None:
+    """Start a scenario like a fresh process: empty session cache, zero counters."""
+    pp.SESSION_ROUTE_CACHE.clear()
+    pp.reset_duration_curves()
+    pp.reset_halfday_memo()
+    if not keep_persistent:
+        pp.ROUTE_CACHE.clear()
+        pp.ROUTE_CACHE_TS.clear()
+        pp.ROUTE_HISTORY.clear()
+    pp.API_CALL_COUNT = 0
+    pp.CACHE_HIT_COUNT = 0
+    pp.CACHE_MISS_COUNT = 0
+
+def _bench_monday() -> datetime:
+    """Monday of next week (00:00 local), so no slot is in the past."""
+    today = datetime.now(pp.TZ).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today + timedelta(days=7 - today.weekday())
+
+def _weekly_cfg() -> dict:
+    return {
+        "blocks": [b.strip().upper() for b in pp.WEEKLY_BLOCKS.split(",")][:5],
+        "latest_arrival_local": pp.LATEST_ARRIVAL_LOCAL,
+        "morning_window_start_local": pp.MORNING_WINDOW_START_LOCAL,
+        "work_hours": pp.WORK_HOURS,
+        "lunch_min": pp.LUNCH_MIN_MINUTES,
+        "lunch_max": pp.LUNCH_MAX_MINUTES,
+        "lunch_step": pp.LUNCH_STEP_MINUTES,
+        "step_minutes": pp.STEP_MINUTES,
+        "ho_percent": pp.WEEKLY_HO_PERCENT,
+    }
+
+def _scenario_steps(name: str, monday: datetime) -> list[tuple[str, object]]:
+    """Return (step, callable) pairs; each step is timed separately."""
+    if name == "single-day":
+        day = monday + timedelta(days=1)
+        state: dict = {}
+
+        def morning():
+            state["morning"] = pp.scan_morning_best_departure(day)
+
+        def evening():
+            pp.choose_best_evening_departure(state["morning"]["best_arrival"])
+
+        def optimize():
+            pp.optimize_day_with_extension(day)
+
+        return [("morning_scan", morning), ("evening_scan", evening), ("optimize_day", optimize)]
+    if name == "week-gym":
+        return [
+            ("weekly_plan", lambda: pp.weekly_plan(monday, _weekly_cfg())),
+            ("optimize_days", lambda: list(pp.iter_weekly_days(monday, _weekly_cfg()))),
+        ]
+    if name == "ho-allocator":
+        return [("weekly_plan", lambda: pp.weekly_plan(monday, _weekly_cfg()))]
+    raise ValueError(f"unknown scenario {name}")
+
+def run_scenario(name: str, client: "pp.SyntheticRoutesClient", warm: bool = False) -> dict:
+    monday = _bench_monday()
+    cfg = pp.AppConfig.from_env({**BASE_PROFILE, **SCENARIO_PROFILES[name]})
+    _reset_run_state(keep_persistent=warm)
+    requests_before = client.requests
+    steps: dict[str, dict] = {}
+    profiler = pp.PhaseProfiler()
+    pp.PROFILER = profiler
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with pp.using_config(cfg), pp.suppress_info_logs():
+        for step, fn in _scenario_steps(name, monday):
+            calls_before = pp.API_CALL_COUNT
+            p0 = time.perf_counter()
+            error = None
+            try:
+                fn()
+            except Exception as e:
+                error = str(e)
+            steps[step] = {
+                "api_calls": pp.API_CALL_COUNT - calls_before,
+                "wall_time_s": round(time.perf_counter() - p0, 4),
+            }
+            if error:
+                steps[step]["error"] = error
+    wall = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pp.PROFILER = None
+    by_phase = {
+        phase: st["api_calls"]
+        for phase, st in sorted(profiler.totals_by(0).items(), key=lambda kv: -kv[1]["api_calls"])
+        if st["api_calls"]
+    }
+    lookups = pp.CACHE_HIT_COUNT + pp.CACHE_MISS_COUNT
+    return {
+        "scenario": name + (" (warm)" if warm else ""),
+        "wall_time_s": round(wall, 4),
+        "api_calls": pp.API_CALL_COUNT,
+        "requests": client.requests - requests_before,
+        "cache_hits": pp.CACHE_HIT_COUNT,
+        "cache_misses": pp.CACHE_MISS_COUNT,
+        "cache_hit_ratio": round(pp.CACHE_HIT_COUNT / lookups, 4) if lookups else 0.0,
+        "peak_memory_kb": round(peak / 1024.0, 1),
+        "route_store_kb": round(pp.ROUTE_STORE.memory_bytes() / 1024.0, 1),
+        "steps": steps,
+        "api_calls_by_phase": by_phase,
+    }
+
+class _RoutesHttpModel:
+    """Stand-in for requests.post: answers computeRoutes and computeRouteMatrix bodies
+    from the synthetic traffic model, so RoutesApiClient and --record/--replay run
+    unchanged without network."""
+    def __init__(self, model: "pp.SyntheticRoutesClient"):
+        self.model = model
+        self.requests = 0
+
+    class _Response:
+        status_code = 200
+
+        def __init__(self, payload):
+            self._payload = payload
+            self.text = json.dumps(payload)
+
+        def json(self):
+            return self._payload
+
+    def _element(self, origin_addr: str, destination_addr: str, departure: str) -> dict:
+        minutes = self.model.traffic_minutes(origin_addr, destination_addr, datetime.fromisoformat(departure))
+        free_flow = self.model.free_flow_minutes(origin_addr, destination_addr)
+        return {"duration": f"{round(minutes * 60)}s", "staticDuration": f"{round(free_flow * 60)}s"}
+
+    def post(self, url, headers=None, json=None, timeout=None):
+        self.requests += 1
+        if "origins" not in json:
+            route = self._element(json["origin"]["address"], json["destination"]["address"], json["departureTime"])
+            return self._Response({"routes": [route]})
+        cells = []
+        for i, origin in enumerate(json["origins"]):
+            for j, destination in enumerate(json["destinations"]):
+                cell = self._element(origin["waypoint"]["address"], destination["waypoint"]["address"], json["departureTime"])
+                cells.append({"originIndex": i, "destinationIndex": j, "condition": "ROUTE_EXISTS", **cell})
+        return self._Response(cells)
+
+def run_replay_check(model: "pp.SyntheticRoutesClient", warm: bool = False) -> list[str]:
+    """Record the week planned with the shipped example.env settings (gym on) through
+    RoutesApiClient, replay the trace and compare both outputs. With warm, Monday and
+    Wednesday are planned once before, so the recording starts from a partly filled
+    persistent cache (which the dry-run estimate pass reads and promotes as well).
+    Returns problems: a request missing from the trace, a replay that makes other requests
+    than the recording (the plan may still match by luck), or a differing plan."""
+    defaults = dotenv_values(os.path.join(os.path.dirname(os.path.abspath(__file__)), "example.env"))
+    monday = _bench_monday()
+    config_map = {
+        **defaults,
+        "ORIGIN_ADDRESS": BASE_PROFILE["ORIGIN_ADDRESS"],
+        "DESTINATION_ADDRESS": BASE_PROFILE["DESTINATION_ADDRESS"],
+        "GYM_ADDRESS_1": SCENARIO_PROFILES["week-gym"]["GYM_ADDRESS_1"],
+        "GYM_ADDRESS_2": SCENARIO_PROFILES["week-gym"]["GYM_ADDRESS_2"],
+        "WEEKLY_START_DATE": monday.strftime("%Y-%m-%d"),
+    }
+    cfg = pp.AppConfig.from_env(config_map)
+    granularity, probe_window = pp._parse_granularity(defaults.get("ROUTE_CACHE_GRANULARITY_MIN"), 5)
+    http = _RoutesHttpModel(model)
+    trace_path = os.path.join(tempfile.mkdtemp(prefix="pendel-replay-"), "trace.jsonl")
+    saved = (pp.API_CLIENT, pp.requests.post, pp.ROUTE_CACHE_GRANULARITY_MIN, pp.ROUTE_CACHE_PROBE_WINDOW_MIN)
+    pp.requests.post = http.post
+    pp.ROUTE_CACHE_GRANULARITY_MIN, pp.ROUTE_CACHE_PROBE_WINDOW_MIN = granularity, probe_window
+    outputs: list[str] = []
+    try:
+        _reset_run_state()
+        if warm:
+            pp.API_CLIENT = pp.RoutesApiClient("bench")
+            partial = {**config_map, "WEEKLY_BLOCKS": "OPEN,OFF,HO,OFF,OFF"}
+            with pp.using_config(pp.AppConfig.from_env(partial)), pp.suppress_info_logs(), redirect_stdout(io.StringIO()):
+                pp.run_planning(partial, "json")
+            _reset_run_state(keep_persistent=True)
+        for mode in ("record", "replay"):
+            # A fresh client per run, like two separate processes
+            pp.API_CLIENT = pp.RoutesApiClient("bench")
+            trace = pp.start_routes_trace(trace_path, mode)
+            requests_before = http.requests
+            out = io.StringIO()
+            try:
+                with pp.using_config(cfg), pp.suppress_info_logs(), redirect_stdout(out):
+                    pp.run_planning(config_map, "json")
+            except pp.ReplayMissError as e:
+                return [f"replay: {e}"]
+            finally:
+                trace.close()
+                pp.ROUTES_TRACE, pp.CLOCK_OVERRIDE = None, None
+            outputs.append(out.getvalue())
+            if mode == "record":
+                recorded = http.requests - requests_before
+                _reset_run_state()
+            elif http.requests != requests_before or trace.served != recorded:
+                return [f"replay: {trace.served} of {recorded} recorded requests replayed, "
+                        f"{http.requests - requests_before} sent to the network"]
+    finally:
+        pp.API_CLIENT, pp.requests.post, pp.ROUTE_CACHE_GRANULARITY_MIN, pp.ROUTE_CACHE_PROBE_WINDOW_MIN = saved
+    return [] if outputs[0] == outputs[1] else ["replay: plan differs from the recorded run"]
+
+def print_report(results: list[dict]) -> None:
+    header = f"{'Scenario':<22} {'Wall s':>8} {'API':>6} {'Req':>6} {'Hit%':>6} {'Peak KB':>9} {'Cache KB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['scenario']:<22} {r['wall_time_s']:>8.3f} {r['api_calls']:>6} {r['requests']:>6} "
+            f"{100.0 * r['cache_hit_ratio']:>5.1f}% {r['peak_memory_kb']:>9.1f} {r.get('route_store_kb', 0.0):>9.1f}"
+        )
+        for step, m in r["steps"].items():
+            note = f"  ERROR: {m['error']}" if m.get("error") else ""
+            print(f"  {step:<20} {m['wall_time_s']:>8.3f} {m['api_calls']:>6}{note}")
+        for phase, calls in r["api_calls_by_phase"].items():
+            print(f"    · {phase:<34} {calls:>6} API")
+
+def compare_to_baseline(results: list[dict], baseline: list[dict], max_slowdown: float) -> list[str]:
+    """Return regression messages: more API calls than baseline, or wall time beyond tolerance."""
+    by_name = {r["scenario"]: r for r in baseline}
+    problems: list[str] = []
+    for r in results:
+        base = by_name.get(r["scenario"])
+        if not base:
+            continue
+        if r["api_calls"] > base["api_calls"]:
+            problems.append(f"{r['scenario']}: API calls {base['api_calls']} -> {r['api_calls']}")
+        limit = base["wall_time_s"] * (1.0 + max_slowdown)
+        if r["wall_time_s"] > limit and r["wall_time_s"] - base["wall_time_s"] > 0.05:
+            problems.append(f"{r['scenario']}: wall time {base['wall_time_s']:.3f}s -> {r['wall_time_s']:.3f}s")
+    return problems
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="bench_pendelplaner", description="Offline planner benchmark (synthetic traffic)")
+    p.add_argument("--scenario", choices=("all",) + SCENARIOS, default="all")
+    p.add_argument("--latency-ms", type=float, default=0.0, help="Simulated Routes API latency per request")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Share of failing requests (0..1)")
+    p.add_argument("--seed", type=int, default=0, help="Seed for the synthetic traffic model")
+    p.add_argument("--warm", action="store_true", help="Also run each scenario again with a warm persistent cache")
+    p.add_argument("--max-api-calls", type=int, default=5000, help="MAX_API_CALLS_PER_RUN during the benchmark")
+    p.add_argument("--json", metavar="FILE", help="Write results as JSON")
+    p.add_argument("--baseline", metavar="FILE", help="Compare against a previous --json result")
+    p.add_argument("--max-slowdown", type=float, default=0.5, help="Allowed relative wall-time increase vs baseline")
+    p.add_argument("--replay-check", action="store_true", help="Also check that a recorded week replays to the same plan")
+    return p
+
+def main() -> int:
+    args = _build_arg_parser().parse_args()
+    pp.logger.setLevel(logging.WARNING)
+    # Never touch the user's cache files: isolate route and plan cache in a temp dir
+    atexit.unregister(pp.save_route_cache)
+    bench_dir = tempfile.mkdtemp(prefix="pendel-bench-")
+    pp.ROUTE_CACHE_FILE = os.path.join(bench_dir, "routes_cache.bin")
+    pp.PLAN_CACHE_FILE = os.path.join(bench_dir, "plan_cache.json")
+    client = pp.SyntheticRoutesClient(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed)
+    pp.API_CLIENT = client
+    pp.DISABLE_ROUTE_CACHE = False
+    pp.MAX_API_CALLS_PER_RUN = args.max_api_calls
+
+    names = SCENARIOS if args.scenario == "all" else (args.scenario,)
+    results: list[dict] = []
+    for name in names:
+        results.append(run_scenario(name, client))
+        if args.warm:
+            results.append(run_scenario(name, client, warm=True))
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    problems: list[str] = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        problems += compare_to_baseline(results, baseline, args.max_slowdown)
+    if args.replay_check:
+        print()
+        for warm in (False, True):
+            replay_problems = run_replay_check(pp.SyntheticRoutesClient(seed=args.seed), warm=warm)
+            print(f"Replay-Check ({'warmer' if warm else 'kalter'} Cache): {'OK' if not replay_problems else 'FEHLER'}")
+            problems += [f"{'warm' if warm else 'cold'} {msg}" for msg in replay_problems]
+    for msg in problems:
+        print(f"REGRESSION: {msg}", file=sys.stderr)
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
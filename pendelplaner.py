@@ -1,16 +1,11 @@
 from __future__ import annotations
 
-def render_weekly_output(base: datetime, cfg: dict) -> None:
+def iter_weekly_days(base: datetime, cfg: dict):
+    """Compute the weekly plan day by day and yield one DayPlanDM per weekday (Mon-Fri).
+    Each office day is fully optimized (extension, timebank/gym, standard-plan probes)
+    before it is yielded, so consumers can render or stream it right away.
+    """
     plan = weekly_plan(base, cfg)
-    def fmt(dt: datetime) -> str:
-        return dt.astimezone(TZ).strftime("%Y-%m-%d %H:%M")
-    week_title = f"{EMO_CAL} === Weekly Plan: {base.strftime('%b %d')} - {(base + timedelta(days=4)).strftime('%b %d')} ==="
-    print("\n" + bold(week_title))
-    weekly_office = 0
-    weekly_ho = 0
-    weekly_travel_standard = 0.0
-    weekly_travel_chosen = 0.0
-    gym_days_used = 0
     # Weekly progress reporter (Mon-Fri)
     weekly_pr = None
     if logger.isEnabledFor(logging.INFO):
@@ -41,33 +36,23 @@ def render_weekly_output(base: datetime, cfg: dict) -> None:
         if len(chosen) < desired_gym:
             chosen += candidates_other[: (desired_gym - len(chosen))]
         force_gym_set = set(chosen)
+    gym_days_used = 0
     # Running timebank balance across the week
     timebank_balance = TIMEBANK_CURRENT_MIN
     for idx, entry in enumerate(plan, start=1):
         day_dt = entry["day"]
         day_label = day_dt.strftime("%a, %b %d")
         mode = entry["mode"]
+        day_t0 = time.perf_counter()
         logger.info("Planning day %d/%d: %s (mode=%s)", idx, len(plan), day_label, mode)
         if entry["plan"] is None:
-            if mode.startswith("PAST-"):
-                print(dim(f"{day_label}: {mode}"))
-            elif mode == "HO":
-                print(f"{EMO_HOME} {bold(day_label)}")
-                print(" " * 3 + "Work From Home")
-                weekly_ho += 1
-            elif mode == "OFF":
-                print(f"{EMO_HOME} {bold(day_label)}")
-                print(" " * 3 + "Day Off")
-            else:
-                print(f"{bold(day_label)}: {mode}")
-            print(magenta(hr()))
             if weekly_pr:
                 weekly_pr.update(1)
             logger.info("Finished day %d/%d: %s (no commute)", idx, len(plan), day_label)
+            yield DayPlanDM(date=day_dt, mode=mode, error=entry.get("error"))
             continue
 
         # Office (or half-day office) plan
-        weekly_office += 1
         m = entry["plan"]["outbound"]
         e = entry["plan"]["inbound"]
 
@@ -76,9 +61,14 @@ def render_weekly_output(base: datetime, cfg: dict) -> None:
         arrival_office = m['best_arrival']
 
         # Consider optimized day including extension/morning tweak
-        with suppress_info_logs():
+        with suppress_info_logs(), profile_phase("", day=day_dt):
             # Keep gym exploration enabled even with no-cache (fast mode inside chooser), but skip heavy day re-optimization
-            improved = None if DISABLE_ROUTE_CACHE else (optimize_day_with_extension(day_dt) or None)
+            improved = None
+            if not DISABLE_ROUTE_CACHE:
+                try:
+                    improved = optimize_day_with_extension(day_dt) or None
+                except Exception as ex:
+                    logger.warning("Day optimization failed: %s", ex)
             # Timebank-aware option: allow earlier leave + wait if activity is gym and we can spend timebank
             available_tb = timebank_balance if EXTENSION_ACTIVITY == "gym" else 0
             timebank_option = None
@@ -93,8 +83,6 @@ def render_weekly_output(base: datetime, cfg: dict) -> None:
                 timebank_any = None
 
         # Decide best option with gym cap enforcement
-        improved_total = improved['total_travel_minutes'] if improved else float('inf')
-        tb_total = (m['best_duration_minutes'] + (timebank_option['evening_duration_minutes'] if timebank_option else 0)) if timebank_option else float('inf')
         # Enforce gym target: must_do_gym if this day is pre-selected
         must_do_gym = (idx - 1) in force_gym_set
         can_use_gym_today = GYM_ENABLED and ((gym_days_used < GYM_MAX_DAYS_PER_WEEK and (_weekday_token(day_dt) in preferred_days)) or must_do_gym)
@@ -102,7 +90,10 @@ def render_weekly_output(base: datetime, cfg: dict) -> None:
         if timebank_option is None and must_do_gym and timebank_any is not None:
             timebank_option = timebank_any
         choose_timebank = (timebank_option is not None) and (must_do_gym or can_use_gym_today)
+        gym_option = None
+        improved_penalty = 0
         if choose_timebank:
+            gym_option = timebank_option
             rec_m_dep = m['best_departure']
             rec_m_arr = m['best_arrival']
             rec_m_dur = m['best_duration_minutes']
@@ -145,6 +136,7 @@ def render_weekly_output(base: datetime, cfg: dict) -> None:
 
         # Force gym on pre-selected days even if not strictly better
         if (not DISABLE_ROUTE_CACHE) and (chosen_mode != "timebank") and ((idx - 1) in force_gym_set) and (timebank_any is not None):
+            gym_option = timebank_any
             rec_m_dep = m['best_departure']
             rec_m_arr = m['best_arrival']
             rec_m_dur = m['best_duration_minutes']
@@ -163,133 +155,249 @@ def render_weekly_output(base: datetime, cfg: dict) -> None:
         base_end = earliest_end + timedelta(minutes=base_breaks)
 
         # Standard plan based on this day's actual arrival and breaks, pessimized in rush window
-        try:
-            std_inbound_raw = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, base_end)
-        except Exception:
-            std_inbound_raw = e["evening_duration_minutes"]
-        std_inbound = std_inbound_raw
-        if _is_in_rush_window(base_end):
-            # Try small worst-of probing unless budget is tight or cache disabled
-            probed = [std_inbound_raw]
-            if (not DISABLE_ROUTE_CACHE) and (not _budget_soft_limit_reached()):
-                for off in _parse_int_list(EVENING_STD_PROBE_OFFSETS_MIN):
-                    try:
-                        if off <= 0:
-                            continue
-                        dep = base_end + timedelta(minutes=off)
-                        d = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, dep)
-                        probed.append(d)
-                    except Exception:
-                        break
-            std_inbound = max(probed) + EVENING_STD_EXTRA_BUFFER_MIN
-            std_inbound = max(std_inbound, std_inbound_raw + EVENING_STD_BUFFER_MIN)
+        with profile_phase("std_inbound_probe", day=day_dt):
+            try:
+                std_inbound_raw = curve_duration(DESTINATION_ADDRESS, ORIGIN_ADDRESS, base_end)
+            except Exception:
+                std_inbound_raw = e["evening_duration_minutes"]
+            std_inbound = std_inbound_raw
+            if _is_in_rush_window(base_end):
+                # Try small worst-of probing unless budget is tight or cache disabled
+                probed = [std_inbound_raw]
+                if (not DISABLE_ROUTE_CACHE) and (not _budget_soft_limit_reached()):
+                    for off in _parse_int_list(EVENING_STD_PROBE_OFFSETS_MIN):
+                        try:
+                            if off <= 0:
+                                continue
+                            dep = base_end + timedelta(minutes=off)
+                            d = curve_duration(DESTINATION_ADDRESS, ORIGIN_ADDRESS, dep)
+                            probed.append(d)
+                        except Exception:
+                            break
+                std_inbound = max(probed) + EVENING_STD_EXTRA_BUFFER_MIN
+                std_inbound = max(std_inbound, std_inbound_raw + EVENING_STD_BUFFER_MIN)
         standard_total = rec_m_dur + std_inbound
 
         # Benefit is the reduction in evening drive time (morning is identical in standard vs chosen)
         # For gym days, Office→Gym is not part of regular commute and is excluded by comparing evening legs only.
         benefit_save = max(0, fmt_minutes(std_inbound) - fmt_minutes(rec_e_dur))
 
-        # Render day
-        day_prefix = f"{EMO_OK} " if EMO_OK else ""
-        day_suffix = f"{EMO_OK_END}" if EMO_OK_END else ""
-        print(f"{day_prefix}{bold(day_label)}{day_suffix}")
-        print(hr())
-        print("   " + bold("RECOMMENDED PLAN:"))
-        print(f"   {EMO_CAR} Leave Home:      {fmt_hhmm(rec_m_dep)} ({fmt_minutes(rec_m_dur)} min commute)")
-        print(f"   {EMO_OFFICE} Arrive Office:   {fmt_hhmm(rec_m_arr)}")
-        if chosen_mode == "timebank":
-            spend_abs = fmt_dur_hm(abs(extend_minutes))
-            gym_addr = (timebank_option or {}).get('gym_address', 'Gym')
-            gym_train = (timebank_option or {}).get('train_minutes', 0)
-            off2gym = (timebank_option or {}).get('office_to_gym_minutes', 0)
-            leave_office_for_gym = (timebank_option or {}).get('leave_office', base_end - timedelta(minutes=abs(extend_minutes)))
-            print(f"   {EMO_OFFICE} Leave Office:    {fmt_hhmm(leave_office_for_gym)} (Leave early, spend {spend_abs} from timebank)")
-            print(f"   {EMO_CAR} Travel to Gym:  {fmt_dur_h_colon(off2gym)} → {gym_addr}")
-            print(f"   🏋️  Train:          {fmt_dur_h_colon(gym_train)}")
-            print(f"   🏋️  Leave Gym:      {fmt_hhmm(rec_e_dep)}")
-        elif extend_minutes > 0:
-            print(f"   {EMO_OFFICE} Leave Office:    {fmt_hhmm(rec_e_dep)} (Stay {fmt_dur_hm(extend_minutes)} extra)")
-        else:
-            print(f"   {EMO_OFFICE} Leave Office:    {fmt_hhmm(rec_e_dep)}")
-        print(f"   {EMO_HOME} Arrive Home:     {fmt_hhmm(rec_e_arr)} ({fmt_minutes(rec_e_dur)} min commute)")
-        print("")
-        # BENEFITS section
-        print("   ✅ BENEFITS OF THIS PLAN:")
-        print(f"    {_BULLET}Time Saved:  {fmt_minutes(benefit_save)} minutes")
-        if chosen_mode == "extension":
-            print(f"    {_BULLET}Traffic:     Completely avoids evening congestion by leaving after the rush.")
-            if extend_minutes > 0:
-                print(f"    {_BULLET}Productivity: Gain {fmt_dur_hm(extend_minutes)} of quiet, focused time at the office.")
-            if 'improved_penalty' in locals() and improved_penalty > 0:
-                print(f"    {_BULLET}Balance:     Includes {fmt_minutes(improved_penalty)} min lifestyle penalty for late departure.")
-        elif chosen_mode == "timebank":
-            # Estimate avoided stop-and-go as baseline evening drive minus late gym→home drive (approx)
-            avoided = max(0, fmt_minutes(std_inbound) - fmt_minutes(rec_e_dur))
-            print(f"    {_BULLET}Traffic:     Avoids {avoided}+ minutes of stressful, stop-and-go driving.")
-            print(f"    {_BULLET}Efficiency:  Gym workout is completed, freeing up your evening.")
-        else:
-            print(f"    {_BULLET}Traffic:     Uses the lowest-traffic return window for today.")
-        if chosen_mode == "timebank":
-            # Show both: regular commute total and gym travel separately
-            reg_total = fmt_minutes(rec_m_dur + rec_e_dur)
-            print(f"    commutes: Morning {fmt_minutes(rec_m_dur)} min / Evening {fmt_minutes(rec_e_dur)} min | Regular Total: {reg_total} min (Gym extra: Office→Gym {fmt_minutes(off2gym)} min)")
-        else:
-            print(f"    commutes: Morning {fmt_minutes(rec_m_dur)} min / Evening {fmt_minutes(rec_e_dur)} min | Total: {fmt_minutes(chosen_total)} min")
-        # Details section for the day
-        print("")
-        print("   " + bold("DETAILS:"))
-        lunch_end = rec_m_arr + timedelta(minutes=work_minutes + chosen_lunch_minutes)
-        personal_end = base_end  # cumulative after lunch + personal breaks
-        print(f"   • Work Required:   {fmt_dur_hm(work_minutes)} (login)")
-        print(f"   • Lunch:           +{fmt_minutes(chosen_lunch_minutes)} min → {fmt_hhmm(lunch_end)}")
-        if PERSONAL_BREAKS_MIN:
-            print(f"   • Personal Breaks: +{fmt_minutes(PERSONAL_BREAKS_MIN)} min → {fmt_hhmm(personal_end)}")
-        print(f"   • Earliest Leave:  {fmt_hhmm(base_end)}")
-        if chosen_mode == "extension" and extend_minutes > 0:
-            print(f"   • Extra at Office: {fmt_dur_hm(extend_minutes)} (beyond earliest)")
-        if chosen_mode == "timebank":
-            spend_abs = abs(extend_minutes)
-            projected_tb = timebank_balance if (GYM_LEAVE_MODE == "earliest") else max(0, timebank_balance - spend_abs)
-            gym_addr = (timebank_option or {}).get('gym_address', 'Gym')
-            gym_train = (timebank_option or {}).get('train_minutes', 0)
-            off2gym = (timebank_option or {}).get('office_to_gym_minutes', 0)
-            if spend_abs > 0:
-                print(f"   • Leave Early:     {fmt_dur_hm(spend_abs)} earlier → {gym_addr}")
-            print(f"   • Gym Session:     {fmt_dur_hm(gym_train)} (Commute Office→Gym {fmt_minutes(off2gym)} min)")
-            if spend_abs > 0:
-                net_spend = max(0, fmt_minutes(spend_abs) - fmt_minutes(benefit_save))
-                print(f"   • Timebank:        Spend {fmt_minutes(spend_abs)} min (net {fmt_minutes(net_spend)} min) | New Balance: {fmt_minutes(projected_tb)}/{fmt_minutes(TIMEBANK_CAP_MIN)}")
-        # Traffic comparison
-        print(f"   • Evening Traffic: baseline {fmt_minutes(int(round(std_inbound)))} min → chosen {fmt_minutes(int(round(rec_e_dur)))} min")
-        print("")
-        print("   ---")
-        print("   " + bold("STANDARD PLAN (leave at the earliest time):"))
-        print(f"   • Leave Office:    {fmt_hhmm(base_end)}")
-        std_arr_home = base_end + timedelta(minutes=std_inbound)
-        print(f"   • Arrive Home:     {fmt_hhmm(std_arr_home)} ({fmt_minutes(std_inbound)} min commute)")
-        print(f"   • Total Commute:   {fmt_minutes(standard_total)} min")
-
-        weekly_travel_standard += standard_total
-        # Weekly chosen time excludes Office→Gym on gym days to reflect regular commute only
-        weekly_travel_chosen += ((rec_m_dur + rec_e_dur) if (chosen_mode == "timebank") else chosen_total)
+        gym = None
         if chosen_mode == "timebank":
+            gym_addr = (gym_option or {}).get('gym_address', 'Gym')
+            gym = GymVisit(
+                address=gym_addr,
+                leave_office=(gym_option or {}).get('leave_office', base_end - timedelta(minutes=abs(extend_minutes))),
+                office_to_gym_minutes=(gym_option or {}).get('office_to_gym_minutes', 0),
+                train_minutes=(gym_option or {}).get('train_minutes', 0),
+            )
             gym_days_used += 1
             # Update running timebank after using it (no deduction if earliest mode)
             if GYM_LEAVE_MODE != "earliest":
                 timebank_balance = max(0, timebank_balance - abs(extend_minutes))
-        print(magenta(hr()))
         if weekly_pr:
             weekly_pr.update(1)
+        METRICS.observe("pendelplaner_day_plan_seconds", time.perf_counter() - day_t0, stage="optimize")
         logger.info("Finished day %d/%d: %s", idx, len(plan), day_label)
-
-    # Weekly footer
-    print(bold("WEEKLY SUMMARY"))
-    print_kv("Office Days / Home Office:", f"{weekly_office} / {weekly_ho} (HO cap {WEEKLY_HO_PERCENT}%)")
-    print_kv("Total Commute Time:", f"Standard: {fmt_minutes(weekly_travel_standard)} min  |  With Optimizations: {fmt_minutes(weekly_travel_chosen)} min  (save {fmt_minutes(weekly_travel_standard - weekly_travel_chosen)} min)")
-    if weekly_office:
-        print_kv("Average Commute/Day:", f"{fmt_minutes(weekly_travel_chosen / max(1, weekly_office))} min")
+        yield DayPlanDM(
+            date=day_dt,
+            mode=mode,
+            outbound=CommuteLeg(rec_m_dep, rec_m_arr, rec_m_dur),
+            inbound=CommuteLeg(rec_e_dep, rec_e_arr, rec_e_dur),
+            strategy=chosen_mode,
+            work_minutes=work_minutes,
+            lunch_minutes=chosen_lunch_minutes,
+            extend_minutes=extend_minutes,
+            penalty_minutes=improved_penalty if chosen_mode == "extension" else 0,
+            gym=gym,
+            earliest_leave=base_end,
+            standard_inbound_minutes=std_inbound,
+            standard_total_minutes=standard_total,
+            total_travel_minutes=chosen_total,
+            benefit_minutes=benefit_save,
+            timebank_balance_min=timebank_balance,
+            resolution=resolution_info(RESOLUTION_BY_DAY.get(day_dt.strftime("%Y-%m-%d"), 0)),
+            estimate=estimate_info(day_dt.strftime("%Y-%m-%d")),
+        )
     if weekly_pr:
         weekly_pr.done()
+
+def weekly_summary(days: list[DayPlanDM]) -> dict:
+    """Aggregate weekly totals from computed day plans.
+    Chosen commute on gym days excludes Office→Gym to reflect the regular commute only.
+    """
+    office = [d for d in days if d.outbound is not None]
+    standard = sum(d.standard_total_minutes or 0 for d in office)
+    chosen = sum(d.commute_minutes() for d in office)
+    return {
+        "office_days": len(office),
+        "ho_days": sum(1 for d in days if d.mode == "HO"),
+        "ho_cap_percent": WEEKLY_HO_PERCENT,
+        "standard_minutes": standard,
+        "chosen_minutes": chosen,
+        "saved_minutes": standard - chosen,
+        "average_minutes_per_day": (chosen / max(1, len(office))) if office else None,
+    }
+
+def _estimate_sources(estimate: dict) -> str:
+    """Estimate sources of a day, most used first, e.g. "interpolated 12, history 3"."""
+    return ", ".join(f"{src} {n}" for src, n in sorted(estimate["sources"].items(), key=lambda kv: -kv[1]))
+
+def print_weekly_day(day: DayPlanDM) -> None:
+    """Render one computed day of the weekly plan as text."""
+    day_label = day.date.strftime("%a, %b %d")
+    mode = day.mode
+    if day.outbound is None or day.inbound is None:
+        if mode.startswith("PAST-"):
+            print(dim(f"{day_label}: {mode}"))
+        elif mode == "HO":
+            print(f"{EMO_HOME} {bold(day_label)}")
+            print(" " * 3 + "Work From Home")
+        elif mode == "OFF":
+            print(f"{EMO_HOME} {bold(day_label)}")
+            print(" " * 3 + "Day Off")
+        else:
+            print(f"{bold(day_label)}: {mode}")
+        print(magenta(hr()))
+        return
+
+    chosen_mode = day.strategy
+    rec_m_dep, rec_m_arr, rec_m_dur = day.outbound.departure, day.outbound.arrival, day.outbound.duration_minutes
+    rec_e_dep, rec_e_arr, rec_e_dur = day.inbound.departure, day.inbound.arrival, day.inbound.duration_minutes
+    extend_minutes = day.extend_minutes
+    work_minutes = day.work_minutes
+    chosen_lunch_minutes = day.lunch_minutes
+    base_end = day.earliest_leave
+    std_inbound = day.standard_inbound_minutes
+    benefit_save = day.benefit_minutes
+    gym = day.gym
+    off2gym = gym.office_to_gym_minutes if gym else 0
+
+    day_prefix = f"{EMO_OK} " if EMO_OK else ""
+    day_suffix = f"{EMO_OK_END}" if EMO_OK_END else ""
+    print(f"{day_prefix}{bold(day_label)}{day_suffix}" + (yellow(" (estimated)") if day.estimate else ""))
+    print(hr())
+    print("   " + bold("RECOMMENDED PLAN:"))
+    print(f"   {EMO_CAR} Leave Home:      {fmt_hhmm(rec_m_dep)} ({fmt_minutes(rec_m_dur)} min commute)")
+    print(f"   {EMO_OFFICE} Arrive Office:   {fmt_hhmm(rec_m_arr)}")
+    if chosen_mode == "timebank":
+        spend_abs = fmt_dur_hm(abs(extend_minutes))
+        print(f"   {EMO_OFFICE} Leave Office:    {fmt_hhmm(gym.leave_office)} (Leave early, spend {spend_abs} from timebank)")
+        print(f"   {EMO_CAR} Travel to Gym:  {fmt_dur_h_colon(off2gym)} → {gym.address}")
+        print(f"   🏋️  Train:          {fmt_dur_h_colon(gym.train_minutes)}")
+        print(f"   🏋️  Leave Gym:      {fmt_hhmm(rec_e_dep)}")
+    elif extend_minutes > 0:
+        print(f"   {EMO_OFFICE} Leave Office:    {fmt_hhmm(rec_e_dep)} (Stay {fmt_dur_hm(extend_minutes)} extra)")
+    else:
+        print(f"   {EMO_OFFICE} Leave Office:    {fmt_hhmm(rec_e_dep)}")
+    print(f"   {EMO_HOME} Arrive Home:     {fmt_hhmm(rec_e_arr)} ({fmt_minutes(rec_e_dur)} min commute)")
+    print("")
+    # BENEFITS section
+    print("   ✅ BENEFITS OF THIS PLAN:")
+    print(f"    {_BULLET}Time Saved:  {fmt_minutes(benefit_save)} minutes")
+    if chosen_mode == "extension":
+        print(f"    {_BULLET}Traffic:     Completely avoids evening congestion by leaving after the rush.")
+        if extend_minutes > 0:
+            print(f"    {_BULLET}Productivity: Gain {fmt_dur_hm(extend_minutes)} of quiet, focused time at the office.")
+        if day.penalty_minutes > 0:
+            print(f"    {_BULLET}Balance:     Includes {fmt_minutes(day.penalty_minutes)} min lifestyle penalty for late departure.")
+    elif chosen_mode == "timebank":
+        # Estimate avoided stop-and-go as baseline evening drive minus late gym→home drive (approx)
+        avoided = max(0, fmt_minutes(std_inbound) - fmt_minutes(rec_e_dur))
+        print(f"    {_BULLET}Traffic:     Avoids {avoided}+ minutes of stressful, stop-and-go driving.")
+        print(f"    {_BULLET}Efficiency:  Gym workout is completed, freeing up your evening.")
+    else:
+        print(f"    {_BULLET}Traffic:     Uses the lowest-traffic return window for today.")
+    if chosen_mode == "timebank":
+        # Show both: regular commute total and gym travel separately
+        reg_total = fmt_minutes(rec_m_dur + rec_e_dur)
+        print(f"    commutes: Morning {fmt_minutes(rec_m_dur)} min / Evening {fmt_minutes(rec_e_dur)} min | Regular Total: {reg_total} min (Gym extra: Office→Gym {fmt_minutes(off2gym)} min)")
+    else:
+        print(f"    commutes: Morning {fmt_minutes(rec_m_dur)} min / Evening {fmt_minutes(rec_e_dur)} min | Total: {fmt_minutes(day.total_travel_minutes)} min")
+    # Details section for the day
+    print("")
+    print("   " + bold("DETAILS:"))
+    lunch_end = rec_m_arr + timedelta(minutes=work_minutes + chosen_lunch_minutes)
+    personal_end = base_end  # cumulative after lunch + personal breaks
+    print(f"   • Work Required:   {fmt_dur_hm(work_minutes)} (login)")
+    print(f"   • Lunch:           +{fmt_minutes(chosen_lunch_minutes)} min → {fmt_hhmm(lunch_end)}")
+    if PERSONAL_BREAKS_MIN:
+        print(f"   • Personal Breaks: +{fmt_minutes(PERSONAL_BREAKS_MIN)} min → {fmt_hhmm(personal_end)}")
+    print(f"   • Earliest Leave:  {fmt_hhmm(base_end)}")
+    if day.resolution and day.resolution["level"]:
+        print(f"   • Resolution:      {day.resolution['scan_step_min']} min scan grid, {day.resolution['cache_bucket_min']} min cache buckets (budget-limited)")
+    if day.estimate:
+        est = day.estimate
+        print(yellow(f"   • Estimated:       offline ({est['reason']}), confidence {est['confidence']:.0%} ({_estimate_sources(est)})"))
+    if chosen_mode == "extension" and extend_minutes > 0:
+        print(f"   • Extra at Office: {fmt_dur_hm(extend_minutes)} (beyond earliest)")
+    if chosen_mode == "timebank":
+        spend_abs = abs(extend_minutes)
+        if spend_abs > 0:
+            print(f"   • Leave Early:     {fmt_dur_hm(spend_abs)} earlier → {gym.address}")
+        print(f"   • Gym Session:     {fmt_dur_hm(gym.train_minutes)} (Commute Office→Gym {fmt_minutes(off2gym)} min)")
+        if spend_abs > 0:
+            net_spend = max(0, fmt_minutes(spend_abs) - fmt_minutes(benefit_save))
+            print(f"   • Timebank:        Spend {fmt_minutes(spend_abs)} min (net {fmt_minutes(net_spend)} min) | New Balance: {fmt_minutes(day.timebank_balance_min)}/{fmt_minutes(TIMEBANK_CAP_MIN)}")
+    # Traffic comparison
+    print(f"   • Evening Traffic: baseline {fmt_minutes(int(round(std_inbound)))} min → chosen {fmt_minutes(int(round(rec_e_dur)))} min")
+    print("")
+    print("   ---")
+    print("   " + bold("STANDARD PLAN (leave at the earliest time):"))
+    print(f"   • Leave Office:    {fmt_hhmm(base_end)}")
+    std_arr_home = base_end + timedelta(minutes=std_inbound)
+    print(f"   • Arrive Home:     {fmt_hhmm(std_arr_home)} ({fmt_minutes(std_inbound)} min commute)")
+    print(f"   • Total Commute:   {fmt_minutes(day.standard_total_minutes)} min")
+    print(magenta(hr()))
+
+def print_weekly_summary(summary: dict) -> None:
+    print(bold("WEEKLY SUMMARY"))
+    print_kv("Office Days / Home Office:", f"{summary['office_days']} / {summary['ho_days']} (HO cap {summary['ho_cap_percent']}%)")
+    print_kv("Total Commute Time:", f"Standard: {fmt_minutes(summary['standard_minutes'])} min  |  With Optimizations: {fmt_minutes(summary['chosen_minutes'])} min  (save {fmt_minutes(summary['saved_minutes'])} min)")
+    if summary["office_days"]:
+        print_kv("Average Commute/Day:", f"{fmt_minutes(summary['average_minutes_per_day'])} min")
+
+def print_weekly_title(base: datetime) -> None:
+    week_title = f"{EMO_CAL} === Weekly Plan: {base.strftime('%b %d')} - {(base + timedelta(days=4)).strftime('%b %d')} ==="
+    print("\n" + bold(week_title))
+
+def render_weekly_output(base: datetime, cfg: dict) -> list[DayPlanDM]:
+    """Compute the week and print each day as soon as it is planned; returns the days."""
+    print_weekly_title(base)
+    days: list[DayPlanDM] = []
+    for day in iter_weekly_days(base, cfg):
+        print_weekly_day(day)
+        days.append(day)
+    # Weekly footer
+    print_weekly_summary(weekly_summary(days))
+    return days
+
+def print_single_day(day: DayPlanDM, latest_arrival_local: str) -> None:
+    """Render a single-day plan (outbound/inbound with chosen lunch break) as text."""
+    def fmt(dt: datetime) -> str:
+        return dt.astimezone(TZ).strftime("%Y-%m-%d %H:%M")
+
+    print("\n=== Ergebnisse (lokal: Europe/Zurich) ===")
+    print(f"Späteste gewünschte Ankunft: {day.date.strftime('%Y-%m-%d')} {latest_arrival_local}")
+    print("\n-- Hinfahrt --")
+    print(f"Beste Abfahrt:      {fmt(day.outbound.departure)}")
+    print(f"Ankunft (effektiv): {fmt(day.outbound.arrival)}")
+    print(f"Fahrzeit:           {day.outbound.duration_minutes:.1f} min")
+
+    print("\n-- Rückfahrt --")
+    print(f"Gewählte Mittagspause:  {day.lunch_minutes} min")
+    print(f"Abfahrt abends:         {fmt(day.inbound.departure)}")
+    print(f"Fahrzeit zurück:        {day.inbound.duration_minutes:.1f} min")
+    print(f"Ankunft zu Hause:       {fmt(day.inbound.arrival)}")
+
+    print(f"\nGesamte Pendelzeit (hin+zurück): {day.total_travel_minutes:.1f} min")
+    if day.resolution and day.resolution["level"]:
+        res = day.resolution
+        print(f"Auflösung (Budget knapp):        {res['scan_step_min']} min Raster, {res['cache_bucket_min']} min Cache-Bucket")
+    if day.estimate:
+        est = day.estimate
+        reason = {"budget": "Budget aufgebraucht", "network": "API nicht erreichbar", "forced": "--offline"}.get(est["reason"], est["reason"])
+        print(yellow(f"Geschätzt ({reason}):  Konfidenz {est['confidence']:.0%}, Quellen: {_estimate_sources(est)}"))
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
@@ -317,8 +425,19 @@ import json
 import atexit
 import time
 import math
-from dataclasses import dataclass
-from contextlib import contextmanager
+import random
+import heapq
+import mmap
+import struct
+from array import array
+from bisect import bisect_left, insort
+import re
+import zlib
+import hashlib
+from dataclasses import dataclass, field, asdict
+from contextlib import contextmanager, redirect_stdout
+from functools import lru_cache
+from itertools import accumulate
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from dotenv import dotenv_values
@@ -351,6 +470,9 @@ TZ = ZoneInfo("Europe/Zurich")
 CONFIG = dotenv_values(os.path.join(os.path.dirname(__file__), ".env"))
 
 API_KEY = CONFIG.get("GOOGLE_MAPS_API_KEY", "")
+# Routing backend: google (Routes API), graph (local road network file) or synthetic (offline model)
+ROUTING_PROVIDER = (CONFIG.get("ROUTING_PROVIDER", "google") or "google").strip().lower()
+ROUTING_GRAPH_FILE = CONFIG.get("ROUTING_GRAPH_FILE", "")
 ORIGIN_ADDRESS = CONFIG.get("ORIGIN_ADDRESS", ORIGIN_ADDRESS)
 DESTINATION_ADDRESS = CONFIG.get("DESTINATION_ADDRESS", DESTINATION_ADDRESS)
 LATEST_ARRIVAL_LOCAL = CONFIG.get("LATEST_ARRIVAL_LOCAL", LATEST_ARRIVAL_LOCAL)
@@ -426,10 +548,32 @@ class AppConfig:
     timebank_cap_min: int = 50 * 60
     timebank_max_spend_per_day_min: int = 0
     extension_activity: str = "gym"
+    # Human-centric limits
+    max_leave_time_local: str = ""
+    friday_early_cutoff_local: str = ""
+    # Gym
+    gym_enabled: bool = True
+    gym_addresses: list[str] = field(default_factory=list)
+    gym_train_min_minutes: int = 90
+    gym_train_max_minutes: int = 120
+    gym_train_step_minutes: int = 15
+    gym_max_days_per_week: int = 3
+    gym_preferred_days: str = "MO,WE,FR"
+    gym_leave_mode: str = "earliest"
+    gym_combo_max: int = 60
+    gym_defer_max_minutes: int = 90
+    gym_defer_step_minutes: int = 15
 
     @classmethod
-    def from_env(cls) -> "AppConfig":
-        cfg = CONFIG
+    def from_env(cls, overlay: dict | None = None) -> "AppConfig":
+        """Build config from .env values, optionally overlaid by a profile mapping
+        using the same keys (e.g. ORIGIN_ADDRESS, GYM_ADDRESS_1, WEEKLY_BLOCKS).
+        """
+        profile = overlay or {}
+        cfg = {**CONFIG, **profile}
+        gym_addresses = [
+            (cfg.get(f"GYM_ADDRESS_{n}", "") or "").strip() for n in range(1, 10)
+        ]
         return cls(
             api_key=cfg.get("GOOGLE_MAPS_API_KEY", ""),
             origin_address=cfg.get("ORIGIN_ADDRESS", ORIGIN_ADDRESS),
@@ -463,54 +607,203 @@ class AppConfig:
             timebank_cap_min=int(cfg.get("TIMEBANK_CAP_MIN", str(TIMEBANK_CAP_MIN))),
             timebank_max_spend_per_day_min=int(cfg.get("TIMEBANK_MAX_SPEND_PER_DAY_MIN", str(TIMEBANK_MAX_SPEND_PER_DAY_MIN))),
             extension_activity=cfg.get("EXTENSION_ACTIVITY", EXTENSION_ACTIVITY),
+            max_leave_time_local=cfg.get("MAX_LEAVE_TIME_LOCAL", MAX_LEAVE_TIME_LOCAL) or "",
+            friday_early_cutoff_local=cfg.get("FRIDAY_EARLY_CUTOFF_LOCAL", FRIDAY_EARLY_CUTOFF_LOCAL) or "",
+            gym_enabled=parse_bool(cfg.get("GYM_ENABLED") or "1", True),
+            gym_addresses=[addr for addr in gym_addresses if addr],
+            # The .env gym settings were parsed at import (invalid values fell back to defaults)
+            gym_train_min_minutes=int(profile.get("GYM_TRAIN_MIN_MINUTES", GYM_TRAIN_MIN_MINUTES)),
+            gym_train_max_minutes=int(profile.get("GYM_TRAIN_MAX_MINUTES", GYM_TRAIN_MAX_MINUTES)),
+            gym_train_step_minutes=int(profile.get("GYM_TRAIN_STEP_MINUTES", GYM_TRAIN_STEP_MINUTES)),
+            gym_max_days_per_week=int(profile.get("GYM_MAX_DAYS_PER_WEEK", GYM_MAX_DAYS_PER_WEEK)),
+            gym_preferred_days=profile.get("GYM_PREFERRED_DAYS", GYM_PREFERRED_DAYS),
+            gym_leave_mode=profile.get("GYM_LEAVE_MODE", GYM_LEAVE_MODE),
+            gym_combo_max=int(profile.get("GYM_COMBO_MAX", GYM_COMBO_MAX)),
+            gym_defer_max_minutes=int(profile.get("GYM_DEFER_MAX_MINUTES", GYM_DEFER_MAX_MINUTES)),
+            gym_defer_step_minutes=int(profile.get("GYM_DEFER_STEP_MINUTES", GYM_DEFER_STEP_MINUTES)),
+        )
+
+class BudgetExhaustedError(RuntimeError):
+    """The run's API budget (MAX_API_CALLS_PER_RUN) is used up."""
+
+class RoutesApiError(RuntimeError):
+    """Non-200 answer of a routing service; status is the HTTP status code."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+class RoutingProvider:
+    """Source of drive durations. Implementations answer single requests
+    (fetch_duration_minutes: one request, no cache, no budget) and batches (fetch_batch;
+    by default one request per entry); compute_drive_duration_minutes adds the shared route
+    cache, dry-run placeholders and, for metered providers, the per-run API budget.
+
+    capabilities:
+      "traffic"    durations reflect (predicted) traffic at the departure time; only these
+                   go into the persistent route cache, others are kept for the run
+      "metered"    requests are paid and count against MAX_API_CALLS_PER_RUN
+      "batch"      fetch_batch answers several requests in one round trip
+      "free_flow"  free_flow_minutes gives an uncongested duration without a request
+      "offline"    no network access
+    """
+    name = "base"
+    capabilities: frozenset[str] = frozenset()
+
+    def fetch_duration_minutes(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        raise NotImplementedError
+
+    def fetch_batch(self, batch: list[tuple[str, str, datetime]]) -> list[float | Exception]:
+        """Answer (origin, destination, key_time) requests; failures are returned in place."""
+        out: list[float | Exception] = []
+        for origin_addr, destination_addr, key_time in batch:
+            try:
+                out.append(self.fetch_duration_minutes(origin_addr, destination_addr, key_time))
+            except Exception as e:
+                out.append(e)
+        return out
+
+    def free_flow_minutes(self, origin_addr: str, destination_addr: str) -> float | None:
+        """Uncongested duration if the provider knows it without a request, else None."""
+        return None
+
+    def compute_drive_duration_minutes(self, origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> float:
+        """Duration with shared cache and per-run budget.
+        Uses time-bucketing via ROUTE_CACHE_GRANULARITY_MIN to maximize cache hits.
+        """
+        cached = _route_cache_lookup(origin_addr, destination_addr, departure_dt_local)
+        if cached is not None:
+            return cached
+
+        # Normalize time to cache granularity bucket (used for request and cache key)
+        key_time = _floor_dt_to_step(departure_dt_local, _cache_bucket_min())
+        if DRY_RUN is not None and "metered" in self.capabilities:
+            return DRY_RUN.placeholder(origin_addr, destination_addr, key_time)
+        if OFFLINE_REASON is None:
+            try:
+                dur_min = self.fetch_and_store(origin_addr, destination_addr, key_time)
+            except Exception as e:
+                if not _switch_offline(e):
+                    raise
+            else:
+                _note_provider_ok()
+                return dur_min
+        return offline_duration(origin_addr, destination_addr, key_time, self)
+
+    def fetch_and_store(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        """Fetch one cache bucket (even if cached), store it and charge the budget."""
+        global API_CALL_COUNT
+        metered = "metered" in self.capabilities
+        if metered:
+            _check_api_budget()
+        logger.debug(
+            "Requesting route (%s): %s -> %s at %s",
+            self.name, origin_addr, destination_addr, key_time.astimezone(TZ).strftime("%Y-%m-%d %H:%M"),
         )
+        t0 = time.perf_counter()
+        try:
+            dur_min = self.fetch_duration_minutes(origin_addr, destination_addr, key_time)
+        except Exception:
+            _record_route_event("api_error", origin_addr, destination_addr, key_time, latency_s=time.perf_counter() - t0)
+            raise
+        _record_route_event("api", origin_addr, destination_addr, key_time, latency_s=time.perf_counter() - t0)
+
+        # Save to shared cache and update budget counter
+        _route_cache_store(origin_addr, destination_addr, key_time, dur_min, persist="traffic" in self.capabilities)
+        if metered:
+            API_CALL_COUNT += 1
+        return dur_min
 
-class RoutesApiClient:
+    def fetch_and_store_batch(self, batch: list[tuple[str, str, datetime]]) -> list[float | Exception | None]:
+        """fetch_and_store for several buckets in the round trips fetch_batch makes.
+        Entries past what the budget (and the phase's allotment) still covers are not
+        fetched and come back as None; failures come back as the exception."""
+        global API_CALL_COUNT, CACHE_MISS_COUNT
+        metered = "metered" in self.capabilities
+        admitted = batch
+        if metered:
+            room = MAX_API_CALLS_PER_RUN - API_CALL_COUNT
+            if BUDGET_ALLOCATOR is not None:
+                room = min(room, BUDGET_ALLOCATOR.room())
+            admitted = batch[:max(0, room)]
+            if BUDGET_ALLOCATOR is not None:
+                for _ in admitted:
+                    BUDGET_ALLOCATOR.try_charge()
+        if not admitted:
+            return [None] * len(batch)
+        logger.debug("Requesting %d routes (%s) in one batch", len(admitted), self.name)
+        t0 = time.perf_counter()
+        results = self.fetch_batch(admitted)
+        # Every entry carries its share of the round trips
+        share = (time.perf_counter() - t0) / len(admitted)
+        for (origin_addr, destination_addr, key_time), res in zip(admitted, results):
+            # The miss the one-by-one path records in _route_cache_lookup
+            CACHE_MISS_COUNT += 1
+            _record_route_event("miss", origin_addr, destination_addr, key_time)
+            if isinstance(res, Exception):
+                _record_route_event("api_error", origin_addr, destination_addr, key_time, latency_s=share)
+                continue
+            _record_route_event("api", origin_addr, destination_addr, key_time, latency_s=share)
+            _route_cache_store(origin_addr, destination_addr, key_time, res, persist="traffic" in self.capabilities)
+            if metered:
+                API_CALL_COUNT += 1
+        return list(results) + [None] * (len(batch) - len(admitted))
+
+def _matrix_groups(batch: list[tuple[str, str, datetime]], max_elements: int) -> list[tuple[datetime, list[str], list[str]]]:
+    """Split (origin, destination, key_time) requests into route matrices without cells
+    nobody asked for: one departure time each, origins that want the same destinations
+    together, at most max_elements cells. Returns (key_time, origins, destinations)."""
+    by_time: dict[datetime, dict[str, list[str]]] = {}
+    for origin_addr, destination_addr, key_time in batch:
+        dests = by_time.setdefault(key_time, {}).setdefault(origin_addr, [])
+        if destination_addr not in dests:
+            dests.append(destination_addr)
+    groups = []
+    for key_time, by_origin in by_time.items():
+        by_dests: dict[tuple[str, ...], list[str]] = {}
+        for origin_addr, dests in by_origin.items():
+            by_dests.setdefault(tuple(dests), []).append(origin_addr)
+        for dests, origins in by_dests.items():
+            for d0 in range(0, len(dests), max_elements):
+                chunk = list(dests[d0:d0 + max_elements])
+                per = max(1, max_elements // len(chunk))
+                for o0 in range(0, len(origins), per):
+                    groups.append((key_time, origins[o0:o0 + per], chunk))
+    return groups
+
+class RoutesApiClient(RoutingProvider):
+    """Google Routes API (computeRoutes, traffic-aware; batches via computeRouteMatrix)."""
     BASE_URL = "https://routes.googleapis.com/directions/v2:computeRoutes"
+    MATRIX_URL = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
+    # Cells per matrix request (TRAFFIC_AWARE_OPTIMAL allows 100, address waypoints 50 in total)
+    MATRIX_MAX_ELEMENTS = 25
+    name = "google"
+    capabilities = frozenset({"traffic", "metered", "batch"})
 
     def __init__(self, api_key: str):
-        if not api_key:
-            raise ValueError("API key cannot be empty.")
+        # An empty key is allowed for dry runs; requests then fail with a clear message
         self.api_key = api_key
         self.headers = {
             "Content-Type": "application/json",
             "X-Goog-Api-Key": self.api_key,
-            "X-Goog-FieldMask": "routes.duration,routes.distanceMeters,routes.legs.duration",
+            # Only request the fields we need (the field mask is mandatory)
+            "X-Goog-FieldMask": "routes.duration,routes.staticDuration,routes.distanceMeters,routes.legs.duration",
         }
-
-    @staticmethod
-    def _parse_duration_to_minutes(duration_str: str) -> float:
-        s = duration_str.strip().rstrip("s")
-        return float(s) / 60.0
-
-    def compute_drive_duration_minutes(self, origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> float:
-        """Traffic-aware duration with shared cache and per-run budget.
-        Uses time-bucketing via ROUTE_CACHE_GRANULARITY_MIN to maximize cache hits.
-        """
-        # Shared globals for cache and budgeting
-        global API_CALL_COUNT, ROUTE_CACHE, ROUTE_CACHE_TS, SESSION_ROUTE_CACHE
-
-        # Normalize time to cache granularity bucket and build candidates
-        key_time = _floor_dt_to_step(departure_dt_local, ROUTE_CACHE_GRANULARITY_MIN)
-        canonical_key = _canonical_key(origin_addr, destination_addr, key_time.strftime('%Y-%m-%d %H:%M'))
-        # Check session cache first (always on), then persistent cache if allowed
-        for k in _candidate_cache_keys(origin_addr, destination_addr, departure_dt_local):
-            if k in SESSION_ROUTE_CACHE:
-                return SESSION_ROUTE_CACHE[k]
-            if (not DISABLE_ROUTE_CACHE) and (k in ROUTE_CACHE):
-                dur = ROUTE_CACHE[k]
-                # Promote to canonical for faster next hits
-                ROUTE_CACHE[canonical_key] = dur
-                ROUTE_CACHE_TS[canonical_key] = ROUTE_CACHE_TS.get(k, time.time())
-                SESSION_ROUTE_CACHE[canonical_key] = dur
-                return dur
-
-        # Budget check
-        if API_CALL_COUNT >= MAX_API_CALLS_PER_RUN:
-            raise RuntimeError(
-                f"API call budget exceeded ({MAX_API_CALLS_PER_RUN}). Increase MAX_API_CALLS_PER_RUN or widen cache granularity."
-            )
-
+        self.matrix_headers = dict(self.headers, **{
+            "X-Goog-FieldMask": "originIndex,destinationIndex,duration,staticDuration,status,condition",
+        })
+        # Shortest staticDuration (no traffic) seen per route; see free_flow_minutes
+        self.static_minutes: dict[tuple[str, str], float] = {}
+
+    def _note_static(self, origin_addr: str, destination_addr: str, static: str | None) -> None:
+        if static:
+            route = (origin_addr, destination_addr)
+            static_min = parse_duration_to_minutes(static)
+            self.static_minutes[route] = min(static_min, self.static_minutes.get(route, static_min))
+
+    def fetch_duration_minutes(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        """Issue one computeRoutes request and return minutes."""
+        if not self.api_key:
+            ensure_api_key_configured()
         body = {
             "origin": {"address": origin_addr},
             "destination": {"address": destination_addr},
@@ -521,32 +814,255 @@ class RoutesApiClient:
         }
 
         # Perform request
-        resp = requests.post(self.BASE_URL, headers=self.headers, json=body, timeout=20)
+        resp = _routes_post(self.BASE_URL, self.headers, body)
         if resp.status_code != 200:
             logger.error("Routes API HTTP %s: %s", resp.status_code, resp.text[:300])
-            raise RuntimeError(f"Routes API Fehler {resp.status_code}: {resp.text}")
+            raise RoutesApiError(resp.status_code, f"Routes API Fehler {resp.status_code}: {resp.text}")
 
         data = resp.json()
         routes = data.get("routes", [])
         if not routes:
             raise RuntimeError("Keine Route gefunden (leere routes-Liste).")
+        # First (recommended) route
         dur = routes[0].get("duration")
         if not dur:
             raise RuntimeError("Antwort enthält keine duration.")
+        self._note_static(origin_addr, destination_addr, routes[0].get("staticDuration"))
+
+        return parse_duration_to_minutes(dur)
+
+    def fetch_batch(self, batch: list[tuple[str, str, datetime]]) -> list[float | Exception]:
+        """One computeRouteMatrix request per group of _matrix_groups; a group of one
+        cell is an ordinary computeRoutes request."""
+        results: dict[tuple[str, str, datetime], float | Exception] = {}
+        for key_time, origins, destinations in _matrix_groups(batch, self.MATRIX_MAX_ELEMENTS):
+            if len(origins) * len(destinations) == 1:
+                req = (origins[0], destinations[0], key_time)
+                try:
+                    results[req] = self.fetch_duration_minutes(*req)
+                except Exception as e:
+                    results[req] = e
+                continue
+            try:
+                cells = self._fetch_matrix(origins, destinations, key_time)
+            except Exception as e:
+                cells = {(o, d): e for o in origins for d in destinations}
+            for (o, d), res in cells.items():
+                results[(o, d, key_time)] = res
+        missing = RuntimeError("Route-Matrix enthält keine Antwort für diese Strecke.")
+        return [results.get(req, missing) for req in batch]
+
+    def _fetch_matrix(self, origins: list[str], destinations: list[str], key_time: datetime) -> dict[tuple[str, str], float | Exception]:
+        """Issue one computeRouteMatrix request; minutes (or the error) per (origin, destination)."""
+        if not self.api_key:
+            ensure_api_key_configured()
+        body = {
+            "origins": [{"waypoint": {"address": o}} for o in origins],
+            "destinations": [{"waypoint": {"address": d}} for d in destinations],
+            "travelMode": "DRIVE",
+            "routingPreference": "TRAFFIC_AWARE_OPTIMAL",
+            "departureTime": to_rfc3339_local(key_time),
+        }
+        resp = _routes_post(self.MATRIX_URL, self.matrix_headers, body)
+        METRICS.inc("pendelplaner_matrix_requests", result="ok" if resp.status_code == 200 else "error")
+        if resp.status_code != 200:
+            logger.error("Routes API (matrix) HTTP %s: %s", resp.status_code, resp.text[:300])
+            raise RoutesApiError(resp.status_code, f"Routes API Fehler {resp.status_code}: {resp.text}")
+        cells: dict[tuple[str, str], float | Exception] = {}
+        # Indices equal to 0 are left out of the JSON answer
+        for element in resp.json():
+            o = origins[element.get("originIndex", 0)]
+            d = destinations[element.get("destinationIndex", 0)]
+            status = element.get("status") or {}
+            dur = element.get("duration")
+            if status.get("code") or element.get("condition") != "ROUTE_EXISTS" or not dur:
+                cells[(o, d)] = RuntimeError(f"Keine Route gefunden ({o} -> {d}): {status.get('message') or element.get('condition')}")
+                continue
+            self._note_static(o, d, element.get("staticDuration"))
+            cells[(o, d)] = parse_duration_to_minutes(dur)
+        return cells
+
+    def free_flow_minutes(self, origin_addr: str, destination_addr: str) -> float | None:
+        """The route's duration without traffic, once a request for it has answered."""
+        return self.static_minutes.get((origin_addr, destination_addr))
+
+class SyntheticRoutesClient(RoutingProvider):
+    """Offline stand-in for RoutesApiClient (benchmarks, CI, ROUTING_PROVIDER=synthetic):
+    no network, no API key, but metered like the real API.
+
+    Durations follow a deterministic traffic model: a per-route free-flow time derived
+    from a hash of the addresses, scaled by a time-of-week congestion curve with
+    morning/evening peaks (Friday evening peak earlier, weekends light).
+    latency_ms simulates the round trip; error_rate makes that share of (route, bucket)
+    requests fail deterministically for a given seed.
+    """
+    name = "synthetic"
+    capabilities = frozenset({"traffic", "metered", "batch", "free_flow", "offline"})
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.error_rate = max(0.0, min(1.0, float(error_rate)))
+        self.seed = int(seed)
+        self.requests = 0
+
+    def _route_hash(self, *parts: str) -> int:
+        return zlib.crc32("\u241f".join((str(self.seed),) + parts).encode("utf-8"))
+
+    def free_flow_minutes(self, origin_addr: str, destination_addr: str) -> float:
+        return 15.0 + (self._route_hash(origin_addr, destination_addr) % 3000) / 100.0  # 15..45 min
+
+    def traffic_minutes(self, origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> float:
+        """Modelled drive time in minutes for a departure (pure function of its inputs)."""
+        free_flow = self.free_flow_minutes(origin_addr, destination_addr)
+        local = departure_dt_local.astimezone(TZ)
+        h = local.hour + local.minute / 60.0
+        weekday = local.weekday()
+        if weekday >= 5:
+            congestion = 0.15 * math.exp(-((h - 14.0) ** 2) / 8.0)
+        else:
+            evening_peak = 16.5 if weekday == 4 else 17.3
+            congestion = (
+                0.55 * math.exp(-((h - 7.6) ** 2) / 0.6)
+                + 0.70 * math.exp(-((h - evening_peak) ** 2) / 1.1)
+                + 0.10 * math.exp(-((h - 12.3) ** 2) / 0.5)
+            )
+        return round(free_flow * (1.0 + congestion), 2)
+
+    def _answer(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        if self.error_rate:
+            roll = self._route_hash(origin_addr, destination_addr, key_time.isoformat()) % 10000
+            if roll < self.error_rate * 10000:
+                raise RoutesApiError(503, "Routes API Fehler 503: synthetic failure")
+        return self.traffic_minutes(origin_addr, destination_addr, key_time)
+
+    def fetch_duration_minutes(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        self.requests += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        return self._answer(origin_addr, destination_addr, key_time)
+
+    def fetch_batch(self, batch: list[tuple[str, str, datetime]]) -> list[float | Exception]:
+        """Grouped like RoutesApiClient's route matrices: one request (and latency) per group."""
+        results: dict[tuple[str, str, datetime], float | Exception] = {}
+        for key_time, origins, destinations in _matrix_groups(batch, RoutesApiClient.MATRIX_MAX_ELEMENTS):
+            self.requests += 1
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000.0)
+            for o in origins:
+                for d in destinations:
+                    try:
+                        results[(o, d, key_time)] = self._answer(o, d, key_time)
+                    except Exception as e:
+                        results[(o, d, key_time)] = e
+        return [results[req] for req in batch]
+
+class RoadGraphProvider(RoutingProvider):
+    """Local routing over a road network file (ROUTING_GRAPH_FILE, JSON):
+
+        {"places": {"<address>": "<node>", ...},
+         "edges": [["<node>", "<node>", <free-flow minutes>, "<road class>"], ...],
+         "oneway": [["<from>", "<to>", <minutes>, "<road class>"], ...],
+         "time_of_day": {"<road class>" | "default": {"weekday": [24 hourly factors],
+                                                      "saturday": [...], "sunday": [...]}}}
+
+    "edges" are usable both ways; the road class is optional ("default"). A duration is
+    the shortest path (Dijkstra) with every edge's free-flow minutes scaled by its class's
+    factor at the departure time (interpolated between the hourly values; "weekend" may
+    stand for both weekend days, missing profiles mean 1.0). Addresses not listed under
+    "places" are taken as node names. Answers are estimates, not traffic data: free of
+    charge and kept out of the persistent route cache.
+    """
+    name = "graph"
+    capabilities = frozenset({"free_flow", "offline"})
 
-        dur_min = self._parse_duration_to_minutes(dur)
-
-        # Save to shared cache and update budget counter
-        SESSION_ROUTE_CACHE[canonical_key] = dur_min
-        if not DISABLE_ROUTE_CACHE:
-            ROUTE_CACHE[canonical_key] = dur_min
-            ROUTE_CACHE_TS[canonical_key] = time.time()
-        API_CALL_COUNT += 1
-
-        return dur_min
+    def __init__(self, path: str):
+        if not path:
+            raise ValueError("ROUTING_GRAPH_FILE ist nicht gesetzt.")
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.path = path
+        self.places: dict[str, str] = dict(data.get("places", {}))
+        self.adjacency: dict[str, list[tuple[str, float, str]]] = {}
+        for both_ways, edges in ((True, data.get("edges", [])), (False, data.get("oneway", []))):
+            for edge in edges:
+                a, b, minutes = str(edge[0]), str(edge[1]), float(edge[2])
+                road_class = str(edge[3]) if len(edge) > 3 else "default"
+                self.adjacency.setdefault(a, []).append((b, minutes, road_class))
+                self.adjacency.setdefault(b, [])
+                if both_ways:
+                    self.adjacency[b].append((a, minutes, road_class))
+        self.profiles: dict[str, dict[str, list[float]]] = data.get("time_of_day", {})
+        self.classes = sorted({c for out in self.adjacency.values() for _b, _m, c in out})
+        self._memo: dict[tuple, float | None] = {}
+
+    def _node(self, address: str) -> str:
+        node = self.places.get(address, address)
+        if node not in self.adjacency:
+            raise RuntimeError(f"Adresse nicht im Strassennetz ({self.path}): {address}")
+        return node
+
+    def _factor(self, road_class: str, dt_local: datetime) -> float:
+        profile = self.profiles.get(road_class) or self.profiles.get("default") or {}
+        local = dt_local.astimezone(TZ)
+        day = ("weekday", "weekday", "weekday", "weekday", "weekday", "saturday", "sunday")[local.weekday()]
+        hourly = profile.get(day) or (profile.get("weekend") if day != "weekday" else None)
+        if not hourly or len(hourly) != 24:
+            return 1.0
+        h = local.hour + local.minute / 60.0
+        i = int(h)
+        return hourly[i] + (h - i) * (hourly[(i + 1) % 24] - hourly[i])
+
+    def _shortest(self, source: str, target: str, factors: dict[str, float]) -> float | None:
+        memo_key = (source, target, tuple(factors[c] for c in self.classes))
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        result = None
+        while heap:
+            d, node = heapq.heappop(heap)
+            if node == target:
+                result = d
+                break
+            if d > dist[node]:
+                continue
+            for nxt, minutes, road_class in self.adjacency[node]:
+                nd = d + minutes * factors[road_class]
+                if nd < dist.get(nxt, math.inf):
+                    dist[nxt] = nd
+                    heapq.heappush(heap, (nd, nxt))
+        self._memo[memo_key] = result
+        return result
+
+    def fetch_duration_minutes(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        factors = {c: self._factor(c, key_time) for c in self.classes}
+        minutes = self._shortest(self._node(origin_addr), self._node(destination_addr), factors)
+        if minutes is None:
+            raise RuntimeError(f"Keine Route gefunden ({self.path}): {origin_addr} -> {destination_addr}")
+        return round(minutes, 2)
+
+    def free_flow_minutes(self, origin_addr: str, destination_addr: str) -> float | None:
+        try:
+            source, target = self._node(origin_addr), self._node(destination_addr)
+        except RuntimeError:
+            return None
+        return self._shortest(source, target, {c: 1.0 for c in self.classes})
+
+def make_routing_provider(name: str | None = None, api_key: str | None = None) -> RoutingProvider:
+    """Provider for ROUTING_PROVIDER (google, graph, synthetic)."""
+    name = (name or ROUTING_PROVIDER).strip().lower()
+    if name == "google":
+        return RoutesApiClient(API_KEY if api_key is None else api_key)
+    if name == "graph":
+        return RoadGraphProvider(ROUTING_GRAPH_FILE)
+    if name in ("synthetic", "mock"):
+        return SyntheticRoutesClient()
+    raise ValueError(f"Unbekannter ROUTING_PROVIDER: {name} (google, graph, synthetic)")
 
 # Global, optional: client instance used by helper if available
-API_CLIENT = None
+API_CLIENT: RoutingProvider | None = None
+# Configs currently applied via using_config (innermost last)
+_CONFIG_STACK: list[AppConfig] = []
 
 @contextmanager
 def using_config(cfg: AppConfig, overrides: dict | None = None):
@@ -560,6 +1076,10 @@ def using_config(cfg: AppConfig, overrides: dict | None = None):
     global EXTEND_STEP_MINUTES, EXTEND_WORSE_STEPS, EXTEND_LATEST_LOCAL, EXTEND_TARGET_SAVE_MIN
     global AVOID_THRESHOLD_MIN, AVOID_STEP_MINUTES
     global TIMEBANK_CURRENT_MIN, TIMEBANK_CAP_MIN, TIMEBANK_MAX_SPEND_PER_DAY_MIN, EXTENSION_ACTIVITY
+    global MAX_LEAVE_TIME_LOCAL, FRIDAY_EARLY_CUTOFF_LOCAL, GYM_ENABLED, GYM_ADDRESSES
+    global WEEKLY_BLOCKS, WEEKLY_START_DATE, WEEKLY_HO_PERCENT
+    global GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES, GYM_TRAIN_STEP_MINUTES, GYM_MAX_DAYS_PER_WEEK
+    global GYM_PREFERRED_DAYS, GYM_LEAVE_MODE, GYM_COMBO_MAX, GYM_DEFER_MAX_MINUTES, GYM_DEFER_STEP_MINUTES
 
     # Snapshot
     snapshot = (
@@ -570,7 +1090,12 @@ def using_config(cfg: AppConfig, overrides: dict | None = None):
         EXTEND_STEP_MINUTES, EXTEND_WORSE_STEPS, EXTEND_LATEST_LOCAL, EXTEND_TARGET_SAVE_MIN,
         AVOID_THRESHOLD_MIN, AVOID_STEP_MINUTES,
         TIMEBANK_CURRENT_MIN, TIMEBANK_CAP_MIN, TIMEBANK_MAX_SPEND_PER_DAY_MIN, EXTENSION_ACTIVITY,
+        MAX_LEAVE_TIME_LOCAL, FRIDAY_EARLY_CUTOFF_LOCAL, GYM_ENABLED, GYM_ADDRESSES,
+        WEEKLY_BLOCKS, WEEKLY_START_DATE, WEEKLY_HO_PERCENT,
+        GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES, GYM_TRAIN_STEP_MINUTES, GYM_MAX_DAYS_PER_WEEK,
+        GYM_PREFERRED_DAYS, GYM_LEAVE_MODE, GYM_COMBO_MAX, GYM_DEFER_MAX_MINUTES, GYM_DEFER_STEP_MINUTES,
     )
+    _CONFIG_STACK.append(cfg)
     try:
         # Apply cfg
         ORIGIN_ADDRESS = cfg.origin_address
@@ -600,6 +1125,22 @@ def using_config(cfg: AppConfig, overrides: dict | None = None):
         TIMEBANK_CAP_MIN = max(0, int(cfg.timebank_cap_min))
         TIMEBANK_MAX_SPEND_PER_DAY_MIN = max(0, int(cfg.timebank_max_spend_per_day_min))
         EXTENSION_ACTIVITY = (cfg.extension_activity or "gym").strip().lower()
+        MAX_LEAVE_TIME_LOCAL = cfg.max_leave_time_local
+        FRIDAY_EARLY_CUTOFF_LOCAL = cfg.friday_early_cutoff_local
+        GYM_ENABLED = bool(cfg.gym_enabled)
+        GYM_ADDRESSES = list(cfg.gym_addresses)
+        WEEKLY_BLOCKS = cfg.weekly_blocks
+        WEEKLY_START_DATE = cfg.weekly_start_date
+        WEEKLY_HO_PERCENT = max(0, min(40, int(cfg.weekly_ho_percent)))
+        GYM_TRAIN_MIN_MINUTES = int(cfg.gym_train_min_minutes)
+        GYM_TRAIN_MAX_MINUTES = int(cfg.gym_train_max_minutes)
+        GYM_TRAIN_STEP_MINUTES = int(cfg.gym_train_step_minutes)
+        GYM_MAX_DAYS_PER_WEEK = int(cfg.gym_max_days_per_week)
+        GYM_PREFERRED_DAYS = cfg.gym_preferred_days
+        GYM_LEAVE_MODE = (cfg.gym_leave_mode or "earliest").strip().lower()
+        GYM_COMBO_MAX = int(cfg.gym_combo_max)
+        GYM_DEFER_MAX_MINUTES = int(cfg.gym_defer_max_minutes)
+        GYM_DEFER_STEP_MINUTES = int(cfg.gym_defer_step_minutes)
 
         # Apply overrides if provided (camelCase mapping to module vars)
         if overrides:
@@ -620,6 +1161,7 @@ def using_config(cfg: AppConfig, overrides: dict | None = None):
                     STEP_MINUTES = int(v)
         yield
     finally:
+        _CONFIG_STACK.pop()
         (
             ORIGIN_ADDRESS, DESTINATION_ADDRESS, LATEST_ARRIVAL_LOCAL, MORNING_WINDOW_START_LOCAL,
             WORK_HOURS, LUNCH_MIN_MINUTES, LUNCH_MAX_MINUTES, LUNCH_STEP_MINUTES, STEP_MINUTES,
@@ -628,8 +1170,18 @@ def using_config(cfg: AppConfig, overrides: dict | None = None):
             EXTEND_STEP_MINUTES, EXTEND_WORSE_STEPS, EXTEND_LATEST_LOCAL, EXTEND_TARGET_SAVE_MIN,
             AVOID_THRESHOLD_MIN, AVOID_STEP_MINUTES,
             TIMEBANK_CURRENT_MIN, TIMEBANK_CAP_MIN, TIMEBANK_MAX_SPEND_PER_DAY_MIN, EXTENSION_ACTIVITY,
+            MAX_LEAVE_TIME_LOCAL, FRIDAY_EARLY_CUTOFF_LOCAL, GYM_ENABLED, GYM_ADDRESSES,
+            WEEKLY_BLOCKS, WEEKLY_START_DATE, WEEKLY_HO_PERCENT,
+            GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES, GYM_TRAIN_STEP_MINUTES, GYM_MAX_DAYS_PER_WEEK,
+            GYM_PREFERRED_DAYS, GYM_LEAVE_MODE, GYM_COMBO_MAX, GYM_DEFER_MAX_MINUTES, GYM_DEFER_STEP_MINUTES,
         ) = snapshot
 
+def _active_app_config() -> AppConfig:
+    """Return the config applied by the innermost using_config(), else the .env config.
+    Nested overrides (e.g. half-day planning) must build on the active profile, not on .env.
+    """
+    return _CONFIG_STACK[-1] if _CONFIG_STACK else AppConfig.from_env()
+
 class ProgressReporter:
     """Lightweight progress bar to INFO logger. Prints to stderr via logging.
 
@@ -682,6 +1234,255 @@ class ProgressReporter:
         except Exception:
             pass
 
+# ---------------- Phase attribution (profiling) ----------------
+# Stack of (phase, day) set by profile_phase(); innermost last. Always maintained (cheap),
+# so route lookups can be attributed even when only a trace or budget consumer looks at it.
+_PHASE_STACK: list[tuple[str, str | None]] = []
+# Active profiler (set by --profile); None means events are not recorded
+PROFILER: "PhaseProfiler | None" = None
+
+@contextmanager
+def profile_phase(name: str, day: datetime | None = None):
+    """Attribute route lookups inside this block to a phase (nested phases form a path,
+    e.g. "optimize_day/morning_scan") and optionally to a day; the day is inherited otherwise.
+    An empty name only sets the day. Usable as decorator, too.
+    """
+    parent_phase, parent_day = _PHASE_STACK[-1] if _PHASE_STACK else ("", None)
+    path = "/".join(p for p in (parent_phase, name) if p)
+    day_key = day.strftime("%Y-%m-%d") if day is not None else parent_day
+    _PHASE_STACK.append((path, day_key))
+    try:
+        yield
+    finally:
+        _PHASE_STACK.pop()
+
+def _current_phase() -> tuple[str, str | None]:
+    return _PHASE_STACK[-1] if _PHASE_STACK else ("other", None)
+
+class PhaseProfiler:
+    """Collects route lookup events (cache hits by tier, misses, API calls with latency)
+    per (phase, day). Optionally streams every event as JSON line to a trace file.
+    """
+    def __init__(self, trace_path: str | None = None):
+        self.stats: dict[tuple[str, str | None], dict] = {}
+        self._t0 = time.perf_counter()
+        self._trace = open(trace_path, "w", encoding="utf-8") if trace_path else None
+
+    def record(self, kind: str, origin_addr: str, destination_addr: str, bucket: datetime | None,
+               tier: str | None = None, latency_s: float | None = None) -> None:
+        phase, day = _current_phase()
+        st = self.stats.get((phase, day))
+        if st is None:
+            st = {"hits": 0, "misses": 0, "api_calls": 0, "api_errors": 0, "latency_s": 0.0, "latency_max_s": 0.0, "tiers": {}}
+            self.stats[(phase, day)] = st
+        if kind == "hit":
+            st["hits"] += 1
+            st["tiers"][tier or "session"] = st["tiers"].get(tier or "session", 0) + 1
+        elif kind == "miss":
+            st["misses"] += 1
+        elif kind in {"api", "api_error"}:
+            st["api_calls" if kind == "api" else "api_errors"] += 1
+            st["latency_s"] += latency_s or 0.0
+            st["latency_max_s"] = max(st["latency_max_s"], latency_s or 0.0)
+        if self._trace:
+            event = {
+                "t": round(time.perf_counter() - self._t0, 6),
+                "phase": phase,
+                "day": day,
+                "kind": kind,
+                "origin": origin_addr,
+                "destination": destination_addr,
+                "bucket": bucket.astimezone(TZ).strftime("%Y-%m-%d %H:%M") if bucket else None,
+            }
+            if tier:
+                event["tier"] = tier
+            if latency_s is not None:
+                event["latency_ms"] = round(latency_s * 1000.0, 2)
+            self._trace.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def totals_by(self, index: int) -> dict[str, dict]:
+        """Aggregate stats by phase (index 0) or by day (index 1)."""
+        out: dict[str, dict] = {}
+        for key, st in self.stats.items():
+            name = key[index] or "-"
+            agg = out.setdefault(name, {"hits": 0, "misses": 0, "api_calls": 0, "api_errors": 0, "latency_s": 0.0, "latency_max_s": 0.0})
+            for field_name in ("hits", "misses", "api_calls", "api_errors", "latency_s"):
+                agg[field_name] += st[field_name]
+            agg["latency_max_s"] = max(agg["latency_max_s"], st["latency_max_s"])
+        return out
+
+    def summary_lines(self) -> list[str]:
+        total_calls = sum(st["api_calls"] for st in self.stats.values()) or 1
+        lines: list[str] = []
+        for title, index in (("Phase", 0), ("Day", 1)):
+            rows = sorted(self.totals_by(index).items(), key=lambda kv: (-kv[1]["api_calls"], kv[0]))
+            width = max([len(title)] + [len(name) for name, _ in rows])
+            lines.append(f"{title:<{width}}  {'Hits':>6} {'Miss':>6} {'API':>5} {'Err':>4} {'Share':>6} {'Avg ms':>7} {'Max ms':>7}")
+            for name, st in rows:
+                calls = st["api_calls"] + st["api_errors"]
+                avg_ms = (1000.0 * st["latency_s"] / calls) if calls else 0.0
+                lines.append(
+                    f"{name:<{width}}  {st['hits']:>6} {st['misses']:>6} {st['api_calls']:>5} {st['api_errors']:>4} "
+                    f"{100.0 * st['api_calls'] / total_calls:>5.1f}% {avg_ms:>7.1f} {1000.0 * st['latency_max_s']:>7.1f}"
+                )
+            lines.append("")
+        lines.append(f"API calls: {API_CALL_COUNT}/{MAX_API_CALLS_PER_RUN}  cache hits: {CACHE_HIT_COUNT}  misses: {CACHE_MISS_COUNT}")
+        return lines
+
+    def close(self) -> None:
+        if self._trace:
+            self._trace.close()
+            self._trace = None
+
+def _record_route_event(kind: str, origin_addr: str, destination_addr: str, bucket: datetime | None = None,
+                        tier: str | None = None, latency_s: float | None = None) -> None:
+    if kind == "api_error":
+        _plan_deps_incomplete()
+    if kind == "hit":
+        METRICS.inc("pendelplaner_cache_lookups", result="hit", tier=tier or "session")
+    elif kind == "miss":
+        METRICS.inc("pendelplaner_cache_lookups", result="miss", tier="none")
+    else:
+        METRICS.inc("pendelplaner_api_calls", result="ok" if kind == "api" else "error")
+        if latency_s is not None:
+            METRICS.observe("pendelplaner_routes_latency_seconds", latency_s)
+    if PROFILER is not None:
+        PROFILER.record(kind, origin_addr, destination_addr, bucket, tier=tier, latency_s=latency_s)
+
+# ---------------- Metrics (OpenMetrics text exposition) ----------------
+ROUTES_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+DAY_PLAN_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0)
+
+class PlannerMetrics:
+    """In-process counters and histograms for monitoring, rendered as OpenMetrics text.
+    Always on (a few dict updates per route lookup); exported via --metrics-file or --metrics-port.
+    Gauges for budget and cache size are read from the live globals at render time.
+    """
+    _HELP = {
+        "pendelplaner_api_calls": ("counter", "Routing provider requests by result"),
+        "pendelplaner_cache_lookups": ("counter", "Route cache lookups by result and tier (session, persistent, neighbour)"),
+        "pendelplaner_cache_evictions": ("counter", "Persistent cache entries dropped when saving"),
+        "pendelplaner_cache_rollups": ("counter", "Route cache entries rolled up into the per-route time-of-week history"),
+        "pendelplaner_routes_latency_seconds": ("histogram", "Routes API request latency"),
+        "pendelplaner_matrix_requests": ("counter", "Route matrix requests (batched legs) by result"),
+        "pendelplaner_day_plan_seconds": ("histogram", "Plan computation time per day and stage (base, optimize)"),
+        "pendelplaner_lookups_pruned": ("counter", "Scan candidates dropped without a lookup by reason (bound, infeasible, route_bound, coarser_grid)"),
+        "pendelplaner_watch_ticks": ("counter", "Planning runs in --watch mode by result"),
+        "pendelplaner_offline_estimates": ("counter", "Cache misses answered by an offline estimate by source"),
+        "pendelplaner_cache_revalidations": ("counter", "Stale route cache entries served and refetched after the run by result (queued, changed, unchanged, error)"),
+    }
+
+    def __init__(self):
+        self.counters: dict[str, dict[tuple, float]] = {}
+        self.histograms: dict[str, dict[tuple, list]] = {}
+        self._buckets = {
+            "pendelplaner_routes_latency_seconds": ROUTES_LATENCY_BUCKETS,
+            "pendelplaner_day_plan_seconds": DAY_PLAN_BUCKETS,
+        }
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        state = series.get(key)
+        if state is None:
+            state = [[0] * len(self._buckets[name]), 0.0, 0]
+            series[key] = state
+        for i, bound in enumerate(self._buckets[name]):
+            if value <= bound:
+                state[0][i] += 1
+        state[1] += value
+        state[2] += 1
+
+    @staticmethod
+    def _labels(pairs: tuple | list) -> str:
+        if not pairs:
+            return ""
+        def esc(v: str) -> str:
+            return str(v).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+    @staticmethod
+    def _num(v: float) -> str:
+        return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+    def render(self) -> str:
+        out: list[str] = []
+        for name, (kind, help_txt) in self._HELP.items():
+            out.append(f"# TYPE {name} {kind}")
+            out.append(f"# HELP {name} {help_txt}")
+            if kind == "counter":
+                for key, value in sorted(self.counters.get(name, {}).items()):
+                    out.append(f"{name}_total{self._labels(key)} {self._num(value)}")
+            else:
+                for key, (counts, total, count) in sorted(self.histograms.get(name, {}).items()):
+                    for bound, c in zip(self._buckets[name], counts):
+                        out.append(f"{name}_bucket{self._labels(list(key) + [('le', repr(float(bound)))])} {c}")
+                    out.append(f"{name}_bucket{self._labels(list(key) + [('le', '+Inf')])} {count}")
+                    out.append(f"{name}_count{self._labels(key)} {count}")
+                    out.append(f"{name}_sum{self._labels(key)} {self._num(total)}")
+        gauges = [
+            ("pendelplaner_api_budget_limit", "API calls allowed per run (MAX_API_CALLS_PER_RUN)", [((), MAX_API_CALLS_PER_RUN)]),
+            ("pendelplaner_api_budget_remaining", "API calls left in the current run", [((), max(0, MAX_API_CALLS_PER_RUN - API_CALL_COUNT))]),
+            ("pendelplaner_cache_entries", "Route cache entries by tier", [
+                ((("tier", "session"),), len(SESSION_ROUTE_CACHE)),
+                ((("tier", "persistent"),), len(ROUTE_CACHE)),
+            ]),
+            ("pendelplaner_route_store_bytes", "Measured memory of the in-process route cache (both tiers)", [((), ROUTE_STORE.memory_bytes())]),
+            ("pendelplaner_route_history_buckets", "Route/time-of-week buckets in the rolled-up cache history", [((), len(ROUTE_HISTORY))]),
+            ("pendelplaner_start_time_seconds", "Process start (unix time)", [((), self.started)]),
+        ]
+        for name, help_txt, samples in gauges:
+            out.append(f"# TYPE {name} gauge")
+            out.append(f"# HELP {name} {help_txt}")
+            for key, value in samples:
+                out.append(f"{name}{self._labels(key)} {self._num(value)}")
+        out.append("# EOF")
+        return "\n".join(out) + "\n"
+
+METRICS = PlannerMetrics()
+
+def write_metrics_file(path: str) -> None:
+    """Write the current metrics atomically (node_exporter textfile collector friendly)."""
+    try:
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(METRICS.render())
+        os.replace(tmp, path)
+        logger.info("Wrote metrics to %s", path)
+    except Exception as e:
+        logger.warning("Could not write metrics %s: %s", path, e)
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """Serve GET /metrics on a daemon thread for as long as the process runs."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    import threading
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = METRICS.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            logger.debug("metrics: " + fmt, *args)
+
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
+
 # Afternoon (half-day PM) defaults
 AFTERNOON_ARRIVAL_LOCAL = CONFIG.get("AFTERNOON_ARRIVAL_LOCAL", "13:30")
 AFTERNOON_WINDOW_START_LOCAL = CONFIG.get("AFTERNOON_WINDOW_START_LOCAL", "11:00")
@@ -769,8 +1570,11 @@ except Exception:
 # Read gym addresses only from env; no hardcoded defaults
 GYM_ADDRESS_1 = (CONFIG.get("GYM_ADDRESS_1", "") or "").strip()
 GYM_ADDRESS_2 = (CONFIG.get("GYM_ADDRESS_2", "") or "").strip()
-# Build a list of configured gym addresses (non-empty only)
-GYM_ADDRESSES: list[str] = [addr for addr in [GYM_ADDRESS_1, GYM_ADDRESS_2] if addr]
+# Build a list of configured gym addresses (non-empty only); GYM_ADDRESS_3..9 are optional extras
+GYM_ADDRESSES: list[str] = [
+    addr for addr in [GYM_ADDRESS_1, GYM_ADDRESS_2] + [(CONFIG.get(f"GYM_ADDRESS_{n}", "") or "").strip() for n in range(3, 10)]
+    if addr
+]
 try:
     GYM_TRAIN_MIN_MINUTES = int(CONFIG.get("GYM_TRAIN_MIN_MINUTES", "90"))
 except ValueError:
@@ -972,19 +1776,84 @@ EMO_CAR = _emoji("🚗", "Car")
 EMO_OFFICE = _emoji("🏢", "Office")
 EMO_STAR = _emoji("⭐", "*")
 
-# ---------------- Data models (initial scaffold) ----------------
+# ---------------- Data models ----------------
 @dataclass
 class CommuteLeg:
     departure: datetime
     arrival: datetime
     duration_minutes: float
 
+@dataclass
+class GymVisit:
+    address: str
+    leave_office: datetime
+    office_to_gym_minutes: float
+    train_minutes: int
+
 @dataclass
 class DayPlanDM:
     date: datetime
     mode: str  # OFFICE, HO, OFF, ERROR-...
     outbound: CommuteLeg | None = None
     inbound: CommuteLeg | None = None
+    strategy: str = ""  # base|extension|timebank (office days only)
+    work_minutes: int = 0
+    lunch_minutes: int = 0
+    extend_minutes: int = 0  # >0: stay longer; <0: leave early using timebank
+    penalty_minutes: int = 0
+    gym: GymVisit | None = None
+    earliest_leave: datetime | None = None
+    standard_inbound_minutes: float | None = None
+    standard_total_minutes: float | None = None
+    total_travel_minutes: float | None = None  # incl. Office→Gym on gym days
+    benefit_minutes: int = 0
+    timebank_balance_min: int | None = None
+    resolution: dict | None = None  # effective scan/cache resolution (see resolution_info)
+    estimate: dict | None = None  # offline estimates the plan rests on (see estimate_info)
+    error: str | None = None
+
+    def commute_minutes(self) -> float:
+        """Regular commute (home↔office legs only), excluding Office→Gym."""
+        if self.outbound is None or self.inbound is None:
+            return 0.0
+        if self.strategy == "timebank":
+            return self.outbound.duration_minutes + self.inbound.duration_minutes
+        return float(self.total_travel_minutes or 0.0)
+
+    def to_dict(self, ndigits: int | None = 2) -> dict:
+        return _jsonable(asdict(self), ndigits)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DayPlanDM":
+        """Inverse of to_dict (datetimes are read back in TZ)."""
+        def dt(value):
+            return datetime.fromisoformat(value).astimezone(TZ) if value else None
+
+        def leg(value):
+            return CommuteLeg(dt(value["departure"]), dt(value["arrival"]), value["duration_minutes"]) if value else None
+
+        fields = dict(data)
+        fields["date"] = dt(fields["date"])
+        fields["earliest_leave"] = dt(fields.get("earliest_leave"))
+        fields["outbound"] = leg(fields.get("outbound"))
+        fields["inbound"] = leg(fields.get("inbound"))
+        gym = fields.get("gym")
+        if gym:
+            fields["gym"] = GymVisit(gym["address"], dt(gym["leave_office"]), gym["office_to_gym_minutes"], gym["train_minutes"])
+        return cls(**fields)
+
+def _jsonable(value, ndigits: int | None = 2):
+    """Convert dataclass dicts to JSON-safe values (datetimes as ISO-8601 with offset).
+    Floats are rounded to ndigits (None keeps full precision)."""
+    if isinstance(value, datetime):
+        return value.astimezone(TZ).isoformat()
+    if isinstance(value, dict):
+        return {k: _jsonable(v, ndigits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v, ndigits) for v in value]
+    if isinstance(value, float) and ndigits is not None:
+        return round(value, ndigits)
+    return value
 
 def _build_arg_parser() -> argparse.ArgumentParser:
     p = argparse.ArgumentParser(
@@ -1030,18 +1899,89 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Bypass route cache for this run (forces fresh Google Routes API requests)",
     )
+    p.add_argument(
+        "--offline",
+        action="store_true",
+        help="Plan without routing requests: estimate every cache miss (flagged with a confidence); no API key needed",
+    )
+    p.add_argument(
+        "--format",
+        choices=["text", "json", "ndjson"],
+        default="text",
+        help="Output format: text (default), json (one document) or ndjson (one record per day, streamed)",
+    )
+    p.add_argument(
+        "--profile",
+        action="store_true",
+        help="Attribute cache hits/misses and API calls (with latency) to phases and days; print a summary to stderr",
+    )
+    p.add_argument(
+        "--profile-trace",
+        metavar="FILE",
+        help="With profiling: write every route lookup event as JSON line to FILE (implies --profile)",
+    )
+    p.add_argument(
+        "--metrics-file",
+        metavar="FILE",
+        help="Write OpenMetrics text (API calls, latency, cache tiers, evictions, budget, plan time) after the run",
+    )
+    p.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve OpenMetrics on http://127.0.0.1:PORT/metrics while the process runs",
+    )
+    p.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Estimate the API calls a run needs (cached vs. new, per day/phase) without calling the API",
+    )
+    trace = p.add_mutually_exclusive_group()
+    trace.add_argument(
+        "--record",
+        metavar="TRACE_JSONL",
+        help="Record every Routes API request/response (with timing) to a JSON-lines trace",
+    )
+    trace.add_argument(
+        "--replay",
+        metavar="TRACE_JSONL",
+        help="Serve Routes API responses from a recorded trace (offline, no API key); unknown requests abort the run",
+    )
+    p.add_argument(
+        "--batch",
+        metavar="PROFILES_JSON",
+        help="Plan all profiles of a JSON file in one run (shared cache and API budget)",
+    )
+    p.add_argument(
+        "--batch-out",
+        default="batch_out",
+        metavar="DIR",
+        help="Output directory for per-profile results in batch mode (default: batch_out)",
+    )
+    p.add_argument(
+        "--prefetch",
+        type=int,
+        metavar="DAYS",
+        help="Warm the route cache for the plans of the next DAYS days (own budget PREFETCH_MAX_CALLS, paced), e.g. overnight via cron",
+    )
+    p.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-plan periodically (more often close to the next departure); stop with SIGTERM/Ctrl-C",
+    )
+    snap = p.add_mutually_exclusive_group()
+    snap.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="Also save the computed plan as versioned JSON snapshot to FILE (batch: one per profile in --batch-out)",
+    )
+    snap.add_argument(
+        "--from-snapshot",
+        metavar="FILE",
+        help="Render a saved plan snapshot in --format without planning (no API key, no cache, no API calls)",
+    )
     return p
 
-ROUTES_URL = "https://routes.googleapis.com/directions/v2:computeRoutes"
-
-HEADERS = {
-    "Content-Type": "application/json",
-    "X-Goog-Api-Key": API_KEY,
-    # Nur Felder anfordern, die wir brauchen -> Performant & Required
-    # (siehe X-Goog-FieldMask-Anforderung in der Doku)
-    "X-Goog-FieldMask": "routes.duration,routes.distanceMeters,routes.legs.duration",
-}
-
 # --------------- API call budgeting and response cache ---------------
 DISABLE_ROUTE_CACHE = False
 try:
@@ -1052,6 +1992,33 @@ try:
     BUDGET_SOFT_PCT = float(CONFIG.get("BUDGET_SOFT_PCT", "0.9"))
 except ValueError:
     BUDGET_SOFT_PCT = 0.9
+# Per-day/phase split of the remaining budget when a dry run says it will not suffice (auto|off)
+BUDGET_ALLOCATION = (CONFIG.get("BUDGET_ALLOCATION", "auto") or "auto").strip().lower()
+try:
+    BUDGET_RESERVE_PCT = float(CONFIG.get("BUDGET_RESERVE_PCT", "0.1"))
+except ValueError:
+    BUDGET_RESERVE_PCT = 0.1
+try:
+    DRY_RUN_PLACEHOLDER_MIN = float(CONFIG.get("DRY_RUN_PLACEHOLDER_MIN", "30"))
+except ValueError:
+    DRY_RUN_PLACEHOLDER_MIN = 30.0
+# Top-level phases that produce the base plan of a day; funded before optional ones
+# (optimize_day, timebank_gym, std_inbound_probe)
+_ESSENTIAL_PHASES = ("ho_allocator", "day_plan", "morning_scan", "evening_scan")
+# --dry-run: print the API call estimate instead of planning
+DRY_RUN_ONLY = False
+# Active dry-run pass (misses get placeholders, nothing is fetched); None = real run
+DRY_RUN: "DryRunEstimator | None" = None
+# Active per-day/phase allotments for this planning pass; None = only the global cap applies
+BUDGET_ALLOCATOR: "BudgetAllocator | None" = None
+# Budget-aware degradation (auto|off): coarser scans instead of skipping work when the budget is tight
+BUDGET_DEGRADATION = (CONFIG.get("BUDGET_DEGRADATION", "auto") or "auto").strip().lower()
+# Degradation levels: (scan step factor, min cache bucket minutes, min probe window minutes)
+RESOLUTION_LEVELS = ((1, 0, 0), (2, 10, 15), (3, 15, 30), (4, 20, 30))
+# Level chosen for the current planning pass from the dry-run estimate
+RESOLUTION_LEVEL = 0
+# Coarsest level any scan of a day ran at (day "YYYY-MM-DD" -> level), for reporting
+RESOLUTION_BY_DAY: dict[str | None, int] = {}
 def _parse_granularity(value: str | None, default_min: int = 5) -> tuple[int, int]:
     """Parse granularity from env.
     Accepts either a single int (e.g., "5") or a range "5..15".
@@ -1075,21 +2042,551 @@ def _parse_granularity(value: str | None, default_min: int = 5) -> tuple[int, in
         return (default_min, max(5, min(15, default_min)))
 
 ROUTE_CACHE_GRANULARITY_MIN, ROUTE_CACHE_PROBE_WINDOW_MIN = _parse_granularity(CONFIG.get("ROUTE_CACHE_GRANULARITY_MIN", "5"), 5)
-ROUTE_CACHE: dict[tuple[str, str, str], float] = {}
-ROUTE_CACHE_TS: dict[tuple[str, str, str], float] = {}
+
+_ORDINAL_1970 = datetime(1970, 1, 1).toordinal()
+_ABSENT = float("nan")
+_NO_ENTRY = (_ABSENT, _ABSENT, 0)
+
+class RouteStore:
+    """Both route cache tiers (session and persistent) in one compact table.
+
+    A key (origin, destination, "TZ|YYYY-mm-dd HH:MM") is packed into one int from an
+    interned route id, an interned time-zone id (0 = legacy key without TZ) and the
+    bucket's wall-clock minute since 1970. One index maps it to a slot; the slot's
+    session duration, persistent duration (NaN = not in that tier) and fetch time live
+    in array columns instead of boxed floats. Keys that cannot be packed (not a stamp)
+    fall back to a small side index. ROUTE_CACHE, ROUTE_CACHE_TS and SESSION_ROUTE_CACHE
+    are dict-style views of the columns, so callers keep using tuple keys.
+
+    With a binary cache file attached, a route's persistent entries are only decoded when
+    the route is first looked up (see load_route_cache); until then they count as pending.
+    """
+
+    def __init__(self):
+        self._routes: dict[tuple[str, str], int] = {}
+        self._route_names: list[tuple[str, str]] = []
+        self._zones: dict[str, int] = {"": 0}
+        self._zone_names: list[str] = [""]
+        self._stamp_codes: dict[str, int] = {}
+        self._stamp_names: dict[int, str] = {}
+        self._day_minutes: dict[str, int] = {}
+        self._clock_minutes: dict[str, int] = {}
+        self._index: dict[int, int] = {}
+        self._odd: dict[tuple[str, str, str], int] = {}
+        self._free: list[int] = []
+        self._session = array("d")
+        self._persistent = array("d")
+        self._fetched = array("I")
+        self.counts = {"session": 0, "persistent": 0}
+        # Binary cache file: route -> [(zone, entries, offset, length)] of its undecoded blocks
+        self._source: mmap.mmap | None = None
+        self._lazy: dict[tuple[str, str], list[tuple[str, int, int, int]]] = {}
+        self.pending = 0
+        self.expired = 0
+        # Blocks of the attached file that failed to decode (dropped; warned about once)
+        self.corrupt = 0
+        self.session = _RouteTier(self, "session")
+        self.persistent = _RouteTier(self, "persistent")
+        self.fetched = _RouteTier(self, "fetched")
+
+    def _stamp_code(self, third: str) -> int | None:
+        """zone_id << 32 | minute for a "TZ|YYYY-mm-dd HH:MM" (or legacy) stamp."""
+        code = self._stamp_codes.get(third)
+        if code is None:
+            zone, _, stamp = third.rpartition("|")
+            day, sep, clock = stamp.partition(" ")
+            day_minute = self._day_minutes.get(day)
+            if day_minute is None:
+                try:
+                    parsed = datetime(int(day[0:4]), int(day[5:7]), int(day[8:10]))
+                except ValueError:
+                    return None
+                if f"{parsed:%Y-%m-%d}" != day or parsed.year < 1970:
+                    return None
+                day_minute = self._day_minutes[day] = (parsed.toordinal() - _ORDINAL_1970) * 1440
+            clock_minute = self._clock_minutes.get(clock)
+            if clock_minute is None:
+                if not (len(clock) == 5 and clock[2] == ":" and clock[:2].isdigit() and clock[3:].isdigit()
+                        and int(clock[:2]) < 24 and int(clock[3:]) < 60):
+                    return None
+                clock_minute = self._clock_minutes[clock] = int(clock[:2]) * 60 + int(clock[3:])
+            zone_id = self._zone_id(zone)
+            if zone_id > 0xFF or not sep:
+                return None
+            code = zone_id << 32 | (day_minute + clock_minute)
+            self._stamp_codes[third] = code
+            self._stamp_names[code] = third
+        return code
+
+    def _zone_id(self, zone: str) -> int:
+        zone_id = self._zones.get(zone)
+        if zone_id is None:
+            zone_id = self._zones[zone] = len(self._zone_names)
+            self._zone_names.append(zone)
+        return zone_id
+
+    def _stamp_name(self, code: int) -> str:
+        name = self._stamp_names.get(code)
+        if name is None:
+            minute = code & 0xFFFFFFFF
+            day = datetime.fromordinal(_ORDINAL_1970 + minute // 1440)
+            zone = self._zone_names[code >> 32]
+            stamp = f"{day:%Y-%m-%d} {minute % 1440 // 60:02d}:{minute % 60:02d}"
+            name = f"{zone}|{stamp}" if zone else stamp
+            self._stamp_names[code] = name
+            self._stamp_codes[name] = code
+        return name
+
+    def _route_id(self, route: tuple[str, str]) -> int:
+        rid = self._routes.get(route)
+        if rid is None:
+            rid = self._routes[route] = len(self._route_names)
+            self._route_names.append(route)
+        return rid
+
+    def slot(self, key: tuple[str, str, str]) -> int | None:
+        rid = self._routes.get((key[0], key[1]))
+        if rid is None and self._lazy and (key[0], key[1]) in self._lazy:
+            rid = self.load_route((key[0], key[1]))
+        if rid is not None:
+            code = self._stamp_codes.get(key[2])
+            if code is None:
+                code = self._stamp_code(key[2])
+            if code is not None:
+                return self._index.get(rid << 40 | code)
+        return self._odd.get(key) if self._odd else None
+
+    def entry(self, key: tuple[str, str, str]) -> tuple[float, float, float]:
+        """(session duration, persistent duration, fetch time) of a key; NaN = not in that tier."""
+        slot = self.slot(key)
+        if slot is None:
+            return _NO_ENTRY
+        return (self._session[slot], self._persistent[slot], self._fetched[slot])
+
+    def _slot_for_write(self, key: tuple[str, str, str]) -> int:
+        slot = self.slot(key)
+        if slot is not None:
+            return slot
+        slot = self._new_slot()
+        code = self._stamp_code(key[2])
+        if code is None:
+            self._odd[key] = slot
+        else:
+            self._index[self._route_id((key[0], key[1])) << 40 | code] = slot
+        return slot
+
+    def _new_slot(self) -> int:
+        slot = self._free.pop() if self._free else len(self._session)
+        if slot == len(self._session):
+            self._session.append(_ABSENT)
+            self._persistent.append(_ABSENT)
+            self._fetched.append(0)
+        return slot
+
+    # -- binary cache file (lazily decoded per route) --
+    def attach(self, source: mmap.mmap | None, blocks: dict[tuple[str, str], list[tuple[str, int, int, int]]]) -> None:
+        """Serve the persistent entries of routes not held yet from source's blocks."""
+        self.detach()
+        self._source = source
+        for route, route_blocks in blocks.items():
+            if route in self._routes:
+                self._decode(self._routes[route], route_blocks, source)
+            else:
+                self._lazy[route] = route_blocks
+                self.pending += sum(count for _zone, count, _off, _len in route_blocks)
+
+    def detach(self) -> None:
+        """Drop undecoded routes and release the file mapping."""
+        self._lazy.clear()
+        self.pending = 0
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+
+    def load_route(self, route: tuple[str, str]) -> int:
+        blocks = self._lazy.pop(route)
+        self.pending -= sum(count for _zone, count, _off, _len in blocks)
+        rid = self._route_id(route)
+        self._decode(rid, blocks, self._source)
+        return rid
+
+    def load_all(self) -> None:
+        for route in list(self._lazy):
+            self.load_route(route)
+
+    def _decode(self, rid: int, blocks: list[tuple[str, int, int, int]], source) -> None:
+        now = time.time()
+        for zone, count, offset, length in blocks:
+            try:
+                minutes, durations, fetched = _unpack_route_block(source[offset:offset + length], count)
+            except (zlib.error, struct.error, ValueError) as e:
+                # A damaged block costs its entries (refetched on demand), not the run
+                self.corrupt += 1
+                if self.corrupt == 1:
+                    logger.warning("Route cache %s: dropping damaged entries of %s -> %s (%s); they are fetched again",
+                                   ROUTE_CACHE_FILE, *self._route_names[rid], e)
+                continue
+            zone_bits = self._zone_id(zone) << 32
+            for minute, dur, ts in zip(minutes, durations, fetched):
+                if _route_cache_expired(ts, now):
+                    self.expired += 1
+                    _roll_up((*self._route_names[rid], _minute_week_bucket(minute)), dur)
+                    continue
+                packed = rid << 40 | zone_bits | minute
+                slot = self._index.get(packed)
+                if slot is None:
+                    slot = self._index[packed] = self._new_slot()
+                elif self._persistent[slot] == self._persistent[slot]:
+                    continue  # fresher value stored in this process
+                self._persistent[slot] = dur
+                self._fetched[slot] = ts
+                self.counts["persistent"] += 1
+
+    def route_blocks(self):
+        """Persistent entries per (route, zone), sorted by minute, for writing: yields
+        (origin, destination, zone, minutes, durations, fetch times) or, for routes never
+        decoded, (origin, destination, zone, count, raw block) from the attached file."""
+        groups: dict[tuple[int, int], list[tuple[int, float, int]]] = {}
+        for packed, slot in self._index.items():
+            dur = self._persistent[slot]
+            if dur == dur:
+                groups.setdefault((packed >> 40, packed >> 32 & 0xFF), []).append(
+                    (packed & 0xFFFFFFFF, dur, self._fetched[slot]))
+        for (rid, zone_id), rows in groups.items():
+            rows.sort()
+            yield (*self._route_names[rid], self._zone_names[zone_id],
+                   array("I", [r[0] for r in rows]), array("d", [r[1] for r in rows]), array("I", [r[2] for r in rows]))
+        for (origin, destination), blocks in self._lazy.items():
+            for zone, count, offset, length in blocks:
+                yield origin, destination, zone, count, self._source[offset:offset + length]
+
+    def durations_by_route(self) -> dict[tuple[str, str], list[float]]:
+        """Persistent durations of the decoded routes, per route."""
+        out: dict[tuple[str, str], list[float]] = {}
+        for packed, slot in self._index.items():
+            dur = self._persistent[slot]
+            if dur == dur:
+                out.setdefault(self._route_names[packed >> 40], []).append(dur)
+        return out
+
+    def route_durations(self, route: tuple[str, str]) -> list[float]:
+        """Persistent durations of one route (decoding it first if it is still lazy)."""
+        if route in self._lazy:
+            self.load_route(route)
+        rid = self._routes.get(route)
+        if rid is None:
+            return []
+        out = []
+        for packed, slot in self._index.items():
+            if packed >> 40 == rid:
+                dur = self._persistent[slot]
+                if dur == dur:
+                    out.append(dur)
+        return out
+
+    def _release(self, key: tuple[str, str, str], slot: int) -> None:
+        """Drop the slot once neither tier holds the key."""
+        if self._session[slot] == self._session[slot] or self._persistent[slot] == self._persistent[slot]:
+            return
+        if self._odd.pop(key, None) is None:
+            self._index.pop(self._routes[(key[0], key[1])] << 40 | self._stamp_code(key[2]), None)
+        self._free.append(slot)
+
+    def keys(self, name: str):
+        """Keys present in a tier ("fetched" follows the persistent tier; decodes all routes)."""
+        if name != "session":
+            self.load_all()
+        column = self._session if name == "session" else self._persistent
+        for packed, slot in list(self._index.items()):
+            if column[slot] == column[slot]:
+                yield (*self._route_names[packed >> 40], self._stamp_name(packed & 0xFFFFFFFFFF))
+        for key, slot in list(self._odd.items()):
+            if column[slot] == column[slot]:
+                yield key
+
+    def compact(self) -> None:
+        """Forget interned stamps no held key uses (probes of missing buckets intern them
+        too) and, once many slots are free, renumber the slots so the columns shrink."""
+        live = {packed & 0xFFFFFFFFFF for packed in self._index}
+        self._stamp_names = {code: name for code, name in self._stamp_names.items() if code in live}
+        self._stamp_codes = {name: code for code, name in self._stamp_names.items()}
+        if len(self._free) * 4 <= len(self._session):
+            return
+        session, persistent, fetched = array("d"), array("d"), array("I")
+        for index in (self._index, self._odd):
+            for key, slot in list(index.items()):
+                index[key] = len(session)
+                session.append(self._session[slot])
+                persistent.append(self._persistent[slot])
+                fetched.append(self._fetched[slot])
+        # In place: the tier views hold references to the columns
+        self._session[:], self._persistent[:], self._fetched[:] = session, persistent, fetched
+        self._index, self._odd, self._free = dict(self._index), dict(self._odd), []
+
+    def __len__(self) -> int:
+        """Number of keys held in either tier."""
+        return len(self._index) + len(self._odd)
+
+    def memory_bytes(self) -> int:
+        """Measured footprint: containers, index keys/slots and column buffers (the
+        address and stamp strings are shared with the callers and counted once)."""
+        size = sum(sys.getsizeof(c) for c in (
+            self._routes, self._route_names, self._zones, self._zone_names, self._stamp_codes, self._stamp_names,
+            self._index, self._odd, self._free, self._session, self._persistent, self._fetched,
+        ))
+        size += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self._index.items())
+        size += sum(sys.getsizeof(t) for t in self._stamp_codes)
+        return size
+
+class _RouteTier:
+    """dict-style view of one RouteStore column: "session" (SESSION_ROUTE_CACHE),
+    "persistent" (ROUTE_CACHE) or "fetched" (ROUTE_CACHE_TS; keyed like the persistent tier)."""
+
+    def __init__(self, store: RouteStore, name: str):
+        self._store = store
+        self._name = name
+        self._tier = "persistent" if name == "fetched" else name
+        self._column = store._session if name == "session" else store._persistent
+
+    def get(self, key, default=None):
+        slot = self._store.slot(key)
+        if slot is None:
+            return default
+        value = self._column[slot]
+        if value != value:
+            return default
+        return float(self._store._fetched[slot]) if self._name == "fetched" else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _ABSENT)
+        if value != value:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        slot = self._store.slot(key)
+        return slot is not None and self._column[slot] == self._column[slot]
+
+    def __setitem__(self, key, value) -> None:
+        store = self._store
+        slot = store._slot_for_write(key)
+        column = self._column
+        if self._name == "fetched":
+            store._fetched[slot] = max(0, min(0xFFFFFFFF, int(value)))
+            return
+        if column[slot] != column[slot]:
+            store.counts[self._tier] += 1
+            if self._name == "persistent":
+                store._fetched[slot] = int(time.time())
+        column[slot] = float(value)
+
+    def pop(self, key, default=None):
+        slot = self._store.slot(key)
+        value = self.get(key, _ABSENT)
+        if value != value:
+            return default
+        if self._name != "fetched":
+            self._column[slot] = _ABSENT
+            self._store.counts[self._tier] -= 1
+            self._store._release(key, slot)
+        return value
+
+    def clear(self) -> None:
+        if self._name == "fetched":
+            return
+        if self._name == "persistent":
+            self._store.detach()
+        for key in list(self._store.keys(self._tier)):
+            self.pop(key)
+
+    def __len__(self) -> int:
+        if self._name == "session":
+            return self._store.counts["session"]
+        return self._store.counts["persistent"] + self._store.pending
+
+    def __iter__(self):
+        return self._store.keys(self._tier)
+
+    def keys(self):
+        return list(self._store.keys(self._tier))
+
+    def items(self):
+        return [(key, self[key]) for key in self._store.keys(self._tier)]
+
+    def values(self):
+        return [value for _key, value in self.items()]
+
+ROUTE_STORE = RouteStore()
+ROUTE_CACHE = ROUTE_STORE.persistent
+ROUTE_CACHE_TS = ROUTE_STORE.fetched
+# Refetch volatility per route and time-of-week bucket ("<weekday> HH:MM"): [mean relative change, samples]
+ROUTE_VOLATILITY: dict[tuple[str, str, str], list[float]] = {}
+# Entries dropped from the cache, rolled up per route and time-of-week bucket: [count, sum, {minute: n}]
+ROUTE_HISTORY: dict[tuple[str, str, str], list] = {}
 # Per-run in-memory cache (does not persist to disk); used even when DISABLE_ROUTE_CACHE is true
-SESSION_ROUTE_CACHE: dict[tuple[str, str, str], float] = {}
+SESSION_ROUTE_CACHE = ROUTE_STORE.session
 API_CALL_COUNT = 0
-ROUTE_CACHE_FILE = CONFIG.get("ROUTE_CACHE_FILE", os.path.join(os.path.dirname(__file__), "routes_cache.json"))
+# Lookup statistics (per run)
+CACHE_HIT_COUNT = 0
+CACHE_MISS_COUNT = 0
+ROUTE_CACHE_FILE = CONFIG.get("ROUTE_CACHE_FILE", os.path.join(os.path.dirname(__file__), "routes_cache.bin"))
+# Pre-binary default location, read once if the binary default does not exist yet
+_LEGACY_ROUTE_CACHE_FILE = os.path.join(os.path.dirname(__file__), "routes_cache.json")
 try:
     ROUTE_CACHE_MAX_ENTRIES = int(CONFIG.get("ROUTE_CACHE_MAX_ENTRIES", "50000"))
 except ValueError:
     ROUTE_CACHE_MAX_ENTRIES = 50000
+try:
+    ROUTE_CACHE_MAX_MB = float(CONFIG.get("ROUTE_CACHE_MAX_MB", "0"))  # 0 = no memory budget
+except ValueError:
+    ROUTE_CACHE_MAX_MB = 0.0
 try:
     ROUTE_CACHE_TTL_DAYS = int(CONFIG.get("ROUTE_CACHE_TTL_DAYS", "14"))
 except ValueError:
     ROUTE_CACHE_TTL_DAYS = 14
 ROUTE_CACHE_TTL_SEC = max(0, ROUTE_CACHE_TTL_DAYS) * 24 * 60 * 60
+# Stale-while-revalidate: entries older than the soft TTL are still served, but refetched
+# after the run (at most ROUTE_CACHE_REVALIDATE_MAX_CALLS, within the run budget)
+try:
+    ROUTE_CACHE_SOFT_TTL_DAYS = float(CONFIG.get("ROUTE_CACHE_SOFT_TTL_DAYS", "7"))
+    ROUTE_CACHE_REVALIDATE_MAX_CALLS = max(0, int(CONFIG.get("ROUTE_CACHE_REVALIDATE_MAX_CALLS", "20")))
+except ValueError:
+    ROUTE_CACHE_SOFT_TTL_DAYS, ROUTE_CACHE_REVALIDATE_MAX_CALLS = 7.0, 20
+ROUTE_CACHE_SOFT_TTL_SEC = max(0.0, ROUTE_CACHE_SOFT_TTL_DAYS) * 24 * 60 * 60
+# Adaptive soft TTL: buckets whose refetches change by less than the target keep their
+# entries longer (up to the hard TTL), volatile ones are revalidated sooner (down to a day)
+ROUTE_CACHE_ADAPTIVE_TTL = CONFIG.get("ROUTE_CACHE_ADAPTIVE_TTL", "auto").strip().lower()
+try:
+    ROUTE_CACHE_VOLATILITY_TARGET_PCT = max(0.1, float(CONFIG.get("ROUTE_CACHE_VOLATILITY_TARGET_PCT", "5")))
+except ValueError:
+    ROUTE_CACHE_VOLATILITY_TARGET_PCT = 5.0
+ROUTE_VOLATILITY_MIN_SAMPLES = 2
+ROUTE_VOLATILITY_ALPHA = 0.3  # weight of the newest sample in the moving average
+ROUTE_SOFT_TTL_FLOOR_SEC = min(ROUTE_CACHE_SOFT_TTL_SEC, 24 * 60 * 60)
+_VOLATILITY_FILE_KEY = "__volatility__"
+# Historical downsampling: entries past the hard TTL or evicted by the size limits are
+# rolled up into ROUTE_HISTORY instead of being discarded
+ROUTE_CACHE_HISTORY = CONFIG.get("ROUTE_CACHE_HISTORY", "auto").strip().lower()
+try:
+    ROUTE_CACHE_HISTORY_MAX_BUCKETS = max(0, int(CONFIG.get("ROUTE_CACHE_HISTORY_MAX_BUCKETS", "10000")))
+except ValueError:
+    ROUTE_CACHE_HISTORY_MAX_BUCKETS = 10000
+_HISTORY_FILE_KEY = "__history__"
+
+def _route_cache_expired(ts: float, now: float | None = None) -> bool:
+    """True once an entry is past the hard TTL (ROUTE_CACHE_TTL_DAYS; 0 = never)."""
+    return ROUTE_CACHE_TTL_SEC > 0 and (now if now is not None else time.time()) - ts > ROUTE_CACHE_TTL_SEC
+
+@lru_cache(maxsize=4096)
+def _weekday_of(day_stamp: str) -> int:
+    return datetime.strptime(day_stamp, "%Y-%m-%d").weekday()
+
+def _time_of_week_bucket(key: tuple[str, str, str]) -> tuple[str, str, str]:
+    """Time-of-week bucket of a cache key: same route, "<weekday 0-6> HH:MM"."""
+    stamp = key[2].split("|")[-1]
+    return (key[0], key[1], f"{_weekday_of(stamp[:10])} {stamp[11:16]}")
+
+def _note_volatility(key: tuple[str, str, str], key_time: datetime, dur_min: float) -> None:
+    """Compare a fresh fetch with the value it replaces (or, for a new key, the same
+    route and time a week earlier) and fold the relative change into its bucket."""
+    if ROUTE_CACHE_ADAPTIVE_TTL != "auto" or DISABLE_ROUTE_CACHE:
+        return
+    old = ROUTE_CACHE.get(key)
+    if old is None:
+        week_before = (key_time - timedelta(days=7)).strftime('%Y-%m-%d %H:%M')
+        old = ROUTE_CACHE.get(_canonical_key(key[0], key[1], week_before))
+    if not old:
+        return
+    change = abs(dur_min - old) / old
+    bucket = _time_of_week_bucket(key)
+    stat = ROUTE_VOLATILITY.get(bucket)
+    if stat is None:
+        ROUTE_VOLATILITY[bucket] = [change, 1]
+    else:
+        stat[0] += ROUTE_VOLATILITY_ALPHA * (change - stat[0])
+        stat[1] += 1
+
+def _route_soft_ttl_sec(key: tuple[str, str, str]) -> float:
+    """Soft TTL of an entry: ROUTE_CACHE_SOFT_TTL_DAYS scaled by how far its bucket's
+    volatility is below/above ROUTE_CACHE_VOLATILITY_TARGET_PCT once enough refetches
+    were seen, clamped to [one day, hard TTL]."""
+    base = ROUTE_CACHE_SOFT_TTL_SEC
+    if ROUTE_CACHE_ADAPTIVE_TTL != "auto" or base <= 0:
+        return base
+    stat = ROUTE_VOLATILITY.get(_time_of_week_bucket(key))
+    if stat is None or stat[1] < ROUTE_VOLATILITY_MIN_SAMPLES:
+        return base
+    ttl = base * (ROUTE_CACHE_VOLATILITY_TARGET_PCT / 100) / max(stat[0], 0.001)
+    if ROUTE_CACHE_TTL_SEC > 0:
+        ttl = min(ttl, ROUTE_CACHE_TTL_SEC)
+    return max(ttl, ROUTE_SOFT_TTL_FLOOR_SEC)
+
+def _route_cache_stale(key: tuple[str, str, str], fetched: float) -> bool:
+    """True if an entry is past its soft TTL and should be revalidated."""
+    if ROUTE_CACHE_SOFT_TTL_SEC <= 0:
+        return False
+    age = time.time() - fetched
+    return age > ROUTE_SOFT_TTL_FLOOR_SEC and age > _route_soft_ttl_sec(key)
+
+def _minute_week_bucket(minute: int) -> str:
+    """Time-of-week bucket ("<weekday 0-6> HH:MM") of a RouteStore minute since 1970."""
+    return f"{(_ORDINAL_1970 + minute // 1440 + 6) % 7} {minute % 1440 // 60:02d}:{minute % 60:02d}"
+
+def _roll_up(bucket: tuple[str, str, str], dur_min: float) -> None:
+    """Fold a duration dropped from the cache into its bucket's aggregate."""
+    if ROUTE_CACHE_HISTORY != "auto":
+        return
+    agg = ROUTE_HISTORY.get(bucket)
+    if agg is None:
+        agg = ROUTE_HISTORY[bucket] = [0, 0.0, {}]
+    agg[0] += 1
+    agg[1] += dur_min
+    minute = int(round(dur_min))
+    agg[2][minute] = agg[2].get(minute, 0) + 1
+    METRICS.inc("pendelplaner_cache_rollups")
+
+def _history_percentile(agg: list, q: float) -> float:
+    """q-quantile (0..1) of an aggregate's whole-minute histogram."""
+    rank = q * (agg[0] - 1)
+    seen = 0
+    for minute in sorted(agg[2]):
+        seen += agg[2][minute]
+        if seen > rank:
+            return float(minute)
+    return float(max(agg[2]))
+
+def route_history_summary(bucket: tuple[str, str, str]) -> dict | None:
+    """count, mean and p10/p50/p90 (minutes) of the rolled-up entries of a bucket."""
+    agg = ROUTE_HISTORY.get(bucket)
+    if not agg or not agg[0]:
+        return None
+    return {
+        "count": agg[0],
+        "mean": agg[1] / agg[0],
+        "p10": _history_percentile(agg, 0.1),
+        "p50": _history_percentile(agg, 0.5),
+        "p90": _history_percentile(agg, 0.9),
+    }
+
+def _history_prior(origin_addr: str, destination_addr: str, dt_local: datetime) -> float | None:
+    """Median rolled-up duration for a departure's cache bucket, if history exists.
+    Off while a trace is recorded or replayed (the replay does not load the history)."""
+    if not ROUTE_HISTORY or ROUTES_TRACE is not None:
+        return None
+    key_time = _floor_dt_to_step(dt_local, _cache_bucket_min()).astimezone(TZ)
+    agg = ROUTE_HISTORY.get((origin_addr, destination_addr, f"{key_time.weekday()} {key_time:%H:%M}"))
+    return _history_percentile(agg, 0.5) if agg and agg[0] else None
+
+def _prune_route_history() -> None:
+    """Keep the ROUTE_CACHE_HISTORY_MAX_BUCKETS best-populated buckets."""
+    if len(ROUTE_HISTORY) <= ROUTE_CACHE_HISTORY_MAX_BUCKETS:
+        return
+    ranked = sorted(ROUTE_HISTORY.items(), key=lambda kv: kv[1][0], reverse=True)
+    ROUTE_HISTORY.clear()
+    ROUTE_HISTORY.update(ranked[:ROUTE_CACHE_HISTORY_MAX_BUCKETS])
+
+def _load_history_row(origin: str, destination: str, bucket: str, count, total, hist) -> None:
+    ROUTE_HISTORY[(origin, destination, bucket)] = [int(count), float(total), {int(m): int(n) for m, n in hist}]
 
 def _serialize_cache_key(t: tuple[str, str, str]) -> str:
     return "\u241f".join(t)  # use unit separator-like char to avoid collisions
@@ -1118,24 +2615,186 @@ def _canonical_key(origin_addr: str, destination_addr: str, stamp: str) -> tuple
 def _budget_soft_limit_reached() -> bool:
     try:
         threshold = int(MAX_API_CALLS_PER_RUN * max(0.1, min(1.0, BUDGET_SOFT_PCT)))
+        if BUDGET_ALLOCATOR is not None and BUDGET_ALLOCATOR.soft_limit_reached():
+            return True
         return API_CALL_COUNT >= threshold
     except Exception:
         return False
 
+def _resolution_level() -> int:
+    """Degradation level for the next lookup/scan: the planned level, or the coarsest one
+    once the soft budget limit is reached (so the remaining work still gets covered)."""
+    if BUDGET_DEGRADATION == "auto" and _budget_soft_limit_reached():
+        return len(RESOLUTION_LEVELS) - 1
+    return RESOLUTION_LEVEL
+
+def _scan_step(base_minutes: int) -> int:
+    """Scan step for the remaining work: base_minutes widened by the degradation level."""
+    level = _resolution_level()
+    day = _current_phase()[1]
+    if level > RESOLUTION_BY_DAY.get(day, 0):
+        RESOLUTION_BY_DAY[day] = level
+    return int(base_minutes) * RESOLUTION_LEVELS[level][0]
+
+def _cache_bucket_min() -> int:
+    return max(ROUTE_CACHE_GRANULARITY_MIN, RESOLUTION_LEVELS[_resolution_level()][1])
+
+def _probe_window_min() -> int:
+    return max(ROUTE_CACHE_PROBE_WINDOW_MIN, RESOLUTION_LEVELS[_resolution_level()][2])
+
+def resolution_info(level: int) -> dict:
+    """Effective resolution of a degradation level in minutes (for reports)."""
+    factor, bucket, probe = RESOLUTION_LEVELS[level]
+    return {
+        "level": level,
+        "scan_step_min": max(1, STEP_MINUTES) * factor,
+        "cache_bucket_min": max(ROUTE_CACHE_GRANULARITY_MIN, bucket),
+        "probe_window_min": max(5, min(30, max(ROUTE_CACHE_PROBE_WINDOW_MIN, probe))),
+    }
+
+# Binary cache file: magic, version, length of the compressed directory, the directory
+# (zlib JSON: string table, per route/zone block entry count, offset and length, volatility
+# stats), then one zlib block per route and time zone with its entries sorted by minute.
+_ROUTE_FILE_MAGIC = b"PPRC"
+ROUTE_FILE_VERSION = 1
+_ROUTE_FILE_HEADER = struct.Struct("<4sHI")
+
+def _le(a: array) -> array:
+    """Array in little-endian byte order (the file format), copied on big-endian hosts."""
+    if sys.byteorder == "big":
+        a = array(a.typecode, a)
+        a.byteswap()
+    return a
+
+def _pack_route_block(minutes: array, durations: array, fetched: array) -> bytes:
+    """Delta-coded minutes, durations (whole seconds when exact, else float64) and fetch times."""
+    deltas = array("I", [minutes[0]] + [b - a for a, b in zip(minutes, minutes[1:])])
+    seconds = array("I", [round(d * 60) if 0 <= d < 0x4000000 else 0 for d in durations])
+    exact = all(sec / 60.0 == d for sec, d in zip(seconds, durations))
+    parts = (deltas, seconds if exact else durations, fetched)
+    return zlib.compress(bytes([1 if exact else 0]) + b"".join(_le(a).tobytes() for a in parts), 6)
+
+def _unpack_route_block(raw: bytes, count: int) -> tuple[list[int], list[float], array]:
+    data = zlib.decompress(raw)
+    exact = data[:1] == b"\x01"
+    if len(data) != 1 + count * (12 if exact else 16):
+        raise ValueError(f"block of {len(data)} bytes does not hold {count} entries")
+    columns, pos = [], 1
+    for typecode in ("I", "I" if exact else "d", "I"):
+        col = array(typecode)
+        end = pos + col.itemsize * count
+        col.frombytes(data[pos:end])
+        columns.append(_le(col))
+        pos = end
+    deltas, durations, fetched = columns
+    minutes = list(accumulate(deltas))
+    return minutes, [sec / 60.0 for sec in durations] if exact else list(durations), fetched
+
+def _load_route_cache_binary(path: str) -> None:
+    with open(path, "rb") as f:
+        source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, dir_len = _ROUTE_FILE_HEADER.unpack_from(source, 0)
+    if version != ROUTE_FILE_VERSION:
+        source.close()
+        raise ValueError(f"unsupported route cache version {version}")
+    directory = json.loads(zlib.decompress(source[_ROUTE_FILE_HEADER.size:_ROUTE_FILE_HEADER.size + dir_len]))
+    strings = directory["strings"]
+    base = _ROUTE_FILE_HEADER.size + dir_len
+    blocks: dict[tuple[str, str], list[tuple[str, int, int, int]]] = {}
+    for o, d, z, count, offset, length in directory["blocks"]:
+        blocks.setdefault((strings[o], strings[d]), []).append((strings[z], count, base + offset, length))
+    for o, d, bucket, mean, n in directory.get("volatility", []):
+        ROUTE_VOLATILITY[(strings[o], strings[d], bucket)] = [float(mean), int(n)]
+    for o, d, bucket, *agg in directory.get("history", []):
+        _load_history_row(strings[o], strings[d], bucket, *agg)
+    ROUTE_STORE.attach(source, blocks)
+    logger.info("Loaded route cache: %d routes (%d entries, decoded on first use) from %s",
+                len(blocks), ROUTE_STORE.pending, path)
+
+def _save_route_cache_binary(path: str) -> int:
+    strings: dict[str, int] = {}
+    def sid(text: str) -> int:
+        return strings.setdefault(text, len(strings))
+    entries = []
+    payload: list[bytes] = []
+    offset = 0
+    written = 0
+    for origin, destination, zone, *block in ROUTE_STORE.route_blocks():
+        if len(block) == 2:
+            count, raw = block
+        else:
+            count, raw = len(block[0]), _pack_route_block(*block)
+        entries.append([sid(origin), sid(destination), sid(zone or _tz_name()), count, offset, len(raw)])
+        payload.append(raw)
+        offset += len(raw)
+        written += count
+    volatility = [[sid(o), sid(d), bucket, stat[0], stat[1]] for (o, d, bucket), stat in ROUTE_VOLATILITY.items()]
+    history = [[sid(o), sid(d), bucket, agg[0], agg[1], sorted(agg[2].items())]
+               for (o, d, bucket), agg in ROUTE_HISTORY.items()]
+    directory = zlib.compress(json.dumps(
+        {"strings": list(strings), "blocks": entries, "volatility": volatility, "history": history}, ensure_ascii=False
+    ).encode("utf-8"), 6)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_ROUTE_FILE_HEADER.pack(_ROUTE_FILE_MAGIC, ROUTE_FILE_VERSION, len(directory)))
+        f.write(directory)
+        for raw in payload:
+            f.write(raw)
+    # Undecoded routes now live in the new file: remap them before replacing the old one
+    base = _ROUTE_FILE_HEADER.size + len(directory)
+    names = list(strings)
+    lazy: dict[tuple[str, str], list[tuple[str, int, int, int]]] = {}
+    for o, d, z, count, off, length in entries:
+        route = (names[o], names[d])
+        if route in ROUTE_STORE._lazy:
+            lazy.setdefault(route, []).append((names[z], count, base + off, length))
+    ROUTE_STORE.detach()
+    os.replace(tmp, path)
+    if lazy:
+        with open(path, "rb") as f:
+            ROUTE_STORE.attach(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), lazy)
+    return written
+
+def _is_binary_route_cache(path: str) -> bool:
+    with open(path, "rb") as f:
+        return f.read(len(_ROUTE_FILE_MAGIC)) == _ROUTE_FILE_MAGIC
+
 def load_route_cache() -> None:
+    """Load the persistent route cache: the binary format (routes decoded lazily) or the
+    older JSON format, which is also what ROUTE_CACHE_FILE=*.json keeps writing."""
+    path = ROUTE_CACHE_FILE
+    if not os.path.exists(path) and "ROUTE_CACHE_FILE" not in CONFIG:
+        path = _LEGACY_ROUTE_CACHE_FILE
     try:
-        if not os.path.exists(ROUTE_CACHE_FILE):
+        if not os.path.exists(path):
+            return
+        if _is_binary_route_cache(path):
+            _load_route_cache_binary(path)
             return
-        with open(ROUTE_CACHE_FILE, "r", encoding="utf-8") as f:
+        with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
         entries = 0
         deduped = 0
+        expired = 0
+        now = time.time()
+        for k, stat in data.pop(_VOLATILITY_FILE_KEY, {}).items():
+            bucket = _deserialize_cache_key(k)
+            if bucket:
+                ROUTE_VOLATILITY[bucket] = [float(stat[0]), int(stat[1])]
+        for k, agg in data.pop(_HISTORY_FILE_KEY, {}).items():
+            bucket = _deserialize_cache_key(k)
+            if bucket:
+                _load_history_row(*bucket, *agg)
         for k, v in data.items():
             key = _deserialize_cache_key(k)
             if not key:
                 continue
             dur = float(v.get("dur"))
             ts = float(v.get("ts", 0))
+            if _route_cache_expired(ts, now):
+                expired += 1
+                _roll_up(_time_of_week_bucket(key), dur)
+                continue
             # Promote legacy keys to canonical form to avoid duplicates
             origin, dest, stamp = key
             canonical = _canonical_key(origin, dest, stamp)
@@ -1147,21 +2806,35 @@ def load_route_cache() -> None:
             ROUTE_CACHE[canonical] = dur
             ROUTE_CACHE_TS[canonical] = ts
             entries += 1
-        logger.info("Loaded route cache: %d entries (deduped %d) from %s", entries, deduped, ROUTE_CACHE_FILE)
+        logger.info("Loaded route cache: %d entries (deduped %d, expired %d) from %s", entries, deduped, expired, path)
     except Exception as e:
-        logger.warning("Could not load route cache %s: %s", ROUTE_CACHE_FILE, e)
+        logger.warning("Could not load route cache %s: %s", path, e)
 
 def save_route_cache() -> None:
     try:
-        # prune if needed
-        if len(ROUTE_CACHE_TS) > ROUTE_CACHE_MAX_ENTRIES:
+        # prune if needed: entry limit, and the memory budget at the store's measured bytes per entry
+        max_entries = ROUTE_CACHE_MAX_ENTRIES
+        if ROUTE_CACHE_MAX_MB > 0 and len(ROUTE_STORE):
+            per_entry = ROUTE_STORE.memory_bytes() / len(ROUTE_STORE)
+            max_entries = min(max_entries, int(ROUTE_CACHE_MAX_MB * 1024 * 1024 / per_entry))
+        if len(ROUTE_CACHE_TS) > max_entries:
             # keep most recent
             items = sorted(ROUTE_CACHE_TS.items(), key=lambda kv: kv[1], reverse=True)
-            keep = set(k for k, _ in items[:ROUTE_CACHE_MAX_ENTRIES])
+            keep = set(k for k, _ in items[:max_entries])
+            evicted = 0
             for k in list(ROUTE_CACHE.keys()):
                 if k not in keep:
+                    _roll_up(_time_of_week_bucket(k), ROUTE_CACHE[k])
                     ROUTE_CACHE.pop(k, None)
                     ROUTE_CACHE_TS.pop(k, None)
+                    evicted += 1
+            METRICS.inc("pendelplaner_cache_evictions", evicted)
+        _prune_route_history()
+        ROUTE_STORE.compact()
+        if not ROUTE_CACHE_FILE.lower().endswith(".json"):
+            written = _save_route_cache_binary(ROUTE_CACHE_FILE)
+            logger.info("Saved route cache: %d entries to %s", written, ROUTE_CACHE_FILE)
+            return
         # write
         out: dict[str, dict] = {}
         for k, dur in ROUTE_CACHE.items():
@@ -1169,6 +2842,12 @@ def save_route_cache() -> None:
             origin, dest, stamp = k
             k_can = _canonical_key(origin, dest, stamp)
             out[_serialize_cache_key(k_can)] = {"dur": float(dur), "ts": float(ROUTE_CACHE_TS.get(k, time.time()))}
+        if ROUTE_VOLATILITY:
+            out[_VOLATILITY_FILE_KEY] = {_serialize_cache_key(b): stat for b, stat in ROUTE_VOLATILITY.items()}
+        if ROUTE_HISTORY:
+            out[_HISTORY_FILE_KEY] = {
+                _serialize_cache_key(b): [agg[0], agg[1], sorted(agg[2].items())] for b, agg in ROUTE_HISTORY.items()
+            }
         tmp = ROUTE_CACHE_FILE + ".tmp"
         with open(tmp, "w", encoding="utf-8") as f:
             json.dump(out, f, ensure_ascii=False)
@@ -1180,6 +2859,155 @@ def save_route_cache() -> None:
 load_route_cache()
 atexit.register(save_route_cache)
 
+# ---------------- Record/replay of Routes API traffic ----------------
+# Pinned "now" (replay reproduces the recorded run's clock); None = wall clock
+CLOCK_OVERRIDE: datetime | None = None
+# Active trace (--record/--replay); None = plain live requests
+ROUTES_TRACE: "RoutesTrace | None" = None
+ROUTES_TRACE_VERSION = 2
+
+def _now_local() -> datetime:
+    """Current local time; pinned to the recorded clock while replaying."""
+    if CLOCK_OVERRIDE is not None:
+        return CLOCK_OVERRIDE.astimezone(TZ)
+    return datetime.now(TZ)
+
+class ReplayMissError(BaseException):
+    """A request was not found in the replay trace.
+    Derives from BaseException on purpose: the scanners treat any Exception as a failed
+    slot and carry on, but a replay that silently diverges from the recording is useless.
+    """
+
+class _ReplayResponse:
+    def __init__(self, status_code: int, payload: dict | None, text: str):
+        self.status_code = status_code
+        self._payload = payload
+        self.text = text
+
+    def json(self) -> dict:
+        return self._payload if self._payload is not None else json.loads(self.text)
+
+class RoutesTrace:
+    """JSON-lines trace of Routes API traffic.
+
+    Line 1 is a header (version, recorded clock, TZ). Then one line per request:
+    {"type": "request", "url", "body", "status", "response"|"text", "elapsed_ms"}, and
+    {"type": "cache", "key", "dur"} for persistent-cache values the run relied on instead.
+    Request headers (API key) are never written.
+    """
+    def __init__(self, path: str, mode: str):
+        assert mode in {"record", "replay"}
+        self.path = path
+        self.mode = mode
+        self.responses: dict[str, list[dict]] = {}
+        self.cache_entries: dict[tuple[str, str, str], float] = {}
+        self.served = 0
+        self.header: dict = {}
+        self._fh = None
+        if mode == "record":
+            self.header = {"type": "header", "version": ROUTES_TRACE_VERSION, "now": datetime.now(TZ).isoformat(), "tz": _tz_name()}
+            self._fh = open(path, "w", encoding="utf-8")
+            self._write(self.header)
+        else:
+            self._load()
+
+    @staticmethod
+    def _request_key(url: str, body: dict) -> str:
+        return url + " " + json.dumps(body, sort_keys=True, ensure_ascii=False)
+
+    def _write(self, obj: dict) -> None:
+        self._fh.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        self._fh.flush()
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                obj = json.loads(line)
+                kind = obj.get("type")
+                if kind == "header":
+                    if int(obj.get("version", 0)) != ROUTES_TRACE_VERSION:
+                        raise RuntimeError(f"Trace {self.path}: unbekannte Version {obj.get('version')}")
+                    self.header = obj
+                elif kind == "request":
+                    self.responses.setdefault(self._request_key(obj["url"], obj["body"]), []).append(obj)
+                elif kind == "cache":
+                    key = _deserialize_cache_key(obj["key"])
+                    if key:
+                        self.cache_entries[key] = float(obj["dur"])
+                else:
+                    raise RuntimeError(f"Trace {self.path}:{line_no}: unbekannter Eintrag {kind!r}")
+        logger.info("Replay trace loaded: %d requests, %d cache entries from %s",
+                    sum(len(v) for v in self.responses.values()), len(self.cache_entries), self.path)
+
+    def record_request(self, url: str, body: dict, resp, elapsed_s: float) -> None:
+        entry = {"type": "request", "url": url, "body": body, "status": resp.status_code, "elapsed_ms": round(elapsed_s * 1000.0, 1)}
+        try:
+            entry["response"] = resp.json()
+        except Exception:
+            entry["text"] = resp.text
+        self._write(entry)
+
+    def record_cache_hit(self, key: tuple[str, str, str], dur: float) -> None:
+        if key not in self.cache_entries:
+            self.cache_entries[key] = dur
+            self._write({"type": "cache", "key": _serialize_cache_key(key), "dur": dur})
+
+    def replay(self, url: str, body: dict) -> _ReplayResponse:
+        queue = self.responses.get(self._request_key(url, body))
+        if not queue:
+            raise ReplayMissError(
+                f"Request nicht im Replay-Trace {self.path}: {body.get('origin') or body.get('origins')} -> {body.get('destination') or body.get('destinations')} "
+                f"um {body.get('departureTime')}"
+            )
+        # Identical repeated requests are served in recorded order; the last one sticks
+        entry = queue.pop(0) if len(queue) > 1 else queue[0]
+        self.served += 1
+        return _ReplayResponse(int(entry.get("status", 200)), entry.get("response"), entry.get("text") or json.dumps(entry.get("response")))
+
+    def close(self) -> None:
+        if self._fh:
+            self._fh.close()
+            self._fh = None
+
+def _routes_post(url: str, headers: dict, body: dict):
+    """Single choke point for Routes API HTTP calls (live, recorded or replayed)."""
+    if ROUTES_TRACE is not None and ROUTES_TRACE.mode == "replay":
+        return ROUTES_TRACE.replay(url, body)
+    t0 = time.perf_counter()
+    resp = requests.post(url, headers=headers, json=body, timeout=20)
+    if ROUTES_TRACE is not None:
+        ROUTES_TRACE.record_request(url, body, resp, time.perf_counter() - t0)
+    return resp
+
+def start_routes_trace(path: str, mode: str) -> RoutesTrace:
+    """Activate --record/--replay. Replay pins the clock to the recording and serves
+    persistent-cache values from the trace instead of the local cache file (which is
+    neither read nor written), so the run is reproduced exactly and offline.
+    """
+    global ROUTES_TRACE, CLOCK_OVERRIDE
+    trace = RoutesTrace(path, mode)
+    ROUTES_TRACE = trace
+    if mode == "replay":
+        if trace.header.get("now"):
+            CLOCK_OVERRIDE = datetime.fromisoformat(trace.header["now"])
+        atexit.unregister(save_route_cache)
+        ROUTE_CACHE.clear()
+        ROUTE_CACHE_TS.clear()
+        SESSION_ROUTE_CACHE.clear()
+        ROUTE_HISTORY.clear()
+        reset_duration_curves()
+        # Persistent tier only: these entries existed when the recording started, while
+        # session values appear as their requests are replayed (seeding them up front
+        # lets neighbour probes find buckets the recording only fetched later)
+        for key, dur in trace.cache_entries.items():
+            ROUTE_CACHE[key] = dur
+            ROUTE_CACHE_TS[key] = time.time()
+    return trace
+
+
 def to_rfc3339_local(dt_local: datetime) -> str:
     """Datetime mit lokaler TZ in RFC3339 (mit Offset) für departureTime."""
     if dt_local.tzinfo is None:
@@ -1187,9 +3015,8 @@ def to_rfc3339_local(dt_local: datetime) -> str:
     return dt_local.isoformat()
 
 def _floor_dt_to_step(dt_local: datetime, step_min: int) -> datetime:
-    base = dt_local.astimezone(TZ)
-    minute = (base.minute // step_min) * step_min
-    return base.replace(minute=minute, second=0, microsecond=0)
+    tl = _day_timeline(dt_local)
+    return tl.at(_floor_minute_to_step(tl.minute_floor(dt_local), step_min))
 
 def _tz_name() -> str:
     try:
@@ -1204,33 +3031,135 @@ def _canonical_key(origin_addr: str, destination_addr: str, stamp: str) -> tuple
     third = stamp if ("|" in stamp) else f"{tz}|{stamp}"
     return (origin_addr, destination_addr, third)
 
+@lru_cache(maxsize=None)
+def _probe_offsets(window: int) -> tuple[int, ...]:
+    offsets = [0]
+    for off in range(5, window + 1, 5):
+        offsets.extend([-off, off])
+    return tuple(offsets)
+
 def _candidate_cache_keys(origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> list[tuple[str, str, str]]:
     """Generate candidate cache keys for a given request, tolerant to env changes.
     Keys include a TZ-qualified form and a legacy form without TZ to maximize reuse.
     Also probes nearby bucket times within a small window to survive granularity tweaks.
     """
     tz_name = _tz_name()
-    base_time = _floor_dt_to_step(departure_dt_local, ROUTE_CACHE_GRANULARITY_MIN)
+    tl = _day_timeline(departure_dt_local)
+    base_minute = _floor_minute_to_step(tl.minute_floor(departure_dt_local), _cache_bucket_min())
     # Probe window derived from env (e.g., 5..15) in 5-minute steps
-    window = max(5, min(30, ROUTE_CACHE_PROBE_WINDOW_MIN))
-    offsets = [0]
-    for off in range(5, window + 1, 5):
-        offsets.extend([-off, off])
+    window = max(5, min(30, _probe_window_min()))
     candidates: list[tuple[str, str, str]] = []
-    for off in offsets:
-        t = base_time + timedelta(minutes=off)
-        stamp = t.strftime("%Y-%m-%d %H:%M")
+    for off in _probe_offsets(window):
+        stamp = tl.stamp(base_minute + off)
         # New-format key includes TZ to avoid cross-TZ collisions
         candidates.append((origin_addr, destination_addr, f"{tz_name}|{stamp}"))
         # Legacy key (pre-v2) without TZ for backward reuse
         candidates.append((origin_addr, destination_addr, stamp))
     return candidates
 
-def _parse_int_list(csv: str) -> list[int]:
-    out: list[int] = []
-    for part in (csv or "").split(","):
-        p = part.strip()
-        if not p:
+def _route_cache_lookup(origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> float | None:
+    """Return a cached duration for the request or None.
+    Checks the session cache first (always on), then the persistent cache if allowed;
+    persistent hits are promoted to the canonical key for faster next hits.
+    """
+    global CACHE_HIT_COUNT, CACHE_MISS_COUNT
+    tl = _day_timeline(departure_dt_local)
+    bucket_minute = _floor_minute_to_step(tl.minute_floor(departure_dt_local), _cache_bucket_min())
+    key_time = tl.at(bucket_minute)
+    exact_stamp = tl.stamp(bucket_minute)
+    canonical_key = _canonical_key(origin_addr, destination_addr, exact_stamp)
+    for k in _candidate_cache_keys(origin_addr, destination_addr, departure_dt_local):
+        if _DEP_RECORDERS:
+            _note_dep(k)
+        # One index probe per candidate for both tiers (NaN != NaN marks an absent tier)
+        session_dur, dur, fetched = ROUTE_STORE.entry(k)
+        if session_dur == session_dur:
+            # Not traced: the replay gets this run's own values from their recorded requests
+            if DRY_RUN is not None:
+                DRY_RUN.note_hit(k, canonical_key)
+            CACHE_HIT_COUNT += 1
+            _record_route_event("hit", origin_addr, destination_addr, key_time, tier=_hit_tier(k, exact_stamp, "session"))
+            return session_dur
+        if (not DISABLE_ROUTE_CACHE) and dur == dur:
+            if _route_cache_expired(fetched):
+                continue
+            if _route_cache_stale(k, fetched):
+                _queue_revalidation(k)
+            if DRY_RUN is not None:
+                DRY_RUN.note_hit(k, canonical_key)
+            if ROUTES_TRACE is not None and ROUTES_TRACE.mode == "record":
+                ROUTES_TRACE.record_cache_hit(k, dur)
+            ROUTE_CACHE[canonical_key] = dur
+            ROUTE_CACHE_TS[canonical_key] = fetched
+            SESSION_ROUTE_CACHE[canonical_key] = dur
+            CACHE_HIT_COUNT += 1
+            _record_route_event("hit", origin_addr, destination_addr, key_time, tier=_hit_tier(k, exact_stamp, "persistent"))
+            return dur
+    CACHE_MISS_COUNT += 1
+    _record_route_event("miss", origin_addr, destination_addr, key_time)
+    return None
+
+def _route_cache_peek(origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> float | None:
+    """Cached duration for scheduling decisions; unlike _route_cache_lookup it does not
+    count or promote the lookup. Persistent-cache peeks are still traced: they steer which
+    slots get fetched, so a replay needs them to schedule the same lookups."""
+    for k in _candidate_cache_keys(origin_addr, destination_addr, departure_dt_local):
+        if _DEP_RECORDERS:
+            _note_dep(k)
+        session_dur, dur, fetched = ROUTE_STORE.entry(k)
+        if session_dur == session_dur:
+            return session_dur
+        if (not DISABLE_ROUTE_CACHE) and dur == dur:
+            if _route_cache_expired(fetched):
+                continue
+            if ROUTES_TRACE is not None and ROUTES_TRACE.mode == "record":
+                ROUTES_TRACE.record_cache_hit(k, dur)
+            return dur
+    return None
+
+def _hit_tier(key: tuple[str, str, str], exact_stamp: str, tier: str) -> str:
+    """Classify a cache hit: 'session'/'persistent' for the exact bucket, 'neighbour' if a
+    nearby bucket from the probe window answered."""
+    return tier if key[2].split("|")[-1] == exact_stamp else "neighbour"
+
+def _route_cache_store(origin_addr: str, destination_addr: str, key_time: datetime, dur_min: float,
+                       persist: bool = True) -> None:
+    """Store a freshly fetched duration under the canonical key of its bucket time
+    (persist=False: this run only, for estimates that are not traffic data)."""
+    global _ROUTE_STORE_SEQ
+    _ROUTE_STORE_SEQ += 1
+    canonical_key = _canonical_key(origin_addr, destination_addr, key_time.strftime('%Y-%m-%d %H:%M'))
+    if _DEP_RECORDERS:
+        _note_dep(canonical_key)
+    SESSION_ROUTE_CACHE[canonical_key] = dur_min
+    if ROUTE_LOWER_BOUND == "on":
+        # Every observation clamps the route's bound for the rest of the pass
+        low = _route_min_on_record((origin_addr, destination_addr))
+        _ROUTE_MIN_ON_RECORD[(origin_addr, destination_addr)] = dur_min if low is None else min(low, dur_min)
+    if not persist:
+        return
+    _REVALIDATE_QUEUE.pop(canonical_key, None)
+    _note_volatility(canonical_key, key_time, dur_min)
+    if not DISABLE_ROUTE_CACHE:
+        ROUTE_CACHE[canonical_key] = dur_min
+        ROUTE_CACHE_TS[canonical_key] = time.time()
+
+def _check_api_budget() -> None:
+    if API_CALL_COUNT >= MAX_API_CALLS_PER_RUN:
+        _plan_deps_incomplete()
+        raise BudgetExhaustedError(
+            f"API call budget exceeded ({MAX_API_CALLS_PER_RUN}). Increase MAX_API_CALLS_PER_RUN or widen cache granularity."
+        )
+    if BUDGET_ALLOCATOR is not None and not BUDGET_ALLOCATOR.try_charge():
+        _plan_deps_incomplete()
+        phase, day = _current_phase()
+        raise RuntimeError(f"API call allotment exhausted for {day or 'run'} / {phase or 'other'} (budget allocation).")
+
+def _parse_int_list(csv: str) -> list[int]:
+    out: list[int] = []
+    for part in (csv or "").split(","):
+        p = part.strip()
+        if not p:
             continue
         try:
             out.append(int(p))
@@ -1238,63 +3167,335 @@ def _parse_int_list(csv: str) -> list[int]:
             continue
     return out
 
+# ---------------- Day timeline (integer wall-clock minutes) ----------------
+
+_US_PER_MIN = 60_000_000
+
+@lru_cache(maxsize=None)
+def _hhmm_minutes(hhmm: str) -> int:
+    """Parse "HH:MM" once into minutes since midnight."""
+    h, m = map(int, hhmm.split(":"))
+    return h * 60 + m
+
+class DayTimeline:
+    """One local day as integer wall-clock minutes since local midnight.
+
+    Scanners work on minute offsets and only materialize datetimes for route lookups and
+    output. Minutes follow the wall clock like aware datetime arithmetic in one zone does
+    (a 23h/25h DST day keeps 1440 slots); utc_offsets records the offsets at start and end
+    of the day, which differ on transition days. Limits and the late penalty depend on the
+    active config and are precomputed per config snapshot (see limits()).
+    """
+    def __init__(self, day_local: datetime):
+        local = day_local.astimezone(TZ)
+        self.midnight = local.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.date_str = self.midnight.strftime("%Y-%m-%d")
+        self.weekday = self.midnight.weekday()
+        self.utc_offsets = (self.midnight.utcoffset(), self.midnight.replace(hour=23, minute=59).utcoffset())
+        self._stamps: dict[int, str] = {}
+        self._limits: dict[tuple, dict] = {}
+
+    def offset_us(self, dt: datetime) -> int:
+        """Wall-clock microseconds since this day's midnight (negative/beyond a day allowed)."""
+        td = (dt if dt.tzinfo is TZ else dt.astimezone(TZ)) - self.midnight
+        return (td.days * 86400 + td.seconds) * 1_000_000 + td.microseconds
+
+    def minute(self, dt: datetime) -> float:
+        return self.offset_us(dt) / _US_PER_MIN
+
+    def minute_floor(self, dt: datetime) -> int:
+        return self.offset_us(dt) // _US_PER_MIN
+
+    def minute_ceil(self, dt: datetime) -> int:
+        return -(-self.offset_us(dt) // _US_PER_MIN)
+
+    def at(self, minute: float) -> datetime:
+        return self.midnight + timedelta(minutes=minute)
+
+    def stamp(self, minute: int) -> str:
+        """Cache-key stamp "YYYY-mm-dd HH:MM" for a minute of this day."""
+        s = self._stamps.get(minute)
+        if s is None:
+            if 0 <= minute < 1440:
+                s = f"{self.date_str} {minute // 60:02d}:{minute % 60:02d}"
+            else:
+                s = self.at(minute).strftime("%Y-%m-%d %H:%M")
+            self._stamps[minute] = s
+        return s
+
+    def limits(self) -> dict:
+        """Latest leave minute, rush window and per-minute late penalty for the active config."""
+        key = (
+            EXTEND_LATEST_LOCAL, MAX_LEAVE_TIME_LOCAL, FRIDAY_EARLY_CUTOFF_LOCAL,
+            LATE_PENALTY_START_LOCAL, LATE_PENALTY_PER_15_MIN, RUSH_WINDOW_START_LOCAL, RUSH_WINDOW_END_LOCAL,
+        )
+        lim = self._limits.get(key)
+        if lim is not None:
+            return lim
+        latest = _hhmm_minutes(EXTEND_LATEST_LOCAL)
+        cutoffs = [MAX_LEAVE_TIME_LOCAL] + ([FRIDAY_EARLY_CUTOFF_LOCAL] if self.weekday == 4 else [])
+        for hhmm in cutoffs:
+            if not hhmm:
+                continue
+            try:
+                latest = min(latest, _hhmm_minutes(hhmm))
+            except Exception:
+                pass
+        try:
+            rush = (_hhmm_minutes(RUSH_WINDOW_START_LOCAL), _hhmm_minutes(RUSH_WINDOW_END_LOCAL))
+        except Exception:
+            rush = None
+        try:
+            penalty_start = _hhmm_minutes(LATE_PENALTY_START_LOCAL)
+        except Exception:
+            penalty_start = None
+        per_15 = max(0, int(LATE_PENALTY_PER_15_MIN))
+        # penalty[m]: penalty for leaving in minute m (ceil), up to the end of the next day
+        penalty = [0] * (2 * 1440)
+        if penalty_start is not None and per_15:
+            for m in range(penalty_start + 1, len(penalty)):
+                penalty[m] = -(-(m - penalty_start) // 15) * per_15
+        lim = {"latest_leave": latest, "rush": rush, "penalty": penalty, "penalty_start": penalty_start, "per_15": per_15}
+        self._limits[key] = lim
+        return lim
+
+    def late_penalty(self, minute_ceil: int) -> int:
+        lim = self.limits()
+        if lim["penalty_start"] is None or minute_ceil <= lim["penalty_start"]:
+            return 0
+        if minute_ceil < len(lim["penalty"]):
+            return lim["penalty"][minute_ceil]
+        return -(-(minute_ceil - lim["penalty_start"]) // 15) * lim["per_15"]
+
+_TIMELINES: dict[tuple, DayTimeline] = {}
+
+def _day_timeline(dt_local: datetime) -> DayTimeline:
+    """Timeline of the local day containing dt_local (cached per date and zone)."""
+    local = dt_local if dt_local.tzinfo is TZ else dt_local.astimezone(TZ)
+    key = (local.year, local.month, local.day, TZ)
+    tl = _TIMELINES.get(key)
+    if tl is None:
+        if len(_TIMELINES) > 256:
+            _TIMELINES.clear()
+        tl = DayTimeline(local)
+        _TIMELINES[key] = tl
+    return tl
+
+def _floor_minute_to_step(minute: int, step_min: int) -> int:
+    """Floor a wall minute to the step within its hour (same rule as _floor_dt_to_step)."""
+    return minute - (minute % 60) % step_min
+
 def _is_in_rush_window(dt_local: datetime) -> bool:
     try:
-        h1, m1 = map(int, RUSH_WINDOW_START_LOCAL.split(":"))
-        h2, m2 = map(int, RUSH_WINDOW_END_LOCAL.split(":"))
-        t = dt_local.astimezone(TZ)
-        start = t.replace(hour=h1, minute=m1, second=0, microsecond=0)
-        end = t.replace(hour=h2, minute=m2, second=0, microsecond=0)
-        return start <= t <= end
+        tl = _day_timeline(dt_local)
+        rush = tl.limits()["rush"]
+        if rush is None:
+            return False
+        return rush[0] * _US_PER_MIN <= tl.offset_us(dt_local) <= rush[1] * _US_PER_MIN
     except Exception:
         return False
 
 def _dt_with_time_local(base_dt: datetime, hhmm: str) -> datetime:
-    h, m = map(int, hhmm.split(":"))
-    return base_dt.astimezone(TZ).replace(hour=h, minute=m, second=0, microsecond=0)
+    return _day_timeline(base_dt).at(_hhmm_minutes(hhmm))
 
 def _latest_allowed_leave_for_day(baseline_departure: datetime) -> datetime:
     """Compute the latest allowed leave time for the given day, considering:
     - EXTEND_LATEST_LOCAL
     - MAX_LEAVE_TIME_LOCAL (if set)
     - FRIDAY_EARLY_CUTOFF_LOCAL (if Friday and set)
-    Returns a datetime in TZ.
+    Returns a datetime in TZ (precomputed per day, see DayTimeline.limits).
     """
-    local = baseline_departure.astimezone(TZ)
-    # Hard latest from extension config
-    h_latest, m_latest = map(int, EXTEND_LATEST_LOCAL.split(":"))
-    limit = local.replace(hour=h_latest, minute=m_latest, second=0, microsecond=0)
-    # Daily max leave if set
-    if MAX_LEAVE_TIME_LOCAL:
-        try:
-            t = _dt_with_time_local(local, MAX_LEAVE_TIME_LOCAL)
-            if t < limit:
-                limit = t
-        except Exception:
-            pass
-    # Friday early cutoff
-    if local.weekday() == 4 and FRIDAY_EARLY_CUTOFF_LOCAL:
-        try:
-            t = _dt_with_time_local(local, FRIDAY_EARLY_CUTOFF_LOCAL)
-            if t < limit:
-                limit = t
-        except Exception:
-            pass
-    return limit
+    tl = _day_timeline(baseline_departure)
+    return tl.at(tl.limits()["latest_leave"])
 
 def _late_penalty_minutes(departure_dt: datetime) -> int:
     """Return penalty in 'minutes-equivalent' for leaving late.
     For every 15 minutes after LATE_PENALTY_START_LOCAL, apply LATE_PENALTY_PER_15_MIN.
     """
-    try:
-        start = _dt_with_time_local(departure_dt, LATE_PENALTY_START_LOCAL)
-    except Exception:
-        return 0
-    if departure_dt <= start:
-        return 0
-    delta_min = max(0, int(math.ceil((departure_dt - start).total_seconds() / 60.0)))
-    steps = int(math.ceil(delta_min / 15.0))
-    return steps * max(0, int(LATE_PENALTY_PER_15_MIN))
+    tl = _day_timeline(departure_dt)
+    return tl.late_penalty(tl.minute_ceil(departure_dt))
+
+# ---------------- Duration curves (per route and local day) ----------------
+
+CURVE_MISSING, CURVE_FETCHED, CURVE_BORROWED = 0, 1, 2
+
+# Bumped whenever a key is added to the session cache, which can change what a
+# neighbour lookup resolves to (see DurationCurve)
+_ROUTE_STORE_SEQ = 0
+
+class DurationCurve:
+    """Drive durations of one route over one local day on the cache-key minute grid.
+
+    values holds the duration per key minute (nan where unknown) and state marks each
+    point as fetched, borrowed or missing; interpolated estimates stay local to
+    scan_min_duration. A point is fetched once its canonical key is in the session cache,
+    so reading it again returns exactly what a cache lookup would. A point whose lookup
+    was answered by a neighbouring bucket is borrowed: valid until the next session-cache
+    store (a closer neighbour may appear), then dropped. Scans query the arrays instead of
+    rebuilding cache keys per candidate. Queries take departure minutes on the day's
+    timeline (floats, see DayTimeline) and map them to the key grid of the curve's bucket.
+    """
+    def __init__(self, origin_addr: str, destination_addr: str, tl: DayTimeline, bucket: int):
+        self.origin_addr = origin_addr
+        self.destination_addr = destination_addr
+        self.tl = tl
+        self.bucket = bucket
+        self.values = array("d", [math.nan]) * 1440
+        self.state = array("b", [CURVE_MISSING]) * 1440
+        self._borrowed: list[int] = []
+        self._seq = _ROUTE_STORE_SEQ
+
+    def key_minute(self, minute: float) -> int:
+        return _floor_minute_to_step(int(minute // 1), self.bucket)
+
+    def _sync(self) -> None:
+        """Drop borrowed points if the session cache changed since they were read."""
+        if self._seq != _ROUTE_STORE_SEQ:
+            for km in self._borrowed:
+                if self.state[km] == CURVE_BORROWED:
+                    self.values[km] = math.nan
+                    self.state[km] = CURVE_MISSING
+            self._borrowed.clear()
+            self._seq = _ROUTE_STORE_SEQ
+
+    def _settle(self, km: int) -> float | None:
+        """Mark key minute km fetched if its canonical key is in the session cache."""
+        key = _canonical_key(self.origin_addr, self.destination_addr, self.tl.stamp(km))
+        dur = SESSION_ROUTE_CACHE.get(key)
+        if dur is not None:
+            if _DEP_RECORDERS:
+                _note_dep(key)
+            self.values[km] = dur
+            self.state[km] = CURVE_FETCHED
+        return dur
+
+    def known(self, dep: datetime) -> float | None:
+        """Cached duration for dep without counting a lookup or calling the API."""
+        self._sync()
+        km = self.key_minute(self.tl.minute(dep))
+        if self.state[km] != CURVE_MISSING or self._settle(km) is not None:
+            return self.values[km]
+        return _route_cache_peek(self.origin_addr, self.destination_addr, dep)
+
+    def is_known(self, minute: float) -> bool:
+        self._sync()
+        return self.state[self.key_minute(minute)] != CURVE_MISSING
+
+    def duration(self, dep: datetime) -> float:
+        """Duration for dep; looks it up (cache, then API) unless the point is known."""
+        self._sync()
+        km = self.key_minute(self.tl.minute(dep))
+        if self.state[km] != CURVE_MISSING:
+            return self.values[km]
+        dur = compute_drive_duration_minutes(self.origin_addr, self.destination_addr, dep)
+        if self._settle(km) is None:
+            self._sync()
+            self.values[km] = dur
+            self.state[km] = CURVE_BORROWED
+            self._borrowed.append(km)
+        return dur
+
+    def value(self, minute: float) -> float:
+        """Known duration at a departure minute (nan if missing)."""
+        self._sync()
+        return self.values[self.key_minute(minute)]
+
+    def argmin(self, minutes: list[float], deadline: float | None = None) -> int | None:
+        """Index into minutes of the shortest known duration whose arrival
+        (departure minute + duration) is not after deadline; ties keep the earliest index."""
+        self._sync()
+        values, state, key = self.values, self.state, self.key_minute
+        best_i, best_v = None, math.inf
+        for i, m in enumerate(minutes):
+            km = key(m)
+            if state[km] == CURVE_MISSING:
+                continue
+            v = values[km]
+            if v < best_v and (deadline is None or m + v <= deadline):
+                best_i, best_v = i, v
+        return best_i
+
+    def net_savings(self, base_minute: float, base_duration: float, extras: list[int]) -> list[float]:
+        """Late-penalty-adjusted saving against base_duration for leaving extras minutes
+        after base_minute (nan where the point is not known)."""
+        self._sync()
+        base_ceil = -int(-base_minute // 1)
+        late = self.tl.late_penalty
+        out = []
+        for extra in extras:
+            km = self.key_minute(base_minute + extra)
+            if self.state[km] == CURVE_MISSING:
+                out.append(math.nan)
+            else:
+                out.append(base_duration - self.values[km] - late(base_ceil + extra))
+        return out
+
+_CURVES: dict[tuple, DurationCurve] = {}
+_CURVES_SESSION_SIZE = 0
+
+def duration_curve(origin_addr: str, destination_addr: str, dt_local: datetime) -> DurationCurve:
+    """Curve of the route for the local day containing dt_local at the current cache bucket."""
+    global _CURVES_SESSION_SIZE
+    # The session cache only grows within a run; if it shrank it was reset, so are the curves
+    if len(SESSION_ROUTE_CACHE) < _CURVES_SESSION_SIZE:
+        _CURVES.clear()
+    _CURVES_SESSION_SIZE = len(SESSION_ROUTE_CACHE)
+    tl = _day_timeline(dt_local)
+    bucket = _cache_bucket_min()
+    key = (origin_addr, destination_addr, tl, bucket)
+    curve = _CURVES.get(key)
+    if curve is None:
+        if len(_CURVES) > 1024:
+            _CURVES.clear()
+        curve = DurationCurve(origin_addr, destination_addr, tl, bucket)
+        _CURVES[key] = curve
+    return curve
+
+def curve_duration(origin_addr: str, destination_addr: str, dep: datetime) -> float:
+    """compute_drive_duration_minutes through the route's DurationCurve (no repeat lookups)."""
+    return duration_curve(origin_addr, destination_addr, dep).duration(dep)
+
+def reset_duration_curves() -> None:
+    """Forget all curves and route minima (call whenever the session cache is cleared or rewritten)."""
+    _CURVES.clear()
+    _ROUTE_MIN_ON_RECORD.clear()
+
+# Per-route lower bound on the drive duration at any departure (ROUTE_LOWER_BOUND=on):
+# the provider's free-flow time or the shortest duration observed (cache, rolled-up
+# history and this pass), whichever is lower, times ROUTE_LOWER_BOUND_FACTOR as slack
+# for answers faster than either. Scans skip candidates that could not arrive in time
+# even then. Off by default: free-flow times are not guaranteed to be below every answer.
+ROUTE_LOWER_BOUND = (CONFIG.get("ROUTE_LOWER_BOUND", "off") or "off").strip().lower()
+try:
+    ROUTE_LOWER_BOUND_FACTOR = min(1.0, max(0.0, float(CONFIG.get("ROUTE_LOWER_BOUND_FACTOR", "0.9"))))
+except ValueError:
+    ROUTE_LOWER_BOUND_FACTOR = 0.9
+# Shortest duration observed per route in this pass (None: nothing observed yet)
+_ROUTE_MIN_ON_RECORD: dict[tuple[str, str], float | None] = {}
+
+def _route_min_on_record(route: tuple[str, str]) -> float | None:
+    if route not in _ROUTE_MIN_ON_RECORD:
+        durations = []
+        if not DISABLE_ROUTE_CACHE:
+            durations = ROUTE_STORE.route_durations(route)
+            durations += [min(agg[2]) for (o, d, _b), agg in ROUTE_HISTORY.items() if (o, d) == route and agg[2]]
+        _ROUTE_MIN_ON_RECORD[route] = min(durations) if durations else None
+    return _ROUTE_MIN_ON_RECORD[route]
+
+def route_lower_bound(origin_addr: str, destination_addr: str) -> float | None:
+    """Minutes the route takes at least, or None if it is off or nothing is known about the route.
+    Always None while a trace is recorded or replayed: the replay restores neither the
+    cache nor the provider's free-flow times, so it must not prune differently."""
+    if ROUTE_LOWER_BOUND != "on" or ROUTES_TRACE is not None:
+        return None
+    bounds = []
+    free_flow = routing_provider().free_flow_minutes(origin_addr, destination_addr)
+    if free_flow:
+        bounds.append(free_flow)
+    on_record = _route_min_on_record((origin_addr, destination_addr))
+    if on_record is not None:
+        bounds.append(on_record)
+    return ROUTE_LOWER_BOUND_FACTOR * min(bounds) if bounds else None
 
 def fmt_hhmm(dt: datetime) -> str:
     return dt.astimezone(TZ).strftime("%H:%M")
@@ -1319,6 +3520,7 @@ def fmt_dur_h_colon(mins: float) -> str:
     r = m % 60
     return f"{h}:{r:02d}h"
 
+@profile_phase("extension")
 def suggest_evening_extension(
     baseline_departure: datetime,
     baseline_duration_min: float,
@@ -1332,23 +3534,48 @@ def suggest_evening_extension(
     best_combo_any = None
     worse_streak = 0
     extra = step_minutes
-    # Stop if we pass the latest allowed leave time for the day (human-centric)
-    day_limit = _latest_allowed_leave_for_day(baseline_departure)
+    # Stop if we pass the latest allowed leave time for the day (human-centric);
+    # offsets are integer minutes on the day's timeline, datetimes only for lookups/results
+    tl = _day_timeline(baseline_departure)
+    limit_us = tl.limits()["latest_leave"] * _US_PER_MIN - tl.offset_us(baseline_departure)
+    base_ceil = tl.minute_ceil(baseline_departure)
+    # Net savings of all already-fetched points in one curve query; only the rest is looked up
+    curve = duration_curve(DESTINATION_ADDRESS, ORIGIN_ADDRESS, baseline_departure)
+    base_minute = tl.minute(baseline_departure)
+    extras = list(range(step_minutes, limit_us // _US_PER_MIN + 1, step_minutes)) if step_minutes > 0 else []
+    known_savings = dict(zip(extras, curve.net_savings(base_minute, baseline_duration_min, extras)))
+    route_lb = route_lower_bound(DESTINATION_ADDRESS, ORIGIN_ADDRESS)
     while True:
-        depart = baseline_departure + timedelta(minutes=extra)
-        if depart > day_limit:
+        if extra * _US_PER_MIN > limit_us:
             break
-        try:
-            dur = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, depart)
-        except Exception:
+        depart = baseline_departure + timedelta(minutes=extra)
+        penalty = tl.late_penalty(base_ceil + extra)
+        save_net = known_savings.get(extra, math.nan)
+        if save_net == save_net:
+            dur = curve.value(base_minute + extra)
+            save = baseline_duration_min - dur
+        elif route_lb is not None and baseline_duration_min - route_lb - penalty <= 0.5:
+            # Not worth it even at the route's lower bound: a non-improvement without a lookup
+            METRICS.inc("pendelplaner_lookups_pruned", reason="route_bound")
             worse_streak += 1
             if worse_streak >= worse_steps_limit:
                 break
             extra += step_minutes
             continue
-        save = baseline_duration_min - dur
-        penalty = _late_penalty_minutes(depart)
-        save_net = save - penalty
+        else:
+            try:
+                dur = curve_duration(DESTINATION_ADDRESS, ORIGIN_ADDRESS, depart)
+            except Exception:
+                worse_streak += 1
+                if worse_streak >= worse_steps_limit:
+                    break
+                extra += step_minutes
+                continue
+            save = baseline_duration_min - dur
+            save_net = save - penalty
+            # A fetch can coarsen the cache grid (budget degradation); stop trusting the old one
+            if curve.bucket != _cache_bucket_min():
+                known_savings.clear()
         if save_net > 0.5:  # require at least 0.5 minute net improvement
             worse_streak = 0
             if best is None or save_net > best["save_net"]:
@@ -1370,6 +3597,7 @@ def suggest_evening_extension(
         extra += step_minutes
     return best
 
+@profile_phase("extension")
 def enumerate_evening_extensions(
     baseline_departure: datetime,
     baseline_duration_min: float,
@@ -1384,14 +3612,23 @@ def enumerate_evening_extensions(
     options: list[dict] = []
     worse_streak = 0
     extra = step_minutes
-    day_limit = _latest_allowed_leave_for_day(baseline_departure)
+    tl = _day_timeline(baseline_departure)
+    limit_us = tl.limits()["latest_leave"] * _US_PER_MIN - tl.offset_us(baseline_departure)
+    base_ceil = tl.minute_ceil(baseline_departure)
+    route_lb = route_lower_bound(DESTINATION_ADDRESS, ORIGIN_ADDRESS)
     while True:
-        depart = baseline_departure + timedelta(minutes=extra)
-        local = depart.astimezone(TZ)
-        if depart > day_limit:
+        if extra * _US_PER_MIN > limit_us:
             break
+        depart = baseline_departure + timedelta(minutes=extra)
+        if route_lb is not None and baseline_duration_min - route_lb - tl.late_penalty(base_ceil + extra) <= 0.5:
+            METRICS.inc("pendelplaner_lookups_pruned", reason="route_bound")
+            worse_streak += 1
+            if worse_streak >= worse_steps_limit:
+                break
+            extra += step_minutes
+            continue
         try:
-            dur = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, depart)
+            dur = curve_duration(DESTINATION_ADDRESS, ORIGIN_ADDRESS, depart)
         except Exception:
             worse_streak += 1
             if worse_streak >= worse_steps_limit:
@@ -1399,7 +3636,7 @@ def enumerate_evening_extensions(
             extra += step_minutes
             continue
         save = baseline_duration_min - dur
-        penalty = _late_penalty_minutes(depart)
+        penalty = tl.late_penalty(base_ceil + extra)
         save_net = save - penalty
         if save_net > 0.5:
             options.append({
@@ -1422,6 +3659,7 @@ def enumerate_evening_extensions(
     options.sort(key=lambda o: o["save"], reverse=True)
     return options[:max_options]
 
+@profile_phase("extension")
 def evaluate_evening_range(
     baseline_departure: datetime,
     baseline_duration_min: float,
@@ -1437,17 +3675,17 @@ def evaluate_evening_range(
     options: list[dict] = []
     worse_streak = 0
     extra = 0
-    day_limit = _latest_allowed_leave_for_day(baseline_departure)
+    tl = _day_timeline(baseline_departure)
+    limit_us = tl.limits()["latest_leave"] * _US_PER_MIN - tl.offset_us(baseline_departure)
     worst_dur = baseline_duration_min
     worst_dep = baseline_departure
     worst_arr = baseline_departure + timedelta(minutes=baseline_duration_min)
     while True:
-        depart = baseline_departure + timedelta(minutes=extra)
-        local = depart.astimezone(TZ)
-        if depart > day_limit:
+        if extra * _US_PER_MIN > limit_us:
             break
+        depart = baseline_departure + timedelta(minutes=extra)
         try:
-            dur = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, depart) if extra else baseline_duration_min
+            dur = curve_duration(DESTINATION_ADDRESS, ORIGIN_ADDRESS, depart) if extra else baseline_duration_min
         except Exception:
             worse_streak += 1
             if worse_streak >= worse_steps_limit:
@@ -1488,65 +3726,263 @@ def parse_duration_to_minutes(duration_str: str) -> float:
     seconds = float(s)
     return seconds / 60.0
 
+def routing_provider() -> RoutingProvider:
+    """The active provider (API_CLIENT), created from ROUTING_PROVIDER on first use."""
+    global API_CLIENT
+    if API_CLIENT is None:
+        API_CLIENT = make_routing_provider()
+    return API_CLIENT
+
 def compute_drive_duration_minutes(origin_addr: str, destination_addr: str, departure_dt_local: datetime) -> float:
     """
     Fragt die Fahrdauer (traffic-aware) für eine konkrete Abfahrtszeit ab.
     Gibt Minuten zurück. Raises bei API-Fehlern mit detailierter Meldung.
     """
-    # If an API client is set up, use it (towards refactor without globals)
-    global API_CLIENT
-    if API_CLIENT is not None:
-        return API_CLIENT.compute_drive_duration_minutes(origin_addr, destination_addr, departure_dt_local)
-    # Budget and caching
-    global API_CALL_COUNT
-    key_time = _floor_dt_to_step(departure_dt_local, ROUTE_CACHE_GRANULARITY_MIN)
-    canonical_key = _canonical_key(origin_addr, destination_addr, key_time.strftime('%Y-%m-%d %H:%M'))
-    # Check session cache first (always on), then persistent cache if allowed
-    for k in _candidate_cache_keys(origin_addr, destination_addr, departure_dt_local):
-        if k in SESSION_ROUTE_CACHE:
-            return SESSION_ROUTE_CACHE[k]
-        if (not DISABLE_ROUTE_CACHE) and (k in ROUTE_CACHE):
-            dur = ROUTE_CACHE[k]
-            ROUTE_CACHE[canonical_key] = dur
-            ROUTE_CACHE_TS[canonical_key] = ROUTE_CACHE_TS.get(k, time.time())
-            SESSION_ROUTE_CACHE[canonical_key] = dur
-            return dur
-    if API_CALL_COUNT >= MAX_API_CALLS_PER_RUN:
-        raise RuntimeError(f"API call budget exceeded ({MAX_API_CALLS_PER_RUN}). Increase MAX_API_CALLS_PER_RUN or widen cache granularity.")
-
-    body = {
-        "origin": {"address": origin_addr},
-        "destination": {"address": destination_addr},
-        "travelMode": "DRIVE",
-        "routingPreference": "TRAFFIC_AWARE_OPTIMAL",
-        "departureTime": to_rfc3339_local(key_time),
-    }
-    logger.debug(
-        "Requesting route: %s -> %s at %s",
-        origin_addr,
-        destination_addr,
-        departure_dt_local.astimezone(TZ).strftime("%Y-%m-%d %H:%M"),
+    return routing_provider().compute_drive_duration_minutes(origin_addr, destination_addr, departure_dt_local)
+
+def prefetch_routes(legs: list[tuple[str, str, datetime]]) -> int:
+    """Fetch the cache misses among legs (origin, destination, departure) in as few round
+    trips as the provider can batch, so that looking the legs up in this order afterwards
+    only hits the cache. A leg whose lookup would be answered by a neighbouring bucket
+    fetched for an earlier leg is skipped, as it would be one by one. Does nothing for
+    providers without "batch", in dry runs, offline, or for fewer than two misses.
+    Entries the batch could not fetch are left to the normal lookups.
+    Returns the number of buckets fetched."""
+    provider = routing_provider()
+    if "batch" not in provider.capabilities or DRY_RUN is not None or OFFLINE_REASON is not None:
+        return 0
+    pending: set[tuple[str, str, str]] = set()
+    todo: list[tuple[str, str, datetime]] = []
+    for origin_addr, destination_addr, dep in legs:
+        if _route_cache_peek(origin_addr, destination_addr, dep) is not None:
+            continue
+        if any(k in pending for k in _candidate_cache_keys(origin_addr, destination_addr, dep)):
+            continue
+        key_time = _floor_dt_to_step(dep, _cache_bucket_min())
+        pending.add(_canonical_key(origin_addr, destination_addr, key_time.strftime('%Y-%m-%d %H:%M')))
+        todo.append((origin_addr, destination_addr, key_time))
+    if len(todo) < 2:
+        return 0
+    fetched = 0
+    failures: set[int] = set()
+    for res in provider.fetch_and_store_batch(todo):
+        if isinstance(res, Exception):
+            # One failed round trip is one provider failure, however many entries it held
+            if id(res) not in failures:
+                failures.add(id(res))
+                if _switch_offline(res):
+                    break
+        elif res is not None:
+            fetched += 1
+    if fetched:
+        _note_provider_ok()
+    return fetched
+
+def refetch_route_bucket(origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+    """Fetch one cache bucket from the API even if it is cached, and store the fresh value.
+    Counts against the run budget like any other request."""
+    return routing_provider().fetch_and_store(origin_addr, destination_addr, key_time)
+
+# Stale persistent entries served during this run, refetched by revalidate_stale_routes()
+_REVALIDATE_QUEUE: dict[tuple[str, str, str], datetime] = {}
+
+def _queue_revalidation(key: tuple[str, str, str]) -> None:
+    """Queue a stale (past soft TTL) entry that was just served. Traced runs do not queue,
+    so that a replay makes the same requests as the recording."""
+    if ROUTES_TRACE is not None:
+        return
+    canonical = _canonical_key(*key)
+    if canonical not in _REVALIDATE_QUEUE:
+        stamp = canonical[2].split("|")[-1]
+        _REVALIDATE_QUEUE[canonical] = datetime.strptime(stamp, "%Y-%m-%d %H:%M").replace(tzinfo=TZ)
+        METRICS.inc("pendelplaner_cache_revalidations", result="queued")
+
+def revalidate_stale_routes(max_calls: int | None = None, pause_s: float = 0.0) -> int:
+    """Refetch the stale entries served during the run after its output is out, the most
+    overdue relative to their (volatility-dependent) soft TTL first. Bounded by max_calls (default ROUTE_CACHE_REVALIDATE_MAX_CALLS) and the remaining
+    run budget; what is left stays stale and is queued again by the next run that reads
+    it. Returns the number of entries refreshed."""
+    if not _REVALIDATE_QUEUE:
+        return 0
+    if "traffic" not in routing_provider().capabilities:
+        # Estimates from a local provider would not refresh the cached traffic data
+        _REVALIDATE_QUEUE.clear()
+        return 0
+    if max_calls is None:
+        max_calls = ROUTE_CACHE_REVALIDATE_MAX_CALLS
+    now = time.time()
+    due = sorted(
+        _REVALIDATE_QUEUE.items(),
+        key=lambda kv: -(now - ROUTE_CACHE_TS.get(kv[0], 0)) / max(1.0, _route_soft_ttl_sec(kv[0])),
     )
-    resp = requests.post(ROUTES_URL, headers=HEADERS, json=body, timeout=20)
-    if resp.status_code != 200:
-        logger.error("Routes API HTTP %s: %s", resp.status_code, resp.text[:300])
-        raise RuntimeError(f"Routes API Fehler {resp.status_code}: {resp.text}")
-    data = resp.json()
-    routes = data.get("routes", [])
-    if not routes:
-        raise RuntimeError("Keine Route gefunden (leere routes-Liste).")
-    # Erste (empfohlene) Route nehmen
-    route = routes[0]
-    dur = route.get("duration")
-    if not dur:
-        raise RuntimeError("Antwort enthält keine duration.")
-    dur_min = parse_duration_to_minutes(dur)
-    SESSION_ROUTE_CACHE[canonical_key] = dur_min
-    if not DISABLE_ROUTE_CACHE:
-        ROUTE_CACHE[canonical_key] = dur_min
-        ROUTE_CACHE_TS[canonical_key] = time.time()
-    API_CALL_COUNT += 1
-    return dur_min
+    _REVALIDATE_QUEUE.clear()
+    refreshed = changed = 0
+    for k, key_time in due[:max_calls]:
+        before = ROUTE_CACHE.get(k)
+        try:
+            dur = refetch_route_bucket(k[0], k[1], key_time)
+        except Exception as e:
+            METRICS.inc("pendelplaner_cache_revalidations", result="error")
+            logger.info("Revalidation stopped: %s", e)
+            break
+        refreshed += 1
+        changed += dur != before
+        METRICS.inc("pendelplaner_cache_revalidations", result="changed" if dur != before else "unchanged")
+        if pause_s:
+            time.sleep(pause_s)
+    logger.info("Revalidated %d of %d stale cache entries (%d changed)", refreshed, len(due), changed)
+    return refreshed
+
+# ---------------- Offline fallback (budget exhausted or provider unreachable) ----------------
+# auto: once the run budget is used up or the provider fails OFFLINE_AFTER_ERRORS times in a
+# row, cache misses are answered by estimates (see offline_duration) instead of failing; off: never
+OFFLINE_FALLBACK = (CONFIG.get("OFFLINE_FALLBACK", "auto") or "auto").strip().lower()
+try:
+    OFFLINE_AFTER_ERRORS = max(1, int(CONFIG.get("OFFLINE_AFTER_ERRORS", "3")))
+    OFFLINE_NEIGHBOUR_WINDOW_MIN = max(0, int(CONFIG.get("OFFLINE_NEIGHBOUR_WINDOW_MIN", "90")))
+    OFFLINE_WEEKS = max(0, int(CONFIG.get("OFFLINE_WEEKS", "4")))
+except ValueError:
+    OFFLINE_AFTER_ERRORS, OFFLINE_NEIGHBOUR_WINDOW_MIN, OFFLINE_WEEKS = 3, 90, 4
+# Set by --offline: every run plans from estimates only
+OFFLINE_FORCED = False
+# Why the current run answers from estimates (budget, network, forced), None while online
+OFFLINE_REASON: str | None = None
+_PROVIDER_FAILURES = 0
+# Estimate per canonical key for this run: (minutes, source, confidence)
+_OFFLINE_ESTIMATES: dict[tuple[str, str, str], tuple[float, str, float]] = {}
+# Estimates used per day ("YYYY-MM-DD", None in single-day mode): lowest confidence, count per source
+ESTIMATES_BY_DAY: dict[str | None, dict] = {}
+# Median cached duration per route for this run (None: route never cached)
+_OFFLINE_ROUTE_MEDIAN: dict[tuple[str, str], float | None] = {}
+# Estimate sources, most trusted first, with their confidence
+OFFLINE_CONFIDENCE = {
+    "stale": 0.8,          # the bucket itself, past ROUTE_CACHE_TTL_DAYS
+    "interpolated": 0.7,   # between cached buckets before and after on the same day
+    "same_weekday": 0.6,   # same bucket on the same weekday of earlier weeks
+    "neighbour": 0.5,      # nearest cached bucket on one side only
+    "other_day": 0.45,     # same time of day on other days of the last OFFLINE_WEEKS weeks
+    "history": 0.4,        # median of the rolled-up history (ROUTE_HISTORY)
+    "route": 0.3,          # median of all cached buckets of the route
+    "reverse": 0.25,       # median of all cached buckets of the way back
+    "free_flow": 0.2,      # provider's uncongested duration
+}
+
+def reset_offline_state() -> None:
+    """Start a run online again (or offline for good with --offline)."""
+    global OFFLINE_REASON, _PROVIDER_FAILURES
+    OFFLINE_REASON = "forced" if OFFLINE_FORCED else None
+    _PROVIDER_FAILURES = 0
+    _OFFLINE_ESTIMATES.clear()
+    _OFFLINE_ROUTE_MEDIAN.clear()
+    ESTIMATES_BY_DAY.clear()
+
+def _note_provider_ok() -> None:
+    global _PROVIDER_FAILURES
+    _PROVIDER_FAILURES = 0
+
+def _switch_offline(error: Exception) -> bool:
+    """Decide whether a failed request puts the run into offline mode: at once when the
+    budget is used up, after OFFLINE_AFTER_ERRORS consecutive network errors, HTTP 5xx
+    or 429 answers. Traced runs never switch (a replay must make the same requests)."""
+    global OFFLINE_REASON, _PROVIDER_FAILURES
+    if OFFLINE_FALLBACK != "auto" or ROUTES_TRACE is not None:
+        return False
+    if isinstance(error, BudgetExhaustedError):
+        reason = "budget"
+    elif isinstance(error, (requests.ConnectionError, requests.Timeout)) or (
+        isinstance(error, RoutesApiError) and (error.status >= 500 or error.status == 429)
+    ):
+        _PROVIDER_FAILURES += 1
+        if _PROVIDER_FAILURES < OFFLINE_AFTER_ERRORS:
+            return False
+        reason = "network"
+    else:
+        return False
+    OFFLINE_REASON = reason
+    logger.warning("Offline-Modus (%s): %s – restliche Fahrzeiten werden geschätzt", reason, error)
+    return True
+
+def _offline_route_median(route: tuple[str, str]) -> float | None:
+    if route not in _OFFLINE_ROUTE_MEDIAN:
+        vals = sorted(ROUTE_STORE.route_durations(route))
+        _OFFLINE_ROUTE_MEDIAN[route] = vals[len(vals) // 2] if vals else None
+    return _OFFLINE_ROUTE_MEDIAN[route]
+
+def estimate_offline_duration(origin_addr: str, destination_addr: str, key_time: datetime,
+                              provider: RoutingProvider | None = None) -> tuple[float, str, float] | None:
+    """Estimate a bucket without a request: (minutes, source, confidence) from the first
+    source in OFFLINE_CONFIDENCE that has data, or None."""
+    def cached(t: datetime) -> float | None:
+        return _plan_dep_value(_canonical_key(origin_addr, destination_addr, t.strftime('%Y-%m-%d %H:%M')))
+
+    dur = cached(key_time)
+    if dur is not None:
+        return dur, "stale", OFFLINE_CONFIDENCE["stale"]
+    step = max(1, ROUTE_CACHE_GRANULARITY_MIN)
+    before = after = None
+    for off in range(step, OFFLINE_NEIGHBOUR_WINDOW_MIN + 1, step):
+        if before is None and (dur := cached(key_time - timedelta(minutes=off))) is not None:
+            before = (off, dur)
+        if after is None and (dur := cached(key_time + timedelta(minutes=off))) is not None:
+            after = (off, dur)
+        if before and after:
+            w = before[0] / (before[0] + after[0])
+            return before[1] + w * (after[1] - before[1]), "interpolated", OFFLINE_CONFIDENCE["interpolated"]
+    weeks = sorted(d for k in range(1, OFFLINE_WEEKS + 1) if (d := cached(key_time - timedelta(days=7 * k))) is not None)
+    if weeks:
+        return weeks[len(weeks) // 2], "same_weekday", OFFLINE_CONFIDENCE["same_weekday"]
+    near = before or after
+    if near:
+        return near[1], "neighbour", OFFLINE_CONFIDENCE["neighbour"]
+    days = sorted(d for k in range(1, 7 * OFFLINE_WEEKS + 1) if k % 7
+                  for t in (key_time - timedelta(days=k), key_time + timedelta(days=k))
+                  if (d := cached(t)) is not None)
+    if days:
+        return days[len(days) // 2], "other_day", OFFLINE_CONFIDENCE["other_day"]
+    dur = _history_prior(origin_addr, destination_addr, key_time)
+    if dur is not None:
+        return dur, "history", OFFLINE_CONFIDENCE["history"]
+    for source, route in (("route", (origin_addr, destination_addr)), ("reverse", (destination_addr, origin_addr))):
+        dur = _offline_route_median(route)
+        if dur is not None:
+            return dur, source, OFFLINE_CONFIDENCE[source]
+    dur = provider.free_flow_minutes(origin_addr, destination_addr) if provider is not None else None
+    if dur:
+        return dur, "free_flow", OFFLINE_CONFIDENCE["free_flow"]
+    return None
+
+def offline_duration(origin_addr: str, destination_addr: str, key_time: datetime,
+                     provider: RoutingProvider | None = None) -> float:
+    """Answer a cache miss in offline mode and note the estimate for the current day.
+    Estimates are not cached anywhere, and plans built on them are never reused."""
+    key = _canonical_key(origin_addr, destination_addr, key_time.strftime('%Y-%m-%d %H:%M'))
+    est = _OFFLINE_ESTIMATES.get(key)
+    if est is None:
+        est = estimate_offline_duration(origin_addr, destination_addr, key_time, provider)
+        if est is None:
+            raise RuntimeError(f"Offline: keine Schätzung für {origin_addr} -> {destination_addr} um {key_time:%H:%M}")
+        _OFFLINE_ESTIMATES[key] = est
+    dur, source, confidence = est
+    _plan_deps_incomplete()
+    info = ESTIMATES_BY_DAY.setdefault(_current_phase()[1], {"confidence": confidence, "sources": {}})
+    info["confidence"] = min(info["confidence"], confidence)
+    info["sources"][source] = info["sources"].get(source, 0) + 1
+    METRICS.inc("pendelplaner_offline_estimates", source=source)
+    return dur
+
+def estimate_info(day: str | None) -> dict | None:
+    """Offline annotation of a planned day: why, lowest confidence, lookups per source."""
+    info = ESTIMATES_BY_DAY.get(day)
+    if not info:
+        return None
+    return {"reason": OFFLINE_REASON, "confidence": info["confidence"], "sources": dict(info["sources"])}
+
+# Half-day plans of this process with the cache entries they read; a plan is reused while
+# all of them hold the same durations (see plan_halfday_commute)
+_HALFDAY_MEMO: dict[str, tuple[dict, list[tuple], float | None]] = {}
+
+def reset_halfday_memo() -> None:
+    _HALFDAY_MEMO.clear()
 
 def plan_halfday_commute(
     day_local: datetime,
@@ -1566,9 +4002,26 @@ def plan_halfday_commute(
     Returns dict with outbound/inbound details.
     """
     assert section in {"AM", "PM"}
+    # The same half-day is asked for repeatedly (HO allocation, HO cap, the day itself, every
+    # watch tick); rescan only when one of the cache entries the last scan read has changed
+    # (full resolution only, so degraded days still report their resolution)
+    memo_key = None
+    if DRY_RUN is None and _resolution_level() == 0:
+        memo_key = _planning_digest({
+            "day": day_local.date().isoformat(), "section": section,
+            "params": [latest_arrival_local, window_start_local, work_hours, lunch_min, lunch_max, lunch_step, step_minutes],
+        })
+        memo = _HALFDAY_MEMO.get(memo_key)
+        if memo is not None and _clock_valid(memo[2]) and _deps_unchanged(memo[1]):
+            plan, deps, valid_until = memo
+            for k, _dur in deps:
+                _note_dep(k)
+            if valid_until is not None:
+                _note_valid_until(datetime.fromtimestamp(valid_until, TZ))
+            return {"outbound": dict(plan["outbound"]), "inbound": dict(plan["inbound"])}
 
     # Apply overrides via using_config context manager (no global mutation leakage)
-    with using_config(AppConfig.from_env(), overrides={
+    with using_config(_active_app_config(), overrides={
         "latest_arrival_local": latest_arrival_local,
         "window_start_local": window_start_local,
         "work_hours": work_hours,
@@ -1576,10 +4029,16 @@ def plan_halfday_commute(
         "lunch_max": lunch_max,
         "lunch_step": lunch_step,
         "step_minutes": step_minutes,
-    }):
+    }), recording_deps(PlanDependencies()) as rec:
         morning = scan_morning_best_departure(day_local)
         evening = choose_best_evening_departure(morning["best_arrival"])
-        return {"outbound": morning, "inbound": evening}
+    plan = {"outbound": morning, "inbound": evening}
+    if memo_key is not None and rec.complete and _resolution_level() == 0:
+        if len(_HALFDAY_MEMO) > 256:
+            _HALFDAY_MEMO.clear()
+        _HALFDAY_MEMO[memo_key] = (plan, [(k, _plan_dep_value(k)) for k in rec.keys], rec.valid_until)
+        return {"outbound": dict(morning), "inbound": dict(evening)}
+    return plan
 
 def weekly_plan(start_date_local: datetime, config: dict) -> list:
     """Compute a weekly plan starting at start_date_local (Monday recommended).
@@ -1600,17 +4059,18 @@ def weekly_plan(start_date_local: datetime, config: dict) -> list:
     # Helper to compute total travel minutes for a full office day
     def compute_full_day_minutes(day_dt: datetime) -> float | None:
         try:
-            plan = plan_halfday_commute(
-                day_dt,
-                section="AM",
-                latest_arrival_local=config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
-                window_start_local=config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL),
-                work_hours=config.get("work_hours", WORK_HOURS),
-                lunch_min=config.get("lunch_min", LUNCH_MIN_MINUTES),
-                lunch_max=config.get("lunch_max", LUNCH_MAX_MINUTES),
-                lunch_step=config.get("lunch_step", LUNCH_STEP_MINUTES),
-                step_minutes=config.get("step_minutes", STEP_MINUTES),
-            )
+            with profile_phase("ho_allocator", day=day_dt):
+                plan = plan_halfday_commute(
+                    day_dt,
+                    section="AM",
+                    latest_arrival_local=config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
+                    window_start_local=config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL),
+                    work_hours=config.get("work_hours", WORK_HOURS),
+                    lunch_min=config.get("lunch_min", LUNCH_MIN_MINUTES),
+                    lunch_max=config.get("lunch_max", LUNCH_MAX_MINUTES),
+                    lunch_step=config.get("lunch_step", LUNCH_STEP_MINUTES),
+                    step_minutes=config.get("step_minutes", STEP_MINUTES),
+                )
             return plan["outbound"]["best_duration_minutes"] + plan["inbound"]["evening_duration_minutes"]
         except Exception:
             return None
@@ -1647,17 +4107,18 @@ def weekly_plan(start_date_local: datetime, config: dict) -> list:
 
         def half_minutes(day_dt: datetime, section: str) -> float | None:
             try:
-                hp = plan_halfday_commute(
-                    day_dt,
-                    section=section,
-                    latest_arrival_local=(AFTERNOON_ARRIVAL_LOCAL if section == "PM" else config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL)),
-                    window_start_local=(AFTERNOON_WINDOW_START_LOCAL if section == "PM" else config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL)),
-                    work_hours=4.0,
-                    lunch_min=0,
-                    lunch_max=0,
-                    lunch_step=0,
-                    step_minutes=config.get("step_minutes", STEP_MINUTES),
-                )
+                with profile_phase("ho_allocator", day=day_dt):
+                    hp = plan_halfday_commute(
+                        day_dt,
+                        section=section,
+                        latest_arrival_local=(AFTERNOON_ARRIVAL_LOCAL if section == "PM" else config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL)),
+                        window_start_local=(AFTERNOON_WINDOW_START_LOCAL if section == "PM" else config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL)),
+                        work_hours=4.0,
+                        lunch_min=0,
+                        lunch_max=0,
+                        lunch_step=0,
+                        step_minutes=config.get("step_minutes", STEP_MINUTES),
+                    )
                 return hp["outbound"]["best_duration_minutes"] + hp["inbound"]["evening_duration_minutes"]
             except Exception:
                 return None
@@ -1698,7 +4159,7 @@ def weekly_plan(start_date_local: datetime, config: dict) -> list:
             logger.info("HO cap applied: final_hours=%d blocks=%s", current_hours, ",".join(blocks))
 
     results = []
-    now_local = datetime.now(TZ)
+    now_local = _now_local()
     for i in range(5):
         day = (start_date_local + timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
         slot = blocks[i]
@@ -1706,54 +4167,60 @@ def weekly_plan(start_date_local: datetime, config: dict) -> list:
         if day.date() < now_local.date():
             results.append({"day": day, "mode": f"PAST-{slot}", "plan": None})
             continue
+        if _DEP_RECORDERS:
+            _note_valid_until(day + timedelta(days=1))
+        day_t0 = time.perf_counter()
         try:
-            if slot in {"HO", "OFF"}:
-                results.append({"day": day, "mode": slot, "plan": None})
-            elif slot == "HO-AM":
-                # Office only in PM
-                plan = plan_halfday_commute(
-                    day,
-                    section="PM",
-                    latest_arrival_local=AFTERNOON_ARRIVAL_LOCAL,
-                    window_start_local=AFTERNOON_WINDOW_START_LOCAL,
-                    work_hours=4.0,
-                    lunch_min=0,
-                    lunch_max=0,
-                    lunch_step=0,
-                    step_minutes=config.get("step_minutes", STEP_MINUTES),
-                )
-                results.append({"day": day, "mode": slot, "plan": plan})
-            elif slot == "HO-PM":
-                # Office only in AM
-                plan = plan_halfday_commute(
-                    day,
-                    section="AM",
-                    latest_arrival_local=config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
-                    window_start_local=config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL),
-                    work_hours=4.0,
-                    lunch_min=0,
-                    lunch_max=0,
-                    lunch_step=0,
-                    step_minutes=config.get("step_minutes", STEP_MINUTES),
-                )
-                results.append({"day": day, "mode": slot, "plan": plan})
-            else:
-                # OFFICE or OPEN -> full day office
-                plan = plan_halfday_commute(
-                    day,
-                    section="AM",
-                    latest_arrival_local=config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
-                    window_start_local=config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL),
-                    work_hours=config.get("work_hours", WORK_HOURS),
-                    lunch_min=config.get("lunch_min", LUNCH_MIN_MINUTES),
-                    lunch_max=config.get("lunch_max", LUNCH_MAX_MINUTES),
-                    lunch_step=config.get("lunch_step", LUNCH_STEP_MINUTES),
-                    step_minutes=config.get("step_minutes", STEP_MINUTES),
-                )
-                results.append({"day": day, "mode": "OFFICE", "plan": plan})
+            with profile_phase("day_plan", day=day):
+                if slot in {"HO", "OFF"}:
+                    results.append({"day": day, "mode": slot, "plan": None})
+                elif slot == "HO-AM":
+                    # Office only in PM
+                    plan = plan_halfday_commute(
+                        day,
+                        section="PM",
+                        latest_arrival_local=AFTERNOON_ARRIVAL_LOCAL,
+                        window_start_local=AFTERNOON_WINDOW_START_LOCAL,
+                        work_hours=4.0,
+                        lunch_min=0,
+                        lunch_max=0,
+                        lunch_step=0,
+                        step_minutes=config.get("step_minutes", STEP_MINUTES),
+                    )
+                    results.append({"day": day, "mode": slot, "plan": plan})
+                elif slot == "HO-PM":
+                    # Office only in AM
+                    plan = plan_halfday_commute(
+                        day,
+                        section="AM",
+                        latest_arrival_local=config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
+                        window_start_local=config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL),
+                        work_hours=4.0,
+                        lunch_min=0,
+                        lunch_max=0,
+                        lunch_step=0,
+                        step_minutes=config.get("step_minutes", STEP_MINUTES),
+                    )
+                    results.append({"day": day, "mode": slot, "plan": plan})
+                else:
+                    # OFFICE or OPEN -> full day office
+                    plan = plan_halfday_commute(
+                        day,
+                        section="AM",
+                        latest_arrival_local=config.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
+                        window_start_local=config.get("morning_window_start_local", MORNING_WINDOW_START_LOCAL),
+                        work_hours=config.get("work_hours", WORK_HOURS),
+                        lunch_min=config.get("lunch_min", LUNCH_MIN_MINUTES),
+                        lunch_max=config.get("lunch_max", LUNCH_MAX_MINUTES),
+                        lunch_step=config.get("lunch_step", LUNCH_STEP_MINUTES),
+                        step_minutes=config.get("step_minutes", STEP_MINUTES),
+                    )
+                    results.append({"day": day, "mode": "OFFICE", "plan": plan})
         except Exception as e:
             logger.error("Planning error for %s (%s): %s", day.strftime("%Y-%m-%d"), slot, e)
             results.append({"day": day, "mode": f"ERROR-{slot}", "error": str(e), "plan": None})
+        if results[-1]["plan"] is not None:
+            METRICS.observe("pendelplaner_day_plan_seconds", time.perf_counter() - day_t0, stage="base")
     return results
 
 def _normalize_slot(value: str) -> str:
@@ -1804,6 +4271,196 @@ def build_blocks_from_env_slots(config_map: dict) -> list:
             out.append("HO")  # default to home if unspecified
     return out if found_any else []
 
+def scan_min_duration(
+    origin_addr: str,
+    destination_addr: str,
+    departures: list[datetime],
+    deadline: datetime | None = None,
+    base_step: int | None = None,
+    progress: "ProgressReporter | None" = None,
+) -> dict:
+    """Find the departure with the shortest drive (arriving by deadline, if given).
+
+    Candidates sit in a priority queue ordered by promise: cached slots first (they cost
+    no API call), then by the duration interpolated from the slots known so far. Before a
+    candidate is looked up, a lower bound from the FIFO property of traffic (leaving later
+    never arrives earlier: d(t) >= t_a + d(t_a) - t for any known t_a <= t) is compared with
+    the incumbent; candidates that cannot beat it, or cannot make the deadline because an
+    earlier slot already misses it, are dropped without a lookup. The route's lower bound
+    (route_lower_bound, opt-in) drops candidates that cannot make the deadline before any slot is known. With base_step, slots
+    off the (budget-degraded) grid of _scan_step(base_step) are dropped as well.
+    Cached candidates are always evaluated (they cost no API call), and when every
+    candidate is cached on one DurationCurve the answer is a single curve query.
+    Outside the known slots the estimate follows the rolled-up history (ROUTE_HISTORY)
+    of the slots' time-of-week buckets, anchored to the nearest known slot.
+    Ties keep the earliest departure, like a chronological scan.
+    Returns dict: departure, duration_minutes (None if nothing qualified), last_error,
+    fetched, pruned.
+    """
+    # Work on minute offsets from the first departure (index-addressed); datetimes are
+    # only touched for the lookups themselves and the result.
+    departures = sorted(departures)
+    origin = departures[0] if departures else None
+    pos = [(dep - origin).total_seconds() / 60.0 for dep in departures]
+    key_pos: dict[int, list[float]] = {}
+    deadline_pos = (deadline - origin).total_seconds() / 60.0 if deadline is not None and origin is not None else None
+    if departures and _day_timeline(departures[0]) is _day_timeline(departures[-1]):
+        curves = [duration_curve(origin_addr, destination_addr, origin)] * len(departures)
+    else:
+        curves = [duration_curve(origin_addr, destination_addr, dep) for dep in departures]
+    known: dict[int, float] = {}
+    for i, dep in enumerate(departures):
+        dur = curves[i].known(dep)
+        if dur is not None:
+            known[i] = dur
+    known_sorted = sorted(known)
+    cached_set = set(known)
+
+    def on_grid(i: int) -> bool:
+        step = _scan_step(base_step) if base_step else 0
+        return not (step > 0 and int(pos[i]) % step)
+
+    curve = curves[0] if departures and curves[0] is curves[-1] else None
+    start = curve.tl.minute(origin) if curve else 0.0
+    if curve and len(known) == len(departures) and all(curve.is_known(start + p) for p in pos):
+        # Everything is known on one curve: answer with one query, no lookups
+        eligible = [i for i in range(len(departures)) if on_grid(i)]
+        if len(eligible) < len(departures):
+            METRICS.inc("pendelplaner_lookups_pruned", len(departures) - len(eligible), reason="coarser_grid")
+        hit = curve.argmin(
+            [start + pos[i] for i in eligible],
+            None if deadline_pos is None else start + deadline_pos,
+        )
+        if progress:
+            progress.update(len(departures))
+        best_dep = departures[eligible[hit]] if hit is not None else None
+        return {
+            "departure": best_dep,
+            "duration_minutes": known[eligible[hit]] if hit is not None else None,
+            "last_error": None,
+            "fetched": 0,
+            "pruned": len(departures) - len(eligible),
+        }
+
+    priors: dict[int, float | None] = {}
+
+    def prior(i: int) -> float | None:
+        if i not in priors:
+            priors[i] = _history_prior(origin_addr, destination_addr, departures[i])
+        return priors[i]
+
+    def estimate(i: int) -> float:
+        if i in known:
+            return known[i]
+        k = bisect_left(known_sorted, i)
+        if 0 < k < len(known_sorted):
+            a, b = known_sorted[k - 1], known_sorted[k]
+            w = (pos[i] - pos[a]) / (pos[b] - pos[a])
+            return known[a] + w * (known[b] - known[a])
+        if known_sorted:
+            j = known_sorted[k - 1] if k else known_sorted[0]
+            p_i, p_j = prior(i), prior(j)
+            return known[j] * p_i / p_j if p_i and p_j else known[j]
+        p_i = prior(i)
+        return p_i if p_i is not None else 0.0
+
+    def priority(i: int) -> tuple:
+        cached = i in known and i not in fetched_set
+        return (0 if cached else 1, estimate(i), i)
+
+    def key_positions() -> list[float]:
+        """Offsets of the cache key times (bucket-floored departures) for the current bucket."""
+        bucket = _cache_bucket_min()
+        if bucket not in key_pos:
+            key_pos[bucket] = [
+                (_floor_dt_to_step(dep, bucket) - origin).total_seconds() / 60.0 for dep in departures
+            ]
+        return key_pos[bucket]
+
+    def lower_bound(i: int) -> tuple[float, float | None]:
+        """FIFO bound on d(i) and the earliest arrival it implies (on cache key times)."""
+        kp = key_positions()
+        earliest_arrival = None
+        for j in known_sorted:
+            if j > i:
+                break
+            arrival = kp[j] + known[j]
+            if earliest_arrival is None or arrival > earliest_arrival:
+                earliest_arrival = arrival
+        if earliest_arrival is None:
+            return 0.0, None
+        return max(0.0, earliest_arrival - kp[i]), earliest_arrival
+
+    route_lb = route_lower_bound(origin_addr, destination_addr) or 0.0
+    fetched_set: set[int] = set()
+    heap = [priority(i) for i in range(len(departures))]
+    heapq.heapify(heap)
+    best_i, best_dur = None, None
+    last_error_message = None
+    fetched = pruned = calls_used = 0
+    while heap:
+        entry = heapq.heappop(heap)
+        i = entry[2]
+        current = priority(i)
+        # Lazy re-prioritisation: the estimate may have changed since the push
+        if heap and current > entry and current > heap[0]:
+            heapq.heappush(heap, current)
+            continue
+        reason = None
+        if not on_grid(i):
+            reason = "coarser_grid"
+        elif i not in cached_set:
+            lb, earliest_arrival = lower_bound(i)
+            if deadline_pos is not None and earliest_arrival is not None and earliest_arrival > deadline_pos:
+                reason = "infeasible"
+            elif best_dur is not None and (lb > best_dur or (lb >= best_dur and i > best_i)):
+                reason = "bound"
+            elif route_lb and deadline_pos is not None and pos[i] + route_lb > deadline_pos:
+                reason = "route_bound"
+        if reason:
+            pruned += 1
+            METRICS.inc("pendelplaner_lookups_pruned", reason=reason)
+            if progress:
+                progress.update(1)
+            continue
+        dep = departures[i]
+        try:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Candidate departure: %s", dep.astimezone(TZ).strftime("%H:%M"))
+            dur_min = curves[i].duration(dep)
+            calls_used += 1
+        except Exception as e:
+            last_error_message = str(e)
+            logger.debug("Slot error: %s", last_error_message)
+            if progress:
+                progress.update(1)
+            continue
+        fetched += 1
+        if i not in known:
+            insort(known_sorted, i)
+        known[i] = dur_min
+        fetched_set.add(i)
+        route_lb = route_lower_bound(origin_addr, destination_addr) or 0.0
+        if progress:
+            progress.update(1)
+        # Soft-guard: if cache disabled and we're near budget, stop early to prevent hard failure
+        if DISABLE_ROUTE_CACHE and calls_used >= max(1, int(MAX_API_CALLS_PER_RUN * 0.8)):
+            break
+        if deadline_pos is not None and pos[i] + dur_min > deadline_pos:
+            continue
+        if best_dur is None or (dur_min, i) < (best_dur, best_i):
+            best_i, best_dur = i, dur_min
+    best_dep = departures[best_i] if best_i is not None else None
+    logger.debug("Scan %s -> %s: %d looked up, %d pruned of %d", origin_addr, destination_addr, fetched, pruned, len(departures))
+    return {
+        "departure": best_dep,
+        "duration_minutes": best_dur,
+        "last_error": last_error_message,
+        "fetched": fetched,
+        "pruned": pruned,
+    }
+
+@profile_phase("morning_scan")
 def scan_morning_best_departure(day_local: datetime) -> dict:
     """
     Scannt Abfahrten am Morgen im STEP_MINUTES-Raster ab MORNING_WINDOW_START_LOCAL
@@ -1823,7 +4480,7 @@ def scan_morning_best_departure(day_local: datetime) -> dict:
 
     start_dt = day_local.replace(hour=h_s, minute=m_s)
     latest_arrival_dt = day_local.replace(hour=h_deadline, minute=m_deadline)
-    now_local = datetime.now(TZ)
+    now_local = _now_local()
     logger.debug(
         "Scan Morning: day=%s start=%02d:%02d latest_arrival=%02d:%02d step=%d",
         day_local.strftime("%Y-%m-%d"), h_s, m_s, h_deadline, m_deadline, STEP_MINUTES,
@@ -1843,7 +4500,7 @@ def scan_morning_best_departure(day_local: datetime) -> dict:
 
     # Wir scannen alle Abfahrten, die potenziell bis zur Deadline ankommen können
     # Pre-compute number of candidate steps for progress
-    total_steps = max(1, int(((latest_arrival_dt - start_dt).total_seconds() // 60) // STEP_MINUTES) + 1)
+    total_steps = max(1, int(((latest_arrival_dt - start_dt).total_seconds() // 60) // _scan_step(STEP_MINUTES)) + 1)
     pr = None
     if logger.isEnabledFor(logging.INFO):
         try:
@@ -1851,46 +4508,27 @@ def scan_morning_best_departure(day_local: datetime) -> dict:
         except Exception:
             pr = None
 
-    current = start_dt
-    calls_used = 0
-    budget = MAX_API_CALLS_PER_RUN
-    while current <= latest_arrival_dt:
-        # Nur zukünftige Zeitpunkte an die API senden
-        if current <= now_local:
-            current += timedelta(minutes=STEP_MINUTES)
-            continue
-        try:
-            logger.debug("Candidate departure: %s", current.astimezone(TZ).strftime("%H:%M"))
-            dur_min = compute_drive_duration_minutes(ORIGIN_ADDRESS, DESTINATION_ADDRESS, current)
-            calls_used += 1
-        except Exception as e:
-            last_error_message = str(e)
-            logger.debug("Slot error: %s", last_error_message)
-            current += timedelta(minutes=STEP_MINUTES)
-            if pr:
-                pr.update(1)
-            continue
-        # Soft-guard: if cache disabled and we're near budget, stop early to prevent hard failure
-        if DISABLE_ROUTE_CACHE and calls_used >= max(1, int(budget * 0.8)):
-            break
-
-        arrival = current + timedelta(minutes=dur_min)
-
-        if arrival <= latest_arrival_dt:
-            if best["best_duration_minutes"] is None or dur_min < best["best_duration_minutes"]:
-                best["best_departure"] = current
-                best["best_arrival"] = arrival
-                best["best_duration_minutes"] = dur_min
-                logger.debug(
-                    "New best: dep=%s arr=%s dur=%.1f",
-                    current.astimezone(TZ).strftime("%H:%M"),
-                    arrival.astimezone(TZ).strftime("%H:%M"),
-                    dur_min,
-                )
-
-        current += timedelta(minutes=STEP_MINUTES)
-        if pr:
-            pr.update(1)
+    # Kandidaten im (bei knappem Budget gröberen) Raster; nur zukünftige Zeitpunkte an die API senden
+    tl = _day_timeline(day_local)
+    now_us = tl.offset_us(now_local)
+    departures = [
+        tl.at(m)
+        for m in range(h_s * 60 + m_s, h_deadline * 60 + m_deadline + 1, _scan_step(STEP_MINUTES))
+        if m * _US_PER_MIN > now_us
+    ]
+    # The candidate set (and so the result) holds until the first of them passes
+    if _DEP_RECORDERS:
+        _note_valid_until(departures[0] if departures else latest_arrival_dt)
+    # Vielversprechendste Abfahrten zuerst; aussichtslose werden ohne Abfrage verworfen
+    result = scan_min_duration(
+        ORIGIN_ADDRESS, DESTINATION_ADDRESS, departures,
+        deadline=latest_arrival_dt, base_step=STEP_MINUTES, progress=pr,
+    )
+    last_error_message = result["last_error"]
+    if result["departure"] is not None:
+        best["best_departure"] = result["departure"]
+        best["best_duration_minutes"] = result["duration_minutes"]
+        best["best_arrival"] = result["departure"] + timedelta(minutes=result["duration_minutes"])
 
     if best["best_departure"] is None:
         msg = (
@@ -1911,6 +4549,7 @@ def scan_morning_best_departure(day_local: datetime) -> dict:
 
     return best
 
+@profile_phase("evening_scan")
 def choose_best_evening_departure(morning_arrival_local: datetime) -> dict:
     """
     Geht von gegebener Ankunft (morgens) aus. Berechnet für jede erlaubte
@@ -1937,7 +4576,8 @@ def choose_best_evening_departure(morning_arrival_local: datetime) -> dict:
         morning_arrival_local.astimezone(TZ).strftime("%H:%M"), WORK_HOURS,
         LUNCH_MIN_MINUTES, LUNCH_MAX_MINUTES, LUNCH_STEP_MINUTES,
     )
-    total_steps = max(1, int(((LUNCH_MAX_MINUTES - LUNCH_MIN_MINUTES) // max(1, LUNCH_STEP_MINUTES)) + 1))
+    lunch_step = _scan_step(LUNCH_STEP_MINUTES)
+    total_steps = max(1, int(((LUNCH_MAX_MINUTES - LUNCH_MIN_MINUTES) // max(1, lunch_step)) + 1))
     pr = None
     if logger.isEnabledFor(logging.INFO):
         try:
@@ -1945,28 +4585,22 @@ def choose_best_evening_departure(morning_arrival_local: datetime) -> dict:
         except Exception:
             pr = None
 
-    calls_used = 0
-    budget = MAX_API_CALLS_PER_RUN
-    for L in range(LUNCH_MIN_MINUTES, LUNCH_MAX_MINUTES + 1, LUNCH_STEP_MINUTES):
-        # Personal breaks are mandatory and stack with lunch
-        mandatory_breaks = L + PERSONAL_BREAKS_MIN
-        evening_departure = morning_arrival_local + timedelta(minutes=work_minutes + mandatory_breaks)
-        try:
-            dur_min = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, evening_departure)
-            calls_used += 1
-        except Exception as e:
-            last_error_message = str(e)
-            if pr:
-                pr.update(1)
-            continue
-        if DISABLE_ROUTE_CACHE and calls_used >= max(1, int(budget * 0.8)):
-            break
-
-        if best["evening_duration_minutes"] is None or dur_min < best["evening_duration_minutes"]:
-            best["lunch_minutes"] = L
-            best["evening_departure"] = evening_departure
-            best["evening_duration_minutes"] = dur_min
-            best["evening_arrival_home"] = evening_departure + timedelta(minutes=dur_min)
+    # Personal breaks are mandatory and stack with lunch
+    lunch_by_departure = {
+        morning_arrival_local + timedelta(minutes=work_minutes + L + PERSONAL_BREAKS_MIN): L
+        for L in range(LUNCH_MIN_MINUTES, LUNCH_MAX_MINUTES + 1, lunch_step)
+    }
+    result = scan_min_duration(
+        DESTINATION_ADDRESS, ORIGIN_ADDRESS, list(lunch_by_departure),
+        base_step=LUNCH_STEP_MINUTES, progress=pr,
+    )
+    last_error_message = result["last_error"]
+    if result["departure"] is not None:
+        dur_min = result["duration_minutes"]
+        best["lunch_minutes"] = lunch_by_departure[result["departure"]]
+        best["evening_departure"] = result["departure"]
+        best["evening_duration_minutes"] = dur_min
+        best["evening_arrival_home"] = result["departure"] + timedelta(minutes=dur_min)
 
     if pr:
         pr.done()
@@ -1997,7 +4631,7 @@ def choose_best_evening_departure_with_extension(morning_arrival_local: datetime
     ext = suggest_evening_extension(
         base["evening_departure"],
         base["evening_duration_minutes"],
-        step_minutes=EXTEND_STEP_MINUTES,
+        step_minutes=_scan_step(EXTEND_STEP_MINUTES),
         worse_steps_limit=EXTEND_WORSE_STEPS,
     )
     result = {"base": base}
@@ -2013,6 +4647,24 @@ def choose_best_evening_departure_with_extension(morning_arrival_local: datetime
         }
     return result
 
+def _prefetch_gym_legs(leave_office: datetime, train_minutes: list[int], max_combos: int | None = None) -> None:
+    """Batch the legs the gym loops below will look up for one leave_office: first
+    office -> gym for every gym (one departure time, so one route matrix), then gym -> home
+    for every gym and training duration, in loop order and cut at max_combos."""
+    gyms = GYM_ADDRESSES or []
+    if "batch" not in routing_provider().capabilities or len(gyms) * max(1, len(train_minutes)) < 2:
+        return
+    prefetch_routes([(DESTINATION_ADDRESS, gym_addr, leave_office) for gym_addr in gyms])
+    legs = []
+    for gym_addr in gyms:
+        off2gym = _route_cache_peek(DESTINATION_ADDRESS, gym_addr, leave_office)
+        if off2gym is None:
+            # The loop gives up at this gym as well
+            break
+        legs += [(gym_addr, ORIGIN_ADDRESS, leave_office + timedelta(minutes=off2gym + t)) for t in train_minutes]
+    prefetch_routes(legs if max_combos is None else legs[:max(0, max_combos)])
+
+@profile_phase("timebank_gym")
 def choose_best_evening_departure_with_timebank(morning_arrival_local: datetime, timebank_available_min: int) -> dict:
     """Variant that allows leaving at earliest end and waiting (gym) until traffic eases,
     spending from timebank (negative balance) up to timebank_available_min and daily max.
@@ -2029,7 +4681,7 @@ def choose_best_evening_departure_with_timebank(morning_arrival_local: datetime,
     earliest_end = morning_arrival_local + timedelta(minutes=work_minutes + base["lunch_minutes"] + PERSONAL_BREAKS_MIN)
     # Baseline evening direct drive at earliest_end (used for savings comparisons)
     try:
-        dur_base = compute_drive_duration_minutes(DESTINATION_ADDRESS, ORIGIN_ADDRESS, earliest_end)
+        dur_base = curve_duration(DESTINATION_ADDRESS, ORIGIN_ADDRESS, earliest_end)
     except Exception:
         dur_base = base["evening_duration_minutes"]
 
@@ -2038,12 +4690,13 @@ def choose_best_evening_departure_with_timebank(morning_arrival_local: datetime,
     if max_spend <= 0:
         best_combo_any = None
         leave_office = earliest_end
+        _prefetch_gym_legs(leave_office, list(range(GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES + 1, _scan_step(GYM_TRAIN_STEP_MINUTES))))
         for gym_addr in (GYM_ADDRESSES or []):
             try:
-                off2gym = compute_drive_duration_minutes(DESTINATION_ADDRESS, gym_addr, leave_office)
-                for train_min in range(GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES + 1, GYM_TRAIN_STEP_MINUTES):
+                off2gym = curve_duration(DESTINATION_ADDRESS, gym_addr, leave_office)
+                for train_min in range(GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES + 1, _scan_step(GYM_TRAIN_STEP_MINUTES)):
                     depart_homeward = leave_office + timedelta(minutes=off2gym + train_min)
-                    gym2home = compute_drive_duration_minutes(gym_addr, ORIGIN_ADDRESS, depart_homeward)
+                    gym2home = curve_duration(gym_addr, ORIGIN_ADDRESS, depart_homeward)
                     combo_any = {
                         "leave_office": leave_office,
                         "wait_minutes": 0,
@@ -2084,23 +4737,30 @@ def choose_best_evening_departure_with_timebank(morning_arrival_local: datetime,
     combos_used = 0
     stop_due_to_cap = False
     while spend <= max_spend and not stop_due_to_cap:
+        step = max(5, _scan_step(STEP_MINUTES))
         # Leave early (reduce office) by 'spend' minutes if mode=early, else leave at earliest_end and only vary training
         leave_office = earliest_end - timedelta(minutes=spend) if GYM_LEAVE_MODE == "early" else earliest_end
         # we then go to gym and depart later when traffic improves; compute travel via gym
         # scan training durations and both gym locations, include office->gym and gym->home drives
         try:
             best_combo = None
+            train_minutes = range(GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES + 1, _scan_step(GYM_TRAIN_STEP_MINUTES))
+            _prefetch_gym_legs(
+                leave_office,
+                [t for t in train_minutes if GYM_LEAVE_MODE != "early" or t <= spend],
+                max(1, int(GYM_COMBO_MAX)) - combos_used,
+            )
             for gym_addr in (GYM_ADDRESSES or []):
                 # commute office -> gym at leave_office
-                off2gym = compute_drive_duration_minutes(DESTINATION_ADDRESS, gym_addr, leave_office)
-                for train_min in range(GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES + 1, GYM_TRAIN_STEP_MINUTES):
+                off2gym = curve_duration(DESTINATION_ADDRESS, gym_addr, leave_office)
+                for train_min in range(GYM_TRAIN_MIN_MINUTES, GYM_TRAIN_MAX_MINUTES + 1, _scan_step(GYM_TRAIN_STEP_MINUTES)):
                     # cap by spend window: only consider if waiting/training time <= spend
                     if GYM_LEAVE_MODE == "early" and train_min > spend:
                         if pr:
                             pr.update(1)
                         break
                     depart_homeward = leave_office + timedelta(minutes=off2gym + train_min)
-                    gym2home = compute_drive_duration_minutes(gym_addr, ORIGIN_ADDRESS, depart_homeward)
+                    gym2home = curve_duration(gym_addr, ORIGIN_ADDRESS, depart_homeward)
                     total_evening_drive = off2gym + gym2home
                     save = dur_base - total_evening_drive
                     spend_used = spend if GYM_LEAVE_MODE == "early" else 0
@@ -2141,7 +4801,8 @@ def choose_best_evening_departure_with_timebank(morning_arrival_local: datetime,
             best = best_combo
         spend += step
         # If approaching budget, stop exploring further to avoid hard cap
-        if _budget_soft_limit_reached():
+        # (with degradation the remaining spend values are scanned on a coarser grid instead)
+        if BUDGET_DEGRADATION != "auto" and _budget_soft_limit_reached():
             break
     if pr:
         pr.done()
@@ -2155,6 +4816,7 @@ def choose_best_evening_departure_with_timebank(morning_arrival_local: datetime,
         out["best_any"] = best_combo_any
     return out
 
+@profile_phase("optimize_day")
 def optimize_day_with_extension(day_local: datetime) -> dict | None:
     """Re-optimize the whole day if we allow staying longer.
     Explore morning departure around the baseline in steps up to 60 minutes later,
@@ -2173,7 +4835,7 @@ def optimize_day_with_extension(day_local: datetime) -> dict | None:
     best = None
 
     # Candidate morning departures: baseline +/- up to +60 minutes (not earlier than now and must arrive before deadline)
-    steps = list(range(0, 61, STEP_MINUTES))
+    steps = list(range(0, 61, _scan_step(STEP_MINUTES)))
     pr = None
     if logger.isEnabledFor(logging.INFO):
         try:
@@ -2181,11 +4843,18 @@ def optimize_day_with_extension(day_local: datetime) -> dict | None:
         except Exception:
             pr = None
     start_dep = base_morning["best_departure"]
+    route_lb = route_lower_bound(ORIGIN_ADDRESS, DESTINATION_ADDRESS)
     for plus in steps:
         cand_dep = start_dep + timedelta(minutes=plus)
+        if route_lb is not None and cand_dep + timedelta(minutes=route_lb) > latest_arrival_dt:
+            # Late even at the route's lower bound, and so is every later candidate
+            METRICS.inc("pendelplaner_lookups_pruned", reason="route_bound")
+            if pr:
+                pr.update(1)
+            break
         # compute morning drive
         try:
-            dur_min = compute_drive_duration_minutes(ORIGIN_ADDRESS, DESTINATION_ADDRESS, cand_dep)
+            dur_min = curve_duration(ORIGIN_ADDRESS, DESTINATION_ADDRESS, cand_dep)
         except Exception:
             if pr:
                 pr.update(1)
@@ -2229,39 +4898,219 @@ def optimize_day_with_extension(day_local: datetime) -> dict | None:
         return best
     return None
 
-def main():
-    # Parse CLI and apply output prefs early
-    parser = _build_arg_parser()
-    args = parser.parse_args()
-    _apply_runtime_output_prefs(
-        force_color=args.color,
-        force_ascii=args.ascii,
-        width=args.width,
-        compact_weekly=args.compact_weekly,
-    )
-    ensure_api_key_configured()
-    if getattr(args, "quiet", False):
-        logger.setLevel(logging.WARNING)
-    # Disable cache per flag
-    global DISABLE_ROUTE_CACHE
-    if getattr(args, "no_cache", False):
-        DISABLE_ROUTE_CACHE = True
-    # Prepare API client (towards refactor)
-    global API_CLIENT
+def _write_record(record: dict) -> None:
+    """Write one JSON record as a line and flush, so consumers see it immediately."""
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+def _write_weekly_summary_record(week_start: str, days: list[DayPlanDM], summary: dict, output_format: str) -> None:
+    """Emit the closing weekly record(s) for json/ndjson (days were streamed for ndjson)."""
+    summary = _jsonable(summary)
+    if output_format == "ndjson":
+        _write_record({"type": "summary", "week_start": week_start, **summary})
+    else:
+        _write_record({"week_start": week_start, "days": [d.to_dict() for d in days], "summary": summary})
+
+def _write_single_day(day: DayPlanDM, latest_arrival_local: str, output_format: str) -> None:
+    if output_format == "text":
+        print_single_day(day, latest_arrival_local)
+    elif output_format == "ndjson":
+        _write_record({"type": "day", **day.to_dict()})
+    else:
+        _write_record({"days": [day.to_dict()]})
+
+# ---------------- Plan snapshots (render again without recomputing) ----------------
+PLAN_SNAPSHOT_VERSION = 1
+# Written after planning when set (--snapshot)
+PLAN_SNAPSHOT_PATH: str | None = None
+
+def write_plan_snapshot(path: str, kind: str, days: list[DayPlanDM], week_start: datetime | None = None) -> None:
+    """Write the computed plan as a versioned JSON snapshot.
+    Floats keep full precision and the settings the renderers read besides the days are
+    stored with it, so --from-snapshot prints exactly what the live run printed.
+    """
+    snapshot = {
+        "type": "plan_snapshot",
+        "version": PLAN_SNAPSHOT_VERSION,
+        "created": _now_local().isoformat(),
+        "tz": _tz_name(),
+        "kind": kind,  # weekly | single
+        "week_start": week_start.date().isoformat() if week_start else None,
+        "settings": {
+            "latest_arrival_local": LATEST_ARRIVAL_LOCAL,
+            "personal_breaks_min": PERSONAL_BREAKS_MIN,
+            "timebank_cap_min": TIMEBANK_CAP_MIN,
+        },
+        "days": [d.to_dict(ndigits=None) for d in days],
+        "summary": _jsonable(weekly_summary(days), None) if kind == "weekly" else None,
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+    logger.info("Plan snapshot written: %s (%d days)", path, len(days))
+
+def load_plan_snapshot(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if not isinstance(snapshot, dict) or snapshot.get("type") != "plan_snapshot":
+        raise RuntimeError(f"{path} ist kein Plan-Snapshot.")
+    if snapshot.get("version") != PLAN_SNAPSHOT_VERSION:
+        raise RuntimeError(
+            f"Plan-Snapshot {path} hat Version {snapshot.get('version')}, unterstützt wird {PLAN_SNAPSHOT_VERSION}. "
+            "Bitte den Plan neu berechnen."
+        )
+    return snapshot
+
+def render_plan_snapshot(path: str, output_format: str = "text") -> None:
+    """Print a saved plan in any output format. Pure rendering: no route lookups, no cache,
+    no API; datetimes are shown in the snapshot's time zone."""
+    global TZ, PERSONAL_BREAKS_MIN, TIMEBANK_CAP_MIN
+    snapshot = load_plan_snapshot(path)
+    settings = snapshot.get("settings") or {}
+    saved = (TZ, PERSONAL_BREAKS_MIN, TIMEBANK_CAP_MIN)
     try:
-        API_CLIENT = RoutesApiClient(API_KEY)
-        logger.info("API client initialized")
-    except Exception as e:
-        logger.debug("API client fallback to direct requests: %s", e)
-    # Weekly mode: enabled if WEEKLY_BLOCKS or per-slot keys are provided
-    slot_blocks = build_blocks_from_env_slots(CONFIG)
+        TZ = ZoneInfo(snapshot.get("tz") or _tz_name())
+        PERSONAL_BREAKS_MIN = settings.get("personal_breaks_min", PERSONAL_BREAKS_MIN)
+        TIMEBANK_CAP_MIN = settings.get("timebank_cap_min", TIMEBANK_CAP_MIN)
+        _render_plan(
+            snapshot.get("kind"),
+            [DayPlanDM.from_dict(d) for d in snapshot.get("days", [])],
+            snapshot.get("week_start"),
+            settings.get("latest_arrival_local", LATEST_ARRIVAL_LOCAL),
+            output_format,
+            summary=snapshot.get("summary"),
+        )
+    finally:
+        TZ, PERSONAL_BREAKS_MIN, TIMEBANK_CAP_MIN = saved
+
+def _render_plan(kind: str, days: list[DayPlanDM], week_start: str | None, latest_arrival_local: str,
+                 output_format: str, summary: dict | None = None) -> None:
+    """Print already computed days exactly as a planning pass would have printed them."""
+    if kind != "weekly":
+        if days:
+            _write_single_day(days[0], latest_arrival_local, output_format)
+        return
+    summary = summary or weekly_summary(days)
+    if output_format == "text":
+        print_weekly_title(datetime.strptime(week_start, "%Y-%m-%d").replace(tzinfo=TZ))
+        for day in days:
+            print_weekly_day(day)
+        print_weekly_summary(summary)
+        return
+    if output_format == "ndjson":
+        for day in days:
+            _write_record({"type": "day", "week_start": week_start, **day.to_dict()})
+    _write_weekly_summary_record(week_start, days, summary, output_format)
+
+# ---------------- Plan result cache (instant repeat runs) ----------------
+PLAN_CACHE_FILE = CONFIG.get("PLAN_CACHE_FILE", os.path.join(os.path.dirname(__file__), "plan_cache.json"))
+try:
+    PLAN_CACHE_TTL_MIN = int(CONFIG.get("PLAN_CACHE_TTL_MIN", "30"))  # 0 disables the plan cache
+except ValueError:
+    PLAN_CACHE_TTL_MIN = 30
+PLAN_CACHE_VERSION = 2
+PLAN_CACHE_MAX_ENTRIES = 32
+# Watch mode: before reusing a plan, refetch the route entries it depends on whose departure
+# lies within the next LIVE_REFRESH_HORIZON_MIN minutes and that are older than
+# LIVE_REFRESH_MAX_AGE_MIN (stalest first, at most LIVE_REFRESH_MAX_CALLS per run); only
+# if one of them changed is the plan recomputed. 0 disables.
+try:
+    LIVE_REFRESH_HORIZON_MIN = max(0, int(CONFIG.get("LIVE_REFRESH_HORIZON_MIN", "0")))
+    LIVE_REFRESH_MAX_AGE_MIN = max(1, int(CONFIG.get("LIVE_REFRESH_MAX_AGE_MIN", "15")))
+    LIVE_REFRESH_MAX_CALLS = max(1, int(CONFIG.get("LIVE_REFRESH_MAX_CALLS", "10")))
+except ValueError:
+    LIVE_REFRESH_HORIZON_MIN, LIVE_REFRESH_MAX_AGE_MIN, LIVE_REFRESH_MAX_CALLS = 0, 15, 10
+
+# Settings a plan depends on (besides route durations, the planned dates and the clock).
+# Output preferences and the API budget are left out: plans computed under budget
+# pressure are never stored, so otherwise the budget cannot change the result.
+_PLAN_CONTEXT_GLOBALS = (
+    "ORIGIN_ADDRESS", "DESTINATION_ADDRESS", "LATEST_ARRIVAL_LOCAL", "MORNING_WINDOW_START_LOCAL",
+    "WORK_HOURS", "LUNCH_MIN_MINUTES", "LUNCH_MAX_MINUTES", "LUNCH_STEP_MINUTES", "STEP_MINUTES",
+    "DAY_OFFSET", "PERSONAL_BREAKS_MIN", "AFTERNOON_ARRIVAL_LOCAL", "AFTERNOON_WINDOW_START_LOCAL",
+    "EXTEND_STEP_MINUTES", "EXTEND_WORSE_STEPS", "EXTEND_LATEST_LOCAL", "EXTEND_TARGET_SAVE_MIN",
+    "AVOID_THRESHOLD_MIN", "AVOID_STEP_MINUTES",
+    "TIMEBANK_CURRENT_MIN", "TIMEBANK_CAP_MIN", "TIMEBANK_MAX_SPEND_PER_DAY_MIN", "EXTENSION_ACTIVITY",
+    "MAX_LEAVE_TIME_LOCAL", "FRIDAY_EARLY_CUTOFF_LOCAL", "RUSH_WINDOW_START_LOCAL", "RUSH_WINDOW_END_LOCAL",
+    "EVENING_STD_BUFFER_MIN", "EVENING_STD_EXTRA_BUFFER_MIN", "EVENING_STD_PROBE_OFFSETS_MIN",
+    "LATE_PENALTY_START_LOCAL", "LATE_PENALTY_PER_15_MIN",
+    "GYM_ENABLED", "GYM_ADDRESSES", "GYM_MAX_DAYS_PER_WEEK", "GYM_PREFERRED_DAYS", "GYM_LEAVE_MODE",
+    "GYM_COMBO_MAX", "GYM_DEFER_MAX_MINUTES", "GYM_DEFER_STEP_MINUTES",
+    "GYM_TRAIN_MIN_MINUTES", "GYM_TRAIN_MAX_MINUTES", "GYM_TRAIN_STEP_MINUTES",
+    "WEEKLY_BLOCKS", "WEEKLY_START_DATE", "WEEKLY_HO_PERCENT",
+    "ROUTE_CACHE_GRANULARITY_MIN", "ROUTE_CACHE_PROBE_WINDOW_MIN",
+    "ROUTING_PROVIDER", "ROUTING_GRAPH_FILE", "ROUTE_LOWER_BOUND", "ROUTE_LOWER_BOUND_FACTOR",
+)
+
+class PlanDependencies:
+    """Route cache keys a planning pass read: hits, misses, peeks and stores.
+    The plan is a function of the settings and of the values behind these keys as they
+    stand after the pass (keys fetched during the pass included: a rerun would read
+    them from the cache instead). complete is cleared when a lookup failed or was
+    refused by the budget, since the plan then reflects that failure. valid_until is
+    the epoch second from which the clock changes the plan (a departure for today
+    passes), None if it does not.
+    """
+    def __init__(self):
+        self.keys: set[tuple[str, str, str]] = set()
+        self.complete = True
+        self.valid_until: float | None = None
+
+    def snapshot(self) -> list[list]:
+        """[serialized key, duration now (None if absent), fetch timestamp] per key."""
+        return [[_serialize_cache_key(k), _plan_dep_value(k), ROUTE_CACHE_TS.get(k)] for k in sorted(self.keys)]
+
+# Recorders of the running (cacheable) pass and of memoized half-day plans, innermost last
+_DEP_RECORDERS: list[PlanDependencies] = []
+
+def _note_dep(key: tuple[str, str, str]) -> None:
+    for rec in _DEP_RECORDERS:
+        rec.keys.add(key)
+
+@contextmanager
+def recording_deps(rec: PlanDependencies):
+    _DEP_RECORDERS.append(rec)
+    try:
+        yield rec
+    finally:
+        _DEP_RECORDERS.remove(rec)
+
+def _note_valid_until(until: datetime) -> None:
+    """The running computation holds only while the clock is before until."""
+    ts = until.timestamp()
+    for rec in _DEP_RECORDERS:
+        if rec.valid_until is None or ts < rec.valid_until:
+            rec.valid_until = ts
+
+def _clock_valid(valid_until: float | None) -> bool:
+    return valid_until is None or _now_local().timestamp() < valid_until
+
+def _plan_deps_incomplete() -> None:
+    """The running pass hit a failed or refused lookup; its result must not be cached."""
+    for rec in _DEP_RECORDERS:
+        rec.complete = False
+
+def _plan_dep_value(key: tuple[str, str, str]) -> float | None:
+    """Duration a lookup of key would see now (session first, then persistent cache)."""
+    dur = SESSION_ROUTE_CACHE.get(key)
+    if dur is None:
+        dur = ROUTE_CACHE.get(key)
+    return dur
+
+def _deps_unchanged(deps: list[tuple[tuple[str, str, str], float | None]]) -> bool:
+    return all(_plan_dep_value(k) == dur for k, dur in deps)
+
+def _plan_target(config_map: dict) -> tuple[str, datetime, list[str]]:
+    """What a planning pass covers: ("weekly", Monday, blocks) or ("single", day, [])."""
+    slot_blocks = build_blocks_from_env_slots(config_map)
     blocks_source = ",".join(slot_blocks) or WEEKLY_BLOCKS
     if blocks_source:
         # Determine start Monday
         if WEEKLY_START_DATE:
             base = datetime.strptime(WEEKLY_START_DATE, "%Y-%m-%d").replace(tzinfo=TZ)
         else:
-            today_local = datetime.now(TZ)
+            today_local = _now_local()
             base = today_local - timedelta(days=today_local.weekday())
             # If the entire Mon-Fri window is in the past (e.g., running on Sat/Sun),
             # shift to next week so the plan is forward-looking.
@@ -2270,9 +5119,524 @@ def main():
         blocks = [b.strip().upper() for b in blocks_source.split(",")]
         while len(blocks) < 5:
             blocks.append("OPEN")
-        logger.info("Weekly blocks source: %s", blocks_source)
+        return "weekly", base, blocks[:5]
+    # Basisdatum heute (mit Offset, z.B. morgen)
+    today_local = _now_local().replace(hour=0, minute=0, second=0, microsecond=0)
+    return "single", today_local + timedelta(days=DAY_OFFSET), []
+
+def plan_cache_key(kind: str, start: datetime, blocks: list[str]) -> str | None:
+    """Hash of everything the plan depends on except route durations, or None when the
+    plan cache does not apply to this run (disabled, --no-cache, record/replay)."""
+    if PLAN_CACHE_TTL_MIN <= 0 or DISABLE_ROUTE_CACHE or ROUTES_TRACE is not None:
+        return None
+    return _planning_digest({"kind": kind, "start": start.date().isoformat(), "blocks": blocks})
+
+def _planning_digest(target: dict) -> str:
+    """sha256 over target, the planning settings and the time zone. The clock is not part
+    of it: computations record until when it leaves them unchanged (valid_until)."""
+    context = {
+        **target,
+        "tz": _tz_name(),
+        "settings": {name: globals()[name] for name in _PLAN_CONTEXT_GLOBALS},
+    }
+    blob = json.dumps(context, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+def _load_plan_cache() -> dict:
+    try:
+        with open(PLAN_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Could not load plan cache %s: %s", PLAN_CACHE_FILE, e)
+        return {}
+    if not isinstance(data, dict) or data.get("version") != PLAN_CACHE_VERSION:
+        return {}
+    return data.get("entries") or {}
+
+def cached_plan(key: str) -> dict | None:
+    """Stored result for key if every cache entry it was computed from still holds the same
+    duration and it is younger than PLAN_CACHE_TTL_MIN. With live refresh the age does
+    not matter: the entries that can go stale are refetched first instead."""
+    entry = _load_plan_cache().get(key)
+    if entry is None:
+        return None
+    if not _clock_valid(entry.get("valid_until")):
+        logger.info("Plan cache: a planned departure has passed since, recomputing")
+        return None
+    if LIVE_REFRESH_HORIZON_MIN > 0:
+        changed = refresh_live_inputs(entry["deps"])
+        if changed:
+            logger.info("Plan cache: %d live route inputs changed (%s), recomputing",
+                        len(changed), ", ".join(sorted({k[2].split("|")[-1][:10] for k in changed})))
+            return None
+    else:
+        age_s = time.time() - float(entry.get("ts", 0))
+        if age_s > PLAN_CACHE_TTL_MIN * 60:
+            logger.info("Plan cache: stored result expired (%.0f min old)", age_s / 60)
+            return None
+    for skey, dur, _ts in entry.get("deps", []):
+        k = _deserialize_cache_key(skey)
+        if k is None or _plan_dep_value(k) != dur:
+            logger.info("Plan cache: route input changed (%s), recomputing", skey.replace("\u241f", " -> "))
+            return None
+    return entry
+
+def _live_bucket_time(key: tuple[str, str, str], now: datetime) -> datetime | None:
+    """Departure bucket of a canonical key if it lies inside the live horizon, else None."""
+    tz_name, _, stamp = key[2].partition("|")
+    if tz_name != _tz_name() or not stamp:
+        return None
+    t = datetime.strptime(stamp, "%Y-%m-%d %H:%M").replace(tzinfo=TZ)
+    if t + timedelta(minutes=ROUTE_CACHE_GRANULARITY_MIN) <= now or t > now + timedelta(minutes=LIVE_REFRESH_HORIZON_MIN):
+        return None
+    return t
+
+def refresh_live_inputs(deps: list[list]) -> list[tuple[str, str, str]]:
+    """Refetch the stale dependencies of a stored plan that lie inside the live horizon.
+    Returns the keys whose duration changed. Entries further ahead are left alone: a
+    recomputation would read them from the cache just the same."""
+    now = _now_local()
+    max_age_s = LIVE_REFRESH_MAX_AGE_MIN * 60
+    due: list[tuple[float, tuple[str, str, str], datetime]] = []
+    for skey, dur, ts in deps:
+        k = _deserialize_cache_key(skey)
+        if k is None or dur is None:
+            continue
+        t = _live_bucket_time(k, now)
+        fetched = ROUTE_CACHE_TS.get(k, ts or 0)
+        if t is not None and time.time() - fetched > max_age_s:
+            due.append((fetched, k, t))
+    due.sort()
+    changed: list[tuple[str, str, str]] = []
+    refreshed = 0
+    for _fetched, k, t in due[:LIVE_REFRESH_MAX_CALLS]:
+        before = _plan_dep_value(k)
+        try:
+            dur = refetch_route_bucket(k[0], k[1], t)
+        except Exception as e:
+            logger.warning("Live refresh stopped: %s", e)
+            break
+        refreshed += 1
+        if dur != before:
+            changed.append(k)
+    if due:
+        logger.info("Live refresh: %d of %d stale entries refetched, %d changed", refreshed, len(due), len(changed))
+    return changed
+
+def store_plan_result(key: str, kind: str, days: list[DayPlanDM], week_start: str | None, deps: PlanDependencies) -> None:
+    """Persist a finished plan with the cache entries it depended on (atomic write)."""
+    entries = _load_plan_cache()
+    entries[key] = {
+        "ts": time.time(),
+        "kind": kind,
+        "week_start": week_start,
+        "days": [d.to_dict(ndigits=None) for d in days],
+        "deps": deps.snapshot(),
+        "valid_until": deps.valid_until,
+    }
+    if len(entries) > PLAN_CACHE_MAX_ENTRIES:
+        newest = sorted(entries.items(), key=lambda kv: kv[1].get("ts", 0), reverse=True)
+        entries = dict(newest[:PLAN_CACHE_MAX_ENTRIES])
+    try:
+        tmp = PLAN_CACHE_FILE + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": PLAN_CACHE_VERSION, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp, PLAN_CACHE_FILE)
+        logger.info("Plan cache: stored result (%d route inputs) in %s", len(deps.keys), PLAN_CACHE_FILE)
+    except OSError as e:
+        logger.warning("Could not save plan cache %s: %s", PLAN_CACHE_FILE, e)
+
+# ---------------- Dry-run estimation and per-day/phase budget allocation ----------------
+
+class DryRunEstimator:
+    """Counts the (route, bucket) keys a planning pass needs, without calling the API.
+    Misses are answered with a placeholder duration (median rolled-up duration of the
+    key's time-of-week bucket, else the median cached duration of the same route, else
+    DRY_RUN_PLACEHOLDER_MIN) so the pass walks the scans like a real run would.
+    Placeholders live in the session cache only and are removed after the pass.
+    """
+    def __init__(self):
+        # key -> (day, phase) of the first lookup that needed it
+        self.needed: dict[tuple[str, str, str], tuple[str | None, str]] = {}
+        self.cached: dict[tuple[str, str, str], tuple[str | None, str]] = {}
+        self._route_median = self._medians()
+        self._medians_refreshed: set[tuple[str, str]] = set()
+
+    @staticmethod
+    def _medians() -> dict[tuple[str, str], float]:
+        """Median persistent duration per route decoded so far (none while tracing: the
+        replay only has the entries the recording read, so it would guess differently)."""
+        if ROUTES_TRACE is not None:
+            return {}
+        return {route: sorted(vals)[len(vals) // 2] for route, vals in ROUTE_STORE.durations_by_route().items()}
+
+    @staticmethod
+    def _slot() -> tuple[str | None, str]:
+        phase, day = _current_phase()
+        return (day, phase or "other")
+
+    def note_hit(self, hit_key: tuple[str, str, str], canonical_key: tuple[str, str, str]) -> None:
+        # A hit on a placeholder is a key this run still has to fetch
+        if hit_key in self.needed or canonical_key in self.needed:
+            return
+        self.cached.setdefault(canonical_key, self._slot())
+
+    def placeholder(self, origin_addr: str, destination_addr: str, key_time: datetime) -> float:
+        global _ROUTE_STORE_SEQ
+        key = _canonical_key(origin_addr, destination_addr, key_time.strftime('%Y-%m-%d %H:%M'))
+        self.needed.setdefault(key, self._slot())
+        route = (origin_addr, destination_addr)
+        if route not in self._route_median and route not in self._medians_refreshed:
+            # The lookup that just missed may have decoded the route's cache entries
+            self._medians_refreshed.add(route)
+            self._route_median = self._medians()
+        dur = _history_prior(origin_addr, destination_addr, key_time)
+        if dur is None:
+            dur = self._route_median.get(route, DRY_RUN_PLACEHOLDER_MIN)
+        _ROUTE_STORE_SEQ += 1
+        SESSION_ROUTE_CACHE[key] = dur
+        return dur
+
+    def slot_counts(self) -> dict[tuple[str | None, str], dict[str, int]]:
+        out: dict[tuple[str | None, str], dict[str, int]] = {}
+        for source, name in ((self.cached, "cached"), (self.needed, "to_fetch")):
+            for slot in source.values():
+                counts = out.setdefault(slot, {"cached": 0, "to_fetch": 0})
+                counts[name] += 1
+        return out
+
+    def slot_needs(self) -> dict[tuple[str | None, str], int]:
+        return {slot: c["to_fetch"] for slot, c in self.slot_counts().items() if c["to_fetch"]}
+
+def _water_fill(needs: dict, total: int) -> dict:
+    """Max-min fair split of total: small needs are met in full, the rest share equally."""
+    alloc = {}
+    remaining = max(0, total)
+    items = sorted(needs.items(), key=lambda kv: (kv[1], str(kv[0])))
+    for i, (key, need) in enumerate(items):
+        share = remaining // (len(items) - i)
+        alloc[key] = min(need, share)
+        remaining -= alloc[key]
+    return alloc
+
+class BudgetAllocator:
+    """Splits the remaining API budget across (day, phase) slots of a dry-run estimate.
+    Days share the budget max-min fairly; within a day the base plan (HO allocator, day
+    plan scans) is funded before optional phases (extension, gym combos). A reserve (BUDGET_RESERVE_PCT
+    plus whatever is not allotted) covers calls the dry run did not foresee. A slot that has
+    used its allotment and finds the reserve empty is refused, like the global cap.
+    """
+    def __init__(self, needs: dict[tuple[str | None, str], int], total: int, reserve_pct: float | None = None):
+        pct = BUDGET_RESERVE_PCT if reserve_pct is None else reserve_pct
+        self.total = max(0, total)
+        pool = self.total - int(self.total * max(0.0, min(0.5, pct)))
+        self.allotments = self._allocate(needs, pool)
+        self.reserve = self.total - sum(self.allotments.values())
+        self.used: dict[tuple[str | None, str], int] = {}
+        self.borrowed = 0
+        self.denied = 0
+
+    @staticmethod
+    def _allocate(needs: dict[tuple[str | None, str], int], pool: int) -> dict[tuple[str | None, str], int]:
+        day_needs: dict[str | None, int] = {}
+        for (day, _phase), need in needs.items():
+            day_needs[day] = day_needs.get(day, 0) + need
+        allotments: dict[tuple[str | None, str], int] = {}
+        for day, day_budget in _water_fill(day_needs, pool).items():
+            essential = {s: n for s, n in needs.items() if s[0] == day and s[1].split("/", 1)[0] in _ESSENTIAL_PHASES}
+            optional = {s: n for s, n in needs.items() if s[0] == day and s not in essential}
+            allotments.update(_water_fill(essential, day_budget))
+            spent = sum(allotments[s] for s in essential)
+            allotments.update(_water_fill(optional, day_budget - spent))
+        return allotments
+
+    def _slot(self) -> tuple[str | None, str]:
+        phase, day = _current_phase()
+        return (day, phase or "other")
+
+    def room(self) -> int:
+        """Calls the current slot can still charge: its allotment left plus the reserve."""
+        slot = self._slot()
+        return max(0, self.allotments.get(slot, 0) - self.used.get(slot, 0)) + max(0, self.reserve)
+
+    def try_charge(self) -> bool:
+        slot = self._slot()
+        used = self.used.get(slot, 0)
+        if used >= self.allotments.get(slot, 0):
+            if self.reserve <= 0:
+                self.denied += 1
+                return False
+            self.reserve -= 1
+            self.borrowed += 1
+        self.used[slot] = used + 1
+        return True
+
+    def soft_limit_reached(self) -> bool:
+        slot = self._slot()
+        allotted = self.allotments.get(slot, 0)
+        return self.reserve <= 0 and self.used.get(slot, 0) >= int(allotted * max(0.1, min(1.0, BUDGET_SOFT_PCT)))
+
+def estimate_api_calls(config_map: dict) -> DryRunEstimator:
+    """Run one planning pass in dry-run mode and return what it would have looked up.
+    Output, INFO logs, metrics and profiling of the pass are discarded; lookup counters
+    and the session cache are restored afterwards. A route trace stays active: the pass
+    makes no requests, but the persistent-cache entries it reads (and promotes into the
+    session cache for the real pass) must be in the trace for the replay to match.
+    """
+    global DRY_RUN, METRICS, PROFILER, CACHE_HIT_COUNT, CACHE_MISS_COUNT, RESOLUTION_BY_DAY
+    estimate = DryRunEstimator()
+    saved = (METRICS, PROFILER, CACHE_HIT_COUNT, CACHE_MISS_COUNT, RESOLUTION_BY_DAY)
+    DRY_RUN, METRICS, PROFILER, RESOLUTION_BY_DAY = estimate, PlannerMetrics(), None, {}
+    try:
+        with suppress_info_logs(), open(os.devnull, "w", encoding="utf-8") as sink, redirect_stdout(sink):
+            _run_planning_pass(config_map, "json")
+    except Exception as e:
+        logger.warning("Dry run stopped early (%s); estimate covers the days planned so far", e)
+    finally:
+        DRY_RUN = None
+        METRICS, PROFILER, CACHE_HIT_COUNT, CACHE_MISS_COUNT, RESOLUTION_BY_DAY = saved
+        for key in estimate.needed:
+            SESSION_ROUTE_CACHE.pop(key, None)
+        reset_duration_curves()
+    return estimate
+
+def choose_resolution_level(config_map: dict) -> DryRunEstimator:
+    """Set RESOLUTION_LEVEL to the finest degradation level whose dry-run estimate fits the
+    remaining budget (the coarsest one if none fits) and return that level's estimate.
+    Coarser levels need fewer calls but still scan every day over its full window.
+    """
+    global RESOLUTION_LEVEL
+    remaining = max(0, MAX_API_CALLS_PER_RUN - API_CALL_COUNT)
+    levels = range(len(RESOLUTION_LEVELS)) if BUDGET_DEGRADATION == "auto" else range(1)
+    for level in levels:
+        RESOLUTION_LEVEL = level
+        estimate = estimate_api_calls(config_map)
+        if len(estimate.needed) <= remaining:
+            break
+    return estimate
+
+def plan_budget_allocation(config_map: dict) -> BudgetAllocator | None:
+    """Dry-run the plan, coarsen the resolution until it fits and, if even the coarsest
+    level needs more calls than are left, return an allocator for that level."""
+    remaining = max(0, MAX_API_CALLS_PER_RUN - API_CALL_COUNT)
+    estimate = choose_resolution_level(config_map)
+    to_fetch = len(estimate.needed)
+    if RESOLUTION_LEVEL:
+        logger.warning(
+            "Budget tight: planning at resolution level %d (scan step %d min, cache bucket %d min)",
+            RESOLUTION_LEVEL, resolution_info(RESOLUTION_LEVEL)["scan_step_min"], _cache_bucket_min(),
+        )
+    if to_fetch <= remaining or BUDGET_ALLOCATION != "auto":
+        logger.info("Dry run: %d API calls needed, %d left in budget", to_fetch, remaining)
+        return None
+    needs = estimate.slot_needs()
+    logger.warning(
+        "Dry run: %d API calls needed but only %d left; splitting budget across %d days / %d phases",
+        to_fetch, remaining, len({day for day, _ in needs}), len(needs),
+    )
+    return BudgetAllocator(needs, remaining)
+
+def print_dry_run_report(estimate: DryRunEstimator, output_format: str = "text") -> None:
+    remaining = max(0, MAX_API_CALLS_PER_RUN - API_CALL_COUNT)
+    allocator = BudgetAllocator(estimate.slot_needs(), remaining)
+    counts = estimate.slot_counts()
+    to_fetch = len(estimate.needed)
+    slots = [
+        {
+            "day": day,
+            "phase": phase,
+            "cached": c["cached"],
+            "to_fetch": c["to_fetch"],
+            "allotment": c["to_fetch"] if to_fetch <= remaining else allocator.allotments.get((day, phase), 0),
+        }
+        for (day, phase), c in sorted(counts.items(), key=lambda kv: (kv[0][0] or "", kv[0][1]))
+    ]
+    resolution = resolution_info(RESOLUTION_LEVEL)
+    if output_format != "text":
+        _write_record({
+            "type": "dry_run",
+            "resolution": resolution,
+            "lookups": to_fetch + len(estimate.cached),
+            "cached": len(estimate.cached),
+            "to_fetch": to_fetch,
+            "budget_remaining": remaining,
+            "fits": to_fetch <= remaining,
+            "reserve": 0 if to_fetch <= remaining else allocator.reserve,
+            "slots": slots,
+        })
+        return
+    print(bold("\nDRY-RUN: API-BEDARF"))
+    print(hr())
+    print_kv("Routen-Buckets:", f"{to_fetch + len(estimate.cached)} (im Cache: {len(estimate.cached)}, neu: {to_fetch})")
+    verdict = green("reicht") if to_fetch <= remaining else red(f"reicht nicht, Zuteilung pro Tag/Phase (Reserve {allocator.reserve})")
+    print_kv("API-Budget:", f"{remaining} / {MAX_API_CALLS_PER_RUN} verfügbar – {verdict}")
+    if resolution["level"]:
+        print_kv("Auflösung:", f"Stufe {resolution['level']}: Raster {resolution['scan_step_min']} min, Cache-Bucket {resolution['cache_bucket_min']} min, Probe ±{resolution['probe_window_min']} min")
+    if not slots:
+        return
+    width = max(len("Phase"), max(len(s["phase"]) for s in slots))
+    print()
+    print(f"  {'Tag':<10}  {'Phase':<{width}}  {'Cache':>5} {'Neu':>5} {'Zuteilung':>9}")
+    for s in slots:
+        print(f"  {s['day'] or '-':<10}  {s['phase']:<{width}}  {s['cached']:>5} {s['to_fetch']:>5} {s['allotment']:>9}")
+    print(hr())
+
+# ---------------- Prefetch (off-peak cache warm-up for the coming days) ----------------
+try:
+    PREFETCH_MAX_CALLS = max(0, int(CONFIG.get("PREFETCH_MAX_CALLS", "1000")))
+    PREFETCH_RATE_PER_MIN = max(1, int(CONFIG.get("PREFETCH_RATE_PER_MIN", "60")))
+except ValueError:
+    PREFETCH_MAX_CALLS, PREFETCH_RATE_PER_MIN = 1000, 60
+PREFETCH_MAX_ROUNDS = 8
+
+def prefetch_targets(config_map: dict, days: int) -> list[tuple[str, str]]:
+    """Planning runs that cover the next days: (global to override, value) per run, i.e.
+    one WEEKLY_START_DATE per affected week in weekly mode, else one DAY_OFFSET per day."""
+    today = _now_local().replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = [today + timedelta(days=i) for i in range(1, days + 1)]
+    if build_blocks_from_env_slots(config_map) or WEEKLY_BLOCKS:
+        if WEEKLY_START_DATE:
+            return [("WEEKLY_START_DATE", WEEKLY_START_DATE)]
+        mondays = sorted({(d - timedelta(days=d.weekday())).strftime("%Y-%m-%d") for d in dates if d.weekday() < 5})
+        return [("WEEKLY_START_DATE", m) for m in mondays]
+    return [("DAY_OFFSET", i) for i in range(1, days + 1)]
+
+def run_prefetch(config_map: dict, days: int, output_format: str = "text") -> dict:
+    """Fill the route cache with every bucket the plans for the next days will look up.
+    Each round dry-runs all target plans and fetches what they still miss, paced to
+    PREFETCH_RATE_PER_MIN; the fetched durations steer the next round's scans, so rounds
+    repeat until a dry run finds nothing left (then a real run is all cache hits), the
+    PREFETCH_MAX_CALLS budget is used up or PREFETCH_MAX_ROUNDS is reached.
+    """
+    global MAX_API_CALLS_PER_RUN, API_CALL_COUNT
+    targets = prefetch_targets(config_map, days)
+    saved_budget, saved_calls = MAX_API_CALLS_PER_RUN, API_CALL_COUNT
+    MAX_API_CALLS_PER_RUN, API_CALL_COUNT = PREFETCH_MAX_CALLS, 0
+    pause_s = 60.0 / PREFETCH_RATE_PER_MIN
+    rounds = 0
+    missing = 0
+    stopped = None
+    try:
+        while rounds < PREFETCH_MAX_ROUNDS and stopped is None:
+            rounds += 1
+            needed: dict[tuple[str, str, str], None] = {}
+            for name, value in targets:
+                saved = globals()[name]
+                globals()[name] = value
+                try:
+                    needed.update(dict.fromkeys(estimate_api_calls(config_map).needed))
+                finally:
+                    globals()[name] = saved
+            missing = len(needed)
+            logger.info("Prefetch round %d: %d buckets missing for %d plan(s)", rounds, missing, len(targets))
+            if not needed:
+                break
+            for origin_addr, destination_addr, stamp in needed:
+                key_time = datetime.strptime(stamp.split("|")[-1], "%Y-%m-%d %H:%M").replace(tzinfo=TZ)
+                try:
+                    refetch_route_bucket(origin_addr, destination_addr, key_time)
+                except Exception as e:
+                    stopped = str(e)
+                    logger.warning("Prefetch stopped: %s", e)
+                    break
+                missing -= 1
+                time.sleep(pause_s)
+        if stopped is None:
+            # Buckets the plans found in the cache but past the soft TTL
+            revalidate_stale_routes(max_calls=MAX_API_CALLS_PER_RUN, pause_s=pause_s)
+    finally:
+        fetched = API_CALL_COUNT
+        MAX_API_CALLS_PER_RUN, API_CALL_COUNT = saved_budget, saved_calls
+        save_route_cache()
+    summary = {
+        "type": "prefetch",
+        "days": days,
+        "plans": [value for _name, value in targets],
+        "rounds": rounds,
+        "fetched": fetched,
+        "budget": PREFETCH_MAX_CALLS,
+        "missing": missing,
+        "complete": missing == 0 and stopped is None,
+    }
+    if output_format != "text":
+        _write_record(summary)
+    else:
+        print(bold("\nPREFETCH"))
+        print(hr())
+        print_kv("Zeitraum:", f"nächste {days} Tage ({len(targets)} Planung(en))")
+        print_kv("Abgefragt:", f"{fetched} / {PREFETCH_MAX_CALLS} Routen-Buckets in {rounds} Runden")
+        status = green("vollständig") if summary["complete"] else red(f"{missing} Buckets fehlen noch")
+        print_kv("Cache:", status)
+        print(hr())
+    return summary
+
+def run_planning(config_map: dict, output_format: str = "text") -> list[DayPlanDM]:
+    """Plan and print the weekly view (if blocks/slots are configured) or a single day,
+    using the module-level settings currently in effect, and return the planned days.
+    With DRY_RUN_ONLY the API call estimate is printed instead (no days). Otherwise, if
+    the estimate exceeds the remaining budget, the pass runs at a coarser resolution
+    (BUDGET_DEGRADATION) and/or with the remaining calls split across days and
+    phases (BUDGET_ALLOCATION).
+    """
+    global BUDGET_ALLOCATOR, RESOLUTION_LEVEL
+    RESOLUTION_BY_DAY.clear()
+    reset_offline_state()
+    try:
+        if DRY_RUN_ONLY:
+            print_dry_run_report(choose_resolution_level(config_map), output_format)
+            return []
+        # Unchanged settings and route inputs: print the stored result, skip all scans
+        cache_key = plan_cache_key(*_plan_target(config_map))
+        entry = cached_plan(cache_key) if cache_key else None
+        if entry is not None:
+            logger.info("Plan cache: inputs unchanged, reusing result from %s",
+                        datetime.fromtimestamp(entry["ts"], TZ).strftime("%H:%M:%S"))
+            days = [DayPlanDM.from_dict(d) for d in entry["days"]]
+            _render_plan(entry["kind"], days, entry["week_start"], LATEST_ARRIVAL_LOCAL, output_format)
+            if PLAN_SNAPSHOT_PATH:
+                week_start = entry["week_start"]
+                base = datetime.strptime(week_start, "%Y-%m-%d").replace(tzinfo=TZ) if week_start else None
+                write_plan_snapshot(PLAN_SNAPSHOT_PATH, entry["kind"], days, week_start=base)
+            return days
+        if (BUDGET_ALLOCATION == "auto" or BUDGET_DEGRADATION == "auto") and OFFLINE_REASON is None:
+            BUDGET_ALLOCATOR = plan_budget_allocation(config_map)
+        if not cache_key:
+            return _run_planning_pass(config_map, output_format)[1]
+        with recording_deps(PlanDependencies()) as deps:
+            kind, days, week_start = _run_planning_pass(config_map, output_format)
+        degraded = any(RESOLUTION_BY_DAY.values()) or (BUDGET_ALLOCATOR is not None and BUDGET_ALLOCATOR.denied)
+        if deps.complete and not degraded:
+            store_plan_result(cache_key, kind, days, week_start, deps)
+        return days
+    finally:
+        if BUDGET_ALLOCATOR is not None:
+            logger.info(
+                "Budget allocation: %d calls borrowed from reserve, %d refused",
+                BUDGET_ALLOCATOR.borrowed, BUDGET_ALLOCATOR.denied,
+            )
+        BUDGET_ALLOCATOR = None
+        RESOLUTION_LEVEL = 0
+        if sys.exc_info()[0] is None and not DRY_RUN_ONLY and OFFLINE_REASON is None:
+            # Stale entries served by this run are refetched once its output is complete
+            revalidate_stale_routes()
+
+def _run_planning_pass(config_map: dict, output_format: str = "text") -> tuple[str, list[DayPlanDM], str | None]:
+    """Plan and print the weekly view (if blocks/slots are configured) or a single day,
+    using the module-level settings currently in effect.
+    config_map supplies the per-slot keys (MO_AM, ...) for weekly mode.
+    output_format: text (human-readable), json (one document at the end) or
+    ndjson (one record per day, streamed as soon as the day is planned, then a summary record).
+    Returns (kind, days, week_start) of what was printed.
+    """
+    reset_duration_curves()
+    # Weekly mode: enabled if WEEKLY_BLOCKS or per-slot keys are provided
+    kind, base, blocks = _plan_target(config_map)
+    if kind == "weekly":
+        logger.info("Weekly blocks source: %s", ",".join(blocks))
         cfg = {
-            "blocks": blocks[:5],
+            "blocks": blocks,
             "latest_arrival_local": LATEST_ARRIVAL_LOCAL,
             "morning_window_start_local": MORNING_WINDOW_START_LOCAL,
             "work_hours": WORK_HOURS,
@@ -2282,35 +5646,337 @@ def main():
             "step_minutes": STEP_MINUTES,
             "ho_percent": WEEKLY_HO_PERCENT,
         }
-        render_weekly_output(base, cfg)
-        return
+        week_start = base.date().isoformat()
+        if output_format == "text":
+            days = render_weekly_output(base, cfg)
+        else:
+            days = []
+            for day in iter_weekly_days(base, cfg):
+                days.append(day)
+                if output_format == "ndjson":
+                    _write_record({"type": "day", "week_start": week_start, **day.to_dict()})
+            _write_weekly_summary_record(week_start, days, weekly_summary(days), output_format)
+        if PLAN_SNAPSHOT_PATH and DRY_RUN is None:
+            write_plan_snapshot(PLAN_SNAPSHOT_PATH, "weekly", days, week_start=base)
+        return kind, days, week_start
 
     # Single-day mode (default)
-    # Basisdatum heute (mit Offset, z.B. morgen)
-    today_local = datetime.now(TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-    day_local = today_local + timedelta(days=DAY_OFFSET)
+    day_local = base
 
+    day_t0 = time.perf_counter()
     morning = scan_morning_best_departure(day_local)
     evening = choose_best_evening_departure(morning["best_arrival"])
+    METRICS.observe("pendelplaner_day_plan_seconds", time.perf_counter() - day_t0, stage="base")
+
+    day = DayPlanDM(
+        date=day_local,
+        mode="OFFICE",
+        outbound=CommuteLeg(morning["best_departure"], morning["best_arrival"], morning["best_duration_minutes"]),
+        inbound=CommuteLeg(evening["evening_departure"], evening["evening_arrival_home"], evening["evening_duration_minutes"]),
+        strategy="base",
+        work_minutes=int(WORK_HOURS * 60),
+        lunch_minutes=evening["lunch_minutes"],
+        total_travel_minutes=morning["best_duration_minutes"] + evening["evening_duration_minutes"],
+        resolution=resolution_info(RESOLUTION_BY_DAY.get(None, 0)),
+        estimate=estimate_info(None),
+    )
+    _write_single_day(day, LATEST_ARRIVAL_LOCAL, output_format)
+    if PLAN_SNAPSHOT_PATH and DRY_RUN is None:
+        write_plan_snapshot(PLAN_SNAPSHOT_PATH, "single", [day])
+    return kind, [day], None
 
-    def fmt(dt: datetime) -> str:
-        return dt.astimezone(TZ).strftime("%Y-%m-%d %H:%M")
+# ---------------- Batch mode (multiple commuter profiles, one shared cache) ----------------
 
-    print("\n=== Ergebnisse (lokal: Europe/Zurich) ===")
-    print(f"Späteste gewünschte Ankunft: {day_local.strftime('%Y-%m-%d')} {LATEST_ARRIVAL_LOCAL}")
-    print("\n-- Hinfahrt --")
-    print(f"Beste Abfahrt:      {fmt(morning['best_departure'])}")
-    print(f"Ankunft (effektiv): {fmt(morning['best_arrival'])}")
-    print(f"Fahrzeit:           {morning['best_duration_minutes']:.1f} min")
+def _profile_value(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v).strip() for v in value)
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+# .env keys a batch profile may set: the ones AppConfig/using_config apply per profile and
+# the weekly slot keys. Everything else (cache, budget, provider, ...) is shared by the run.
+_PROFILE_KEYS = frozenset({
+    "ORIGIN_ADDRESS", "DESTINATION_ADDRESS", "LATEST_ARRIVAL_LOCAL", "MORNING_WINDOW_START_LOCAL",
+    "WORK_HOURS", "LUNCH_MIN_MINUTES", "LUNCH_MAX_MINUTES", "LUNCH_STEP_MINUTES", "STEP_MINUTES",
+    "DAY_OFFSET", "TZ", "PERSONAL_BREAKS_MIN", "WEEKLY_BLOCKS", "WEEKLY_START_DATE", "WEEKLY_HO_PERCENT",
+    "AFTERNOON_ARRIVAL_LOCAL", "AFTERNOON_WINDOW_START_LOCAL",
+    "EXTEND_STEP_MINUTES", "EXTEND_WORSE_STEPS", "EXTEND_LATEST_LOCAL", "EXTEND_TARGET_SAVE_MIN",
+    "AVOID_THRESHOLD_MIN", "AVOID_STEP_MINUTES",
+    "TIMEBANK_CURRENT_MIN", "TIMEBANK_CAP_MIN", "TIMEBANK_MAX_SPEND_PER_DAY_MIN", "EXTENSION_ACTIVITY",
+    "MAX_LEAVE_TIME_LOCAL", "FRIDAY_EARLY_CUTOFF_LOCAL", "GYM_ENABLED",
+    "GYM_TRAIN_MIN_MINUTES", "GYM_TRAIN_MAX_MINUTES", "GYM_TRAIN_STEP_MINUTES", "GYM_MAX_DAYS_PER_WEEK",
+    "GYM_PREFERRED_DAYS", "GYM_LEAVE_MODE", "GYM_COMBO_MAX", "GYM_DEFER_MAX_MINUTES", "GYM_DEFER_STEP_MINUTES",
+    *(f"GYM_ADDRESS_{n}" for n in range(1, 10)),
+    *(f"{d}_{half}" for d in ("MO", "TU", "WE", "TH", "FR") for half in ("AM", "PM")),
+})
+
+def load_batch_profiles(path: str) -> list[dict]:
+    """Read a batch profile file: a JSON list (or {"profiles": [...]}) of objects.
+    Each object uses the .env keys (ORIGIN_ADDRESS, LATEST_ARRIVAL_LOCAL, GYM_ADDRESS_1,
+    WEEKLY_BLOCKS, MO_AM, ...) to override the shared .env, plus an optional "name".
+    Keys outside _PROFILE_KEYS are rejected rather than silently ignored.
+    Returns list of {"name", "overlay"} dicts.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("profiles", [])
+    if not isinstance(data, list):
+        raise RuntimeError(f"Batch-Datei {path}: erwartet eine Liste von Profilen.")
+    profiles: list[dict] = []
+    seen: set[str] = set()
+    for i, entry in enumerate(data, start=1):
+        if not isinstance(entry, dict):
+            raise RuntimeError(f"Batch-Datei {path}: Profil {i} ist kein Objekt.")
+        name = str(entry.get("name") or f"profile{i}").strip()
+        if name in seen:
+            name = f"{name}-{i}"
+        seen.add(name)
+        overlay = {str(k).strip().upper(): _profile_value(v) for k, v in entry.items() if str(k).lower() != "name"}
+        unknown = sorted(set(overlay) - _PROFILE_KEYS)
+        if unknown:
+            raise RuntimeError(
+                f"Batch-Datei {path}: Profil {name}: {', '.join(unknown)} lässt sich nicht pro Profil setzen "
+                "(unbekannt oder nur in .env für den ganzen Lauf)."
+            )
+        profiles.append({"name": name, "overlay": overlay})
+    return profiles
+
+def _safe_filename(name: str) -> str:
+    cleaned = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._")
+    return cleaned or "profile"
+
+def run_batch(profiles_path: str, out_dir: str, output_format: str = "text") -> None:
+    """Plan every profile of a batch file in one run.
+    All profiles share the route caches and MAX_API_CALLS_PER_RUN, so legs common to several
+    commuters (same office, same gyms, same home) are fetched once and then served from
+    SESSION_ROUTE_CACHE. Each profile's output is written to <out_dir>/<name>.<txt|json|ndjson>
+    (with --snapshot also its plan snapshot to <out_dir>/<name>.snapshot.json).
+    """
+    global _USE_COLOR, PLAN_SNAPSHOT_PATH
+    snapshot_path = PLAN_SNAPSHOT_PATH
+    try:
+        profiles = load_batch_profiles(profiles_path)
+    except (OSError, ValueError, RuntimeError) as e:
+        logger.error("Batch abgebrochen: %s", e)
+        sys.exit(1)
+    os.makedirs(out_dir, exist_ok=True)
+    logger.info("Batch: %d profiles from %s", len(profiles), profiles_path)
+    summary: list[tuple[str, str, int, str]] = []
+    use_color = _USE_COLOR
+    for prof in profiles:
+        name = prof["name"]
+        overlay = prof["overlay"]
+        ext = "txt" if output_format == "text" else output_format
+        out_path = os.path.join(out_dir, f"{_safe_filename(name)}.{ext}")
+        if snapshot_path:
+            PLAN_SNAPSHOT_PATH = os.path.join(out_dir, f"{_safe_filename(name)}.snapshot.json")
+        calls_before = API_CALL_COUNT
+        status = "OK"
+        # Plain text in files, regardless of terminal color mode
+        _USE_COLOR = False
+        try:
+            cfg = AppConfig.from_env(overlay)
+            with open(out_path, "w", encoding="utf-8") as f, redirect_stdout(f):
+                try:
+                    with using_config(cfg):
+                        run_planning({**CONFIG, **overlay}, output_format)
+                except Exception as e:
+                    logger.error("Batch profile %s failed: %s", name, e)
+                    if output_format == "text":
+                        print(f"FEHLER: {e}")
+                    else:
+                        _write_record({"type": "error", "error": str(e)})
+                    status = "ERROR"
+        except Exception as e:
+            logger.error("Batch profile %s could not be set up: %s", name, e)
+            status = "ERROR"
+        finally:
+            _USE_COLOR = use_color
+            PLAN_SNAPSHOT_PATH = snapshot_path
+        used = API_CALL_COUNT - calls_before
+        logger.info("Batch profile %s: %s, %d API calls", name, status, used)
+        summary.append((name, status, used, out_path))
+
+    print("\n" + bold("BATCH SUMMARY"))
+    for name, status, used, out_path in summary:
+        status_txt = green(status) if status == "OK" else red(status)
+        print_kv(f"{name}:", f"{status_txt}  API calls: {used}  → {out_path}")
+    print_kv("Total API calls:", f"{API_CALL_COUNT} / {MAX_API_CALLS_PER_RUN} (shared cache: {len(SESSION_ROUTE_CACHE)} legs)")
+
+# ---------------- Watch mode (one long-running process, warm caches) ----------------
+try:
+    WATCH_INTERVAL_MIN = max(1, int(CONFIG.get("WATCH_INTERVAL_MIN", "5")))
+    WATCH_IDLE_INTERVAL_MIN = max(1, int(CONFIG.get("WATCH_IDLE_INTERVAL_MIN", "60")))
+    WATCH_NEAR_WINDOW_MIN = max(0, int(CONFIG.get("WATCH_NEAR_WINDOW_MIN", "120")))
+except ValueError:
+    WATCH_INTERVAL_MIN, WATCH_IDLE_INTERVAL_MIN, WATCH_NEAR_WINDOW_MIN = 5, 60, 120
+WATCH_JITTER_PCT = 0.1
+
+def next_decision_time(days: list[DayPlanDM], now: datetime) -> datetime | None:
+    """Earliest upcoming departure of a plan (leave home, leave office for gym or home)."""
+    upcoming = [
+        t for d in days
+        for t in (
+            d.outbound.departure if d.outbound else None,
+            d.gym.leave_office if d.gym else None,
+            d.inbound.departure if d.inbound else None,
+        )
+        if t is not None and t > now
+    ]
+    return min(upcoming, default=None)
+
+def watch_delay_seconds(days: list[DayPlanDM], now: datetime, failures: int = 0) -> float:
+    """Pause before the next watch run.
+    Every WATCH_INTERVAL_MIN within WATCH_NEAR_WINDOW_MIN of the next departure; further
+    out, sleep until that window opens (at most WATCH_IDLE_INTERVAL_MIN). After failed runs
+    the interval doubles per failure (capped at the idle interval). ±10 % jitter keeps
+    several watchers from hitting the API in lockstep.
+    """
+    if failures:
+        minutes = min(WATCH_IDLE_INTERVAL_MIN, WATCH_INTERVAL_MIN * 2 ** failures)
+    else:
+        nxt = next_decision_time(days, now)
+        until_near = (nxt - now).total_seconds() / 60 - WATCH_NEAR_WINDOW_MIN if nxt else math.inf
+        minutes = max(WATCH_INTERVAL_MIN, min(WATCH_IDLE_INTERVAL_MIN, until_near))
+    return minutes * 60 * (1 + random.uniform(-WATCH_JITTER_PCT, WATCH_JITTER_PCT))
+
+def run_watch(config_map: dict, output_format: str = "text", metrics_file: str | None = None) -> None:
+    """Re-plan periodically in this process until SIGTERM/SIGINT.
+    Session cache, duration memo and plan cache stay warm between runs; each run has its own
+    API budget. The route cache (and metrics file) is saved after every run and on shutdown.
+    """
+    import signal
+    import threading
 
-    print("\n-- Rückfahrt --")
-    print(f"Gewählte Mittagspause:  {evening['lunch_minutes']} min")
-    print(f"Abfahrt abends:         {fmt(evening['evening_departure'])}")
-    print(f"Fahrzeit zurück:        {evening['evening_duration_minutes']:.1f} min")
-    print(f"Ankunft zu Hause:       {fmt(evening['evening_arrival_home'])}")
+    global API_CALL_COUNT
+    stop = threading.Event()
 
-    total_travel = morning["best_duration_minutes"] + evening["evening_duration_minutes"]
-    print(f"\nGesamte Pendelzeit (hin+zurück): {total_travel:.1f} min")
+    def _request_stop(signum, frame):
+        logger.info("Watch: signal %d received, stopping after the current run", signum)
+        stop.set()
+
+    previous = {sig: signal.signal(sig, _request_stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+    days: list[DayPlanDM] = []
+    failures = 0
+    today = _now_local().date()
+    try:
+        while not stop.is_set():
+            now = _now_local()
+            if now.date() != today:
+                # Yesterday's legs are of no further use in memory; the persistent cache keeps them
+                today = now.date()
+                SESSION_ROUTE_CACHE.clear()
+                reset_duration_curves()
+                reset_halfday_memo()
+            if output_format == "text":
+                print(f"\n===== {now.strftime('%Y-%m-%d %H:%M:%S')} =====", flush=True)
+            API_CALL_COUNT = 0
+            try:
+                days = run_planning(config_map, output_format)
+                failures = 0
+                METRICS.inc("pendelplaner_watch_ticks", result="ok")
+            except Exception as e:
+                failures += 1
+                METRICS.inc("pendelplaner_watch_ticks", result="error")
+                logger.error("Watch: run failed (%d in a row): %s", failures, e)
+            sys.stdout.flush()
+            save_route_cache()
+            if metrics_file:
+                write_metrics_file(metrics_file)
+            delay = watch_delay_seconds(days, _now_local(), failures)
+            logger.info("Watch: %d API calls, next run in %.1f min", API_CALL_COUNT, delay / 60)
+            stop.wait(delay)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        save_route_cache()
+        logger.info("Watch: stopped, route cache saved")
+
+def main():
+    # Parse CLI and apply output prefs early
+    parser = _build_arg_parser()
+    args = parser.parse_args()
+    if args.watch and (args.dry_run or args.replay or args.batch or args.from_snapshot):
+        parser.error("--watch lässt sich nicht mit --dry-run, --replay, --batch oder --from-snapshot kombinieren")
+    if args.prefetch is not None and (args.prefetch < 1 or args.watch or args.dry_run or args.replay or args.batch or args.no_cache):
+        parser.error("--prefetch braucht eine Anzahl Tage >= 1 und lässt sich nicht mit --watch, --dry-run, --replay, --batch oder --no-cache kombinieren")
+    if args.offline and (args.prefetch is not None or args.record or args.replay or args.dry_run):
+        parser.error("--offline lässt sich nicht mit --prefetch, --record, --replay oder --dry-run kombinieren")
+    _apply_runtime_output_prefs(
+        force_color=args.color,
+        force_ascii=args.ascii,
+        width=args.width,
+        compact_weekly=args.compact_weekly,
+    )
+    if args.from_snapshot:
+        # Pure rendering: never touch the route cache file
+        atexit.unregister(save_route_cache)
+        try:
+            render_plan_snapshot(args.from_snapshot, args.format)
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            logger.error("Plan-Snapshot kann nicht gelesen werden: %s", e)
+            sys.exit(1)
+        return
+    global DRY_RUN_ONLY, PLAN_SNAPSHOT_PATH
+    DRY_RUN_ONLY = args.dry_run
+    PLAN_SNAPSHOT_PATH = args.snapshot
+    if args.replay:
+        start_routes_trace(args.replay, "replay")
+    elif not args.dry_run and not args.offline and ROUTING_PROVIDER == "google":
+        ensure_api_key_configured()
+    if args.record:
+        start_routes_trace(args.record, "record")
+    if getattr(args, "quiet", False):
+        logger.setLevel(logging.WARNING)
+    # Disable cache per flag
+    global DISABLE_ROUTE_CACHE
+    if getattr(args, "no_cache", False):
+        DISABLE_ROUTE_CACHE = True
+    global OFFLINE_FORCED
+    OFFLINE_FORCED = args.offline
+    # Prepare the routing provider
+    global API_CLIENT
+    try:
+        API_CLIENT = make_routing_provider(api_key=API_KEY or ("replay" if args.replay else ""))
+        logger.info("Routing provider: %s", API_CLIENT.name)
+    except (OSError, ValueError, KeyError, IndexError, TypeError) as e:
+        logger.error("Routing-Provider kann nicht gestartet werden: %s", e)
+        sys.exit(1)
+    global PROFILER
+    if args.profile or args.profile_trace:
+        PROFILER = PhaseProfiler(args.profile_trace)
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    try:
+        if getattr(args, "batch", None):
+            run_batch(args.batch, args.batch_out, args.format)
+            return
+        if args.prefetch:
+            run_prefetch(CONFIG, args.prefetch, args.format)
+            return
+        if args.watch:
+            run_watch(CONFIG, args.format, args.metrics_file)
+            return
+        run_planning(CONFIG, args.format)
+    except ReplayMissError as e:
+        logger.error("Replay abgebrochen: %s", e)
+        sys.exit(2)
+    finally:
+        if ROUTES_TRACE is not None:
+            ROUTES_TRACE.close()
+            if ROUTES_TRACE.mode == "replay":
+                logger.info("Replay served %d requests from %s", ROUTES_TRACE.served, ROUTES_TRACE.path)
+        if args.metrics_file:
+            write_metrics_file(args.metrics_file)
+        if PROFILER is not None:
+            PROFILER.close()
+            print("\nPROFILE (route lookups by phase / day)", file=sys.stderr)
+            for line in PROFILER.summary_lines():
+                print(line, file=sys.stderr)
 
 if __name__ == "__main__":
     main()